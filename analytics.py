@@ -0,0 +1,390 @@
+# analytics.py - compile a quiz question into a query plan and run it in one vectorized pass
+import os
+import json
+import asyncio
+import datetime
+import numpy as np
+import pandas as pd
+import cpu_executor
+from classifier import classify, numeric_target
+from csv_engine import load_csv_frame
+
+try:
+    import duckdb  # optional: runs the same plan as SQL, much faster on large frames
+except ImportError:
+    duckdb = None
+
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "auto")  # auto | pandas | duckdb
+# With ANALYTICS_ENGINE=auto, DuckDB (when installed) takes frames with at least this many rows
+ANALYTICS_DUCKDB_MIN_ROWS = int(os.getenv("ANALYTICS_DUCKDB_MIN_ROWS", "500000"))
+
+PAIR_OPS = ("correlation", "regression")
+# Operations that also make sense on text columns
+ANY_COLUMN_OPS = ("count", "distinct", "mode")
+REDUCERS = {"sum": "sum", "mean": "mean", "min": "min", "max": "max", "std": "std", "variance": "var",
+            "distinct": "nunique"}
+SQL_AGGREGATES = {
+    "sum": "sum({c})",
+    "mean": "avg({c})",
+    "min": "min({c})",
+    "max": "max({c})",
+    "count": "count(*)",
+    "median": "quantile_cont({c}, {q})",
+    "percentile": "quantile_cont({c}, {q})",
+    "std": "stddev_samp({c})",
+    "variance": "var_samp({c})",
+    "distinct": "count(DISTINCT {c})",
+    "mode": "mode({c})",
+    "correlation": "corr({y}, {x})",
+    "slope": "regr_slope({y}, {x})",
+    "intercept": "regr_intercept({y}, {x})",
+    "r2": "regr_r2({y}, {x})",
+    "predict": "regr_intercept({y}, {x}) + regr_slope({y}, {x}) * {xv}",
+}
+
+
+# ------------------------
+# Planning
+# ------------------------
+def compile_plan(instructions, df):
+    """
+    Resolve the question against a table: the classifier's plan, with the
+    target defaulted to a numeric column the question names, (y, x) picked
+    for correlations and regressions, and filters without a named subject
+    pointed at the target.
+    """
+    plan = classify(instructions).plan(list(df.columns))
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    op = plan["op"]
+    if op in PAIR_OPS:
+        pair = [c for c in plan["columns"] if c in numeric]
+        pair += [c for c in numeric if c not in pair and c != plan["group_by"]]
+        plan["columns"] = pair[:2] if len(pair) >= 2 else []
+        plan["column"] = pair[0] if pair else None
+    elif op in ANY_COLUMN_OPS:
+        if op != "count" and plan["column"] is None:
+            plan["column"] = next((c for c in df.columns if c != plan["group_by"]), None)
+    elif plan["column"] not in numeric:
+        plan["column"] = numeric_target(plan, numeric)
+
+    target = plan["column"] if plan["column"] in numeric else (numeric or [None])[0]
+    filters = []
+    for column, symbol, value in plan["filters"]:
+        if column is None:
+            if isinstance(value, str) or target is None:
+                continue  # a quoted value with no column to compare it to
+            column = target
+        elif isinstance(value, str) and column in numeric:
+            # A word compared with a numeric column matches nothing; report it instead of answering 0
+            plan["unparsed"] = plan["unparsed"] + [f"{column} {symbol} {value}"]
+            continue
+        filters.append((column, symbol, value))
+    plan["filters"] = filters
+    plan["filter"] = next((f for f in filters if not isinstance(f[2], str)), None)
+    return plan
+
+
+def join_frames(frames):
+    """
+    Inner-join tables left to right on the columns they share, preferring
+    key-like ones (text columns or names ending in id/key/code) when only
+    some shared columns are keys. Other clashing names keep the left value.
+    """
+    result = frames[0]
+    for other in frames[1:]:
+        shared = [c for c in result.columns if c in set(other.columns)]
+        if not shared:
+            raise ValueError(f"No shared column to join {list(result.columns)} with {list(other.columns)}")
+        keys = [c for c in shared if _is_key(c, result[c])] or shared
+        result = result.merge(other, on=keys, how="inner", suffixes=("", "_right"))
+    return result
+
+
+def _is_key(name, values):
+    name = str(name).lower()
+    return not pd.api.types.is_float_dtype(values) or name == "id" or name.endswith(("_id", " id", "key", "code"))
+
+
+# ------------------------
+# Execution
+# ------------------------
+def execute(plan, df, engine=ANALYTICS_ENGINE):
+    """Run a compiled plan over a DataFrame: DuckDB SQL for large frames when available, else pandas"""
+    if plan["op"] is None or (plan["op"] != "count" and plan["column"] is None):
+        return None
+    if plan.get("rank") and not plan["group_by"]:
+        return None  # "which <group> has the highest ..." over a group the table does not have
+    if duckdb is not None and (engine == "duckdb" or (engine == "auto" and len(df) >= ANALYTICS_DUCKDB_MIN_ROWS)):
+        try:
+            return _execute_duckdb(plan, df)
+        except duckdb.Error as e:
+            print(f"DuckDB plan failed, using pandas: {e}")
+    return _execute_pandas(plan, df)
+
+
+def run_query(frames, instructions, engine=ANALYTICS_ENGINE):
+    """Worker: join the tables if there are several, compile the plan and run it; returns (answer, plan)"""
+    frames = [_clean_columns(df) for df in frames]
+    df = frames[0] if len(frames) == 1 else join_frames(frames)
+    plan = compile_plan(instructions, df)
+    return execute(plan, df, engine), plan
+
+
+def aggregate_values(values, instructions):
+    """The question's operation over a flat list of values (e.g. a JSONPath selection); None without one"""
+    df = pd.DataFrame({"value": pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")})
+    if df["value"].isna().all():
+        df["value"] = pd.Series(values, dtype=object).astype(str)
+    plan = compile_plan(instructions, df)
+    if plan["op"] is None or plan["op"] in PAIR_OPS:
+        return None
+    plan.update(column="value", filters=[], filter=None, group_by=None)
+    return execute(plan, df, engine="pandas")
+
+
+def _execute_pandas(plan, df):
+    # Every filter folds into one boolean mask, so the table is sliced once
+    mask = np.ones(len(df), dtype=bool)
+    for flt in plan["filters"]:
+        mask &= _predicate(df, flt)
+    data = df if mask.all() else df[mask]
+    group = plan["group_by"]
+    op = plan["op"]
+
+    if op == "count":
+        return _by_group(data.groupby(group).size(), plan) if group else int(len(data))
+    if op in PAIR_OPS:
+        if len(plan["columns"]) < 2:
+            return None
+        y, x = plan["columns"]
+        pairs = data[[y, x]].apply(pd.to_numeric, errors="coerce")
+        if group:
+            pairs[group] = data[group]
+            return _by_group(pairs.groupby(group)[[y, x]].apply(lambda d: _pair_stat(d[y], d[x], plan)), plan)
+        return _plain(_pair_stat(pairs[y], pairs[x], plan))
+
+    values = data[plan["column"]]
+    if op not in ANY_COLUMN_OPS:
+        values = pd.to_numeric(values, errors="coerce")
+    if group:
+        return _by_group(_reduce(values.groupby(data[group]), plan), plan)
+    return _plain(_reduce(values, plan))
+
+
+def _by_group(series, plan):
+    """Per-group results as a dict, or the label of the group ranked first when the question asks which"""
+    if not plan.get("rank"):
+        return _as_dict(series)
+    series = pd.to_numeric(series, errors="coerce").dropna()
+    if series.empty:
+        return None
+    return _plain(series.idxmax() if plan["rank"] == "max" else series.idxmin())
+
+
+def _reduce(values, plan):
+    """One aggregate over a Series or a SeriesGroupBy"""
+    op = plan["op"]
+    if op in ("median", "percentile"):
+        return values.quantile(plan["q"])
+    if op == "mode":
+        if isinstance(values, pd.Series):
+            modes = values.mode()
+            return modes.iloc[0] if len(modes) else None
+        return values.agg(lambda s: s.mode().iloc[0] if s.notna().any() else None)
+    return getattr(values, REDUCERS[op])()
+
+
+def _pair_stat(y, x, plan):
+    y, x = y.to_numpy(dtype=float), x.to_numpy(dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    y, x = y[keep], x[keep]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    if plan["op"] == "correlation":
+        return float(np.corrcoef(x, y)[0, 1])
+    slope, intercept = np.polyfit(x, y, 1)
+    if plan["stat"] == "intercept":
+        return float(intercept)
+    if plan["stat"] == "r2":
+        return float(np.corrcoef(x, y)[0, 1] ** 2)
+    if plan["stat"] == "predict":
+        return float(intercept + slope * plan["x"])
+    return float(slope)
+
+
+def _predicate(df, flt):
+    column, symbol, value = flt
+    if isinstance(value, str):
+        # Quoted values match text case- and whitespace-insensitively
+        return (df[column].astype(str).str.strip().str.casefold() == value.strip().casefold()).to_numpy()
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        return {
+            ">=": values >= value,
+            "<=": values <= value,
+            ">": values > value,
+            "<": values < value,
+            "==": values == value,
+        }[symbol]
+
+
+def _execute_duckdb(plan, df):
+    sql, params = _to_sql(plan)
+    con = duckdb.connect()
+    try:
+        con.register("frame", df)
+        rows = con.execute(sql, params).fetchall()
+    finally:
+        con.close()
+    if plan.get("rank"):
+        return _plain(rows[0][0]) if rows else None
+    if plan["group_by"]:
+        return {str(key): _plain(value) for key, value in rows}
+    return _plain(rows[0][0]) if rows else None
+
+
+def _to_sql(plan):
+    """The plan as one aggregate query over the registered `frame`; returns (sql, params)"""
+    op = plan["op"]
+    y, x = plan["columns"][:2] if op in PAIR_OPS else (None, None)
+    number = lambda c: f"TRY_CAST({_ident(c)} AS DOUBLE)" if c is not None else None
+    column = _ident(plan["column"]) if op in ANY_COLUMN_OPS and plan["column"] is not None else number(plan["column"])
+    expression = SQL_AGGREGATES[plan["stat"] if op == "regression" else op].format(
+        c=column, q=float(plan["q"] or 0.5), y=number(y), x=number(x), xv=float(plan["x"] or 0))
+
+    where, params = [], []
+    for name, symbol, value in plan["filters"]:
+        if isinstance(value, str):
+            where.append(f"lower(trim(CAST({_ident(name)} AS VARCHAR))) = ?")
+            params.append(value.strip().lower())
+        else:
+            where.append(f"{number(name)} {'=' if symbol == '==' else symbol} ?")
+            params.append(value)
+
+    group = _ident(plan["group_by"]) if plan["group_by"] else None
+    sql = f"SELECT {group + ', ' if group else ''}{expression} AS answer FROM frame"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if group and plan.get("rank"):
+        sql += f" GROUP BY {group} ORDER BY answer {'DESC' if plan['rank'] == 'max' else 'ASC'} NULLS LAST LIMIT 1"
+    elif group:
+        sql += f" GROUP BY {group} ORDER BY {group}"
+    return sql, params
+
+
+def _ident(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _clean_columns(df):
+    if all(isinstance(c, str) and c == c.strip() for c in df.columns):
+        return df
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+async def solve_analytics(http_client, urls, instructions, cache=None):
+    """Load every CSV (cached frames skip download and parsing) and answer in the CPU pool; returns (answer, plan)"""
+    frames = list(await asyncio.gather(*(load_csv_frame(http_client, url, cache=cache) for url in urls)))
+    size = int(sum(df.memory_usage().sum() for df in frames))
+    answer, plan = await cpu_executor.run(run_query, frames, instructions, size=size)
+    print(f"🧮 Analytics plan: {plan} over {sum(map(len, frames))} rows")
+    return answer, plan
+
+
+# ------------------------
+# Answer coercion
+# ------------------------
+def coerce_answer(value, answer_type="number", decimals=None):
+    """
+    Shape an answer the way the question asks for it before it is submitted:
+    numeric strings become numbers and integral floats ints, "yes"/"true"
+    become booleans, JSON text becomes objects, dates become YYYY-MM-DD.
+    Floats are rounded when the question names a number of decimals.
+    """
+    value = _plain(value)
+    if answer_type == "boolean":
+        return _to_bool(value)
+    if answer_type == "json" and isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if answer_type == "date" and isinstance(value, str):
+        try:
+            return pd.Timestamp(value).date().isoformat()
+        except (ValueError, TypeError):
+            return value
+    if answer_type == "string":
+        if isinstance(value, (dict, list)):
+            return json.dumps(_round(value, decimals))
+        return value if value is None or isinstance(value, str) else str(_round(value, decimals))
+    if answer_type == "number" and isinstance(value, str):
+        value = _to_number(value)
+    return _round(value, decimals)
+
+
+def _plain(value):
+    """numpy/pandas values as plain JSON-able Python; NaN as None"""
+    if isinstance(value, pd.Series):
+        return _as_dict(value)
+    if isinstance(value, np.ndarray):
+        return [_plain(v) for v in value.tolist()]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat() if value.time() == datetime.time() else value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def _as_dict(series):
+    return {str(k): _plain(v) for k, v in series.items()}
+
+
+def _round(value, decimals):
+    if isinstance(value, dict):
+        return {k: _round(v, decimals) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_round(v, decimals) for v in value]
+    if isinstance(value, float):
+        if decimals is not None:
+            value = round(value, decimals)
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _to_number(text):
+    cleaned = text.strip().replace(",", "")
+    try:
+        return int(cleaned)
+    except ValueError:
+        try:
+            return float(cleaned)
+        except ValueError:
+            return text
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "yes", "y", "1"):
+            return True
+        if lowered in ("false", "no", "n", "0"):
+            return False
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return value
@@ -0,0 +1,103 @@
+# answer_log.py - persistent log of submitted answers, keyed by quiz URL and page-content hash, for warm-start reruns
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+ANSWER_LOG_PATH = os.getenv("ANSWER_LOG_PATH", ".cache/answers.sqlite")
+# 1: a page whose content is unchanged since a correct submit gets that answer again without solving
+ANSWER_REPLAY = os.getenv("ANSWER_REPLAY", "1") == "1"
+
+# What a solver can see of a page; anything that changes one of these changes the answer
+CONTENT_KEYS = ("full_text", "links", "tables", "forms", "images", "media", "json_blocks")
+
+
+def content_hash(task_info):
+    """Stable hash of a parsed quiz page (text, links, tables, embedded data)"""
+    content = {key: task_info.get(key) for key in CONTENT_KEYS}
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class AnswerLog:
+    """
+    Every submitted answer with its verdict, in one SQLite file shared by
+    the server's workers. lookup() returns the answer to replay for a page:
+    the latest submit for that URL, content hash and email, if it was
+    correct - quizzes are personalised, so one user's answer is never
+    replayed for another.
+    A linked file that changes behind an unchanged page is not seen here;
+    a replay the server rejects is logged and the page is solved again.
+    """
+
+    def __init__(self, path=ANSWER_LOG_PATH, replay=ANSWER_REPLAY):
+        self.path = path
+        self.replay = replay
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            " url TEXT, content_hash TEXT, answer TEXT, correct INTEGER, reason TEXT, solver TEXT,"
+            " email TEXT, job_id TEXT, created REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS answers_lookup ON answers (url, content_hash, email, created)")
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def close(self):
+        self._db.close()
+
+    def lookup(self, url, sha, email):
+        """The verified answer for this page and user, or None (also None with replay off)"""
+        if not self.replay:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer, correct FROM answers WHERE url = ? AND content_hash = ? AND email = ? "
+                "ORDER BY created DESC LIMIT 1", (url, sha, email)
+            ).fetchone()
+        if row is None or not row[1]:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def record(self, url, sha, answer, correct, reason="", solver=None, email=None, job_id=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO answers (url, content_hash, answer, correct, reason, solver, email, job_id, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, sha, json.dumps(answer, default=str), int(bool(correct)), reason, solver, email, job_id,
+                 time.time()),
+            )
+        if solver == "replay" and not correct:
+            self.rejected += 1
+
+    def history(self, url):
+        """Every logged submit for a quiz URL, oldest first - the audit trail"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT content_hash, answer, correct, reason, solver, email, job_id, created "
+                "FROM answers WHERE url = ? ORDER BY created", (url,)
+            ).fetchall()
+        keys = ("content_hash", "answer", "correct", "reason", "solver", "email", "job_id", "created")
+        return [dict(zip(keys, row), answer=json.loads(row[1]), correct=bool(row[2])) for row in rows]
+
+    def accuracy(self):
+        """Correct/total submits per solver"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT COALESCE(solver, 'unknown'), SUM(correct), COUNT(*) FROM answers GROUP BY 1"
+            ).fetchall()
+        return {solver: {"correct": correct, "total": total} for solver, correct, total in rows}
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "rejected": self.rejected}
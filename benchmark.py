@@ -0,0 +1,169 @@
+# benchmark.py - drive /solve against the mock quiz server and report latency, throughput, memory, accuracy
+#
+#   python benchmark.py --spawn --chains 20 --concurrency 4
+#   python benchmark.py --server http://127.0.0.1:8000 --mock http://127.0.0.1:9000 --out bench.json
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import subprocess
+import aiohttp
+from dotenv import load_dotenv
+from mock_quiz_server import task_type
+from quiz_client import percentile, summarize
+
+load_dotenv()
+
+STUDENT_EMAIL = os.getenv("STUDENT_EMAIL")
+STUDENT_SECRET = os.getenv("STUDENT_SECRET")
+
+
+async def run_chain(session, server, mock, poll_interval=0.5):
+    """Start one chain on the solver and wait for its job to finish"""
+    url = f"{mock}/quiz/{uuid.uuid4().hex[:8]}/0"
+    payload = {"email": STUDENT_EMAIL, "secret": STUDENT_SECRET, "url": url}
+    start = time.perf_counter()
+    async with session.post(f"{server}/solve", json=payload) as resp:
+        resp.raise_for_status()
+        job = await resp.json()
+    while True:
+        await asyncio.sleep(poll_interval)
+        async with session.get(f"{server}/jobs/{job['job_id']}") as resp:
+            job = await resp.json()
+        if job["status"] in ("done", "failed"):
+            job["latency"] = time.perf_counter() - start
+            return job
+
+
+async def sample_memory(session, server, samples, stop):
+    """Poll the solver's process_resident_memory_bytes gauge from /metrics"""
+    while not stop.is_set():
+        try:
+            async with session.get(f"{server}/metrics") as resp:
+                for line in (await resp.text()).splitlines():
+                    if line.startswith("process_resident_memory_bytes"):
+                        samples.append(float(line.split()[-1]))
+        except aiohttp.ClientError:
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def benchmark(server, mock, chains, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    memory = []
+    stop = asyncio.Event()
+    timeout = aiohttp.ClientTimeout(total=600)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async def limited():
+            async with semaphore:
+                try:
+                    return await run_chain(session, server, mock)
+                except Exception as e:
+                    return {"status": "failed", "error": str(e), "results": [], "latency": None}
+
+        sampler = asyncio.create_task(sample_memory(session, server, memory, stop))
+        await asyncio.sleep(0.2)
+        baseline = memory[0] if memory else None
+        start = time.perf_counter()
+        jobs = await asyncio.gather(*(limited() for _ in range(chains)))
+        wall = time.perf_counter() - start
+        stop.set()
+        await sampler
+
+    steps = [r for job in jobs for r in job.get("results", [])]
+    by_task = {}
+    for result in steps:
+        kind = task_type(int(result["url"].rstrip("/").split("/")[-1]))
+        entry = by_task.setdefault(kind, {"latencies": [], "correct": 0, "total": 0})
+        entry["latencies"].append(result.get("step_time", 0))
+        entry["total"] += 1
+        entry["correct"] += bool(result["correct"])
+
+    peak = max(memory) if memory else None
+    return {
+        "chains": chains,
+        "concurrency": concurrency,
+        "wall_time": round(wall, 3),
+        "chains_per_minute": round(chains / wall * 60, 2) if wall else None,
+        "failed_chains": sum(1 for job in jobs if job["status"] != "done"),
+        "chain_latency": summarize([job["latency"] for job in jobs if job.get("latency")]),
+        "step_latency": summarize([r.get("step_time", 0) for r in steps]),
+        "accuracy": round(sum(bool(r["correct"]) for r in steps) / len(steps), 4) if steps else None,
+        "memory": {
+            "baseline_bytes": baseline,
+            "peak_bytes": peak,
+            "per_chain_bytes": round((peak - baseline) / concurrency) if peak and baseline else None,
+        },
+        "by_task": {
+            kind: {
+                "accuracy": round(e["correct"] / e["total"], 4),
+                "p50": round(percentile(e["latencies"], 50), 4),
+                "p95": round(percentile(e["latencies"], 95), 4),
+            }
+            for kind, e in sorted(by_task.items())
+        },
+    }
+
+
+def spawn(server_port, mock_port):
+    """Start the mock quiz host and the solver (pointed at the mock /submit) as subprocesses"""
+    env = dict(os.environ, SUBMIT_URL=f"http://127.0.0.1:{mock_port}/submit")
+    mock = subprocess.Popen([sys.executable, "-m", "uvicorn", "mock_quiz_server:app",
+                             "--port", str(mock_port), "--log-level", "warning"], env=env)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "receive_requests_givenURL:app",
+                               "--port", str(server_port), "--log-level", "warning"],
+                              env=env, stdout=subprocess.DEVNULL)
+    return [mock, server]
+
+
+async def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quiz solver against the mock quiz server")
+    parser.add_argument("--server", default="http://127.0.0.1:8000")
+    parser.add_argument("--mock", default="http://127.0.0.1:9000")
+    parser.add_argument("--chains", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--spawn", action="store_true", help="start the mock server and solver locally")
+    parser.add_argument("--out", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    processes = []
+    if args.spawn:
+        processes = spawn(int(args.server.rsplit(":", 1)[1]), int(args.mock.rsplit(":", 1)[1]))
+    try:
+        asyncio.run(wait_until_up(f"{args.server}/metrics"))
+        asyncio.run(wait_until_up(f"{args.mock}/docs"))
+        report = asyncio.run(benchmark(args.server, args.mock, args.chains, args.concurrency))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
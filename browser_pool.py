@@ -0,0 +1,164 @@
+# browser_pool.py - shared Chromium pool used by the /solve endpoints
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from metrics import span
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "1"))
+BROWSER_MAX_CONTEXTS = int(os.getenv("BROWSER_MAX_CONTEXTS", "8"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "200"))
+BROWSER_MAX_AGE = float(os.getenv("BROWSER_MAX_AGE", "3600"))
+BROWSER_HEALTH_INTERVAL = float(os.getenv("BROWSER_HEALTH_INTERVAL", "30"))
+BROWSER_WARMUP = os.getenv("BROWSER_WARMUP", "1") == "1"
+
+
+class _BrowserSlot:
+    """One launched Chromium process and its bookkeeping"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.started_at = time.time()
+        self.active = 0
+        self.uses = 0
+        self.retired = False
+
+    def is_healthy(self):
+        return self.browser.is_connected()
+
+    def is_worn_out(self):
+        return self.uses >= BROWSER_MAX_USES or time.time() - self.started_at >= BROWSER_MAX_AGE
+
+
+class BrowserPool:
+    """
+    Keeps Chromium running for the lifetime of the app and hands out
+    one isolated browser context per quiz chain.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_contexts=BROWSER_MAX_CONTEXTS,
+                 warmup=BROWSER_WARMUP, headless=True):
+        self.size = max(1, size)
+        self.max_contexts = max(1, max_contexts)
+        self.warmup = warmup
+        self.headless = headless
+        self._playwright = None
+        self._slots = []
+        self._semaphore = asyncio.Semaphore(self.max_contexts)
+        self._lock = asyncio.Lock()
+        self._health_task = None
+        self.recycled = 0
+
+    async def start(self):
+        """Launch the browsers and start the health check loop"""
+        self._playwright = await async_playwright().start()
+        for _ in range(self.size):
+            self._slots.append(await self._launch())
+        if self.warmup:
+            await self._warm_up()
+        self._health_task = asyncio.create_task(self._health_loop())
+        print(f"🌐 Browser pool ready: {self.size} browser(s), {self.max_contexts} max contexts")
+
+    async def stop(self):
+        """Close every browser and stop Playwright"""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        for slot in self._slots:
+            await self._close_slot(slot)
+        self._slots = []
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Borrow an isolated browser context; blocks while the pool is at max concurrency"""
+        async with self._semaphore:
+            slot = await self._pick_slot()
+            slot.active += 1
+            slot.uses += 1
+            context = None
+            try:
+                context = await slot.browser.new_context(**context_options)
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                slot.active -= 1
+                if slot.retired and slot.active == 0:
+                    await self._close_slot(slot)
+                elif slot.is_worn_out() or not slot.is_healthy():
+                    await self._recycle(slot)
+
+    def stats(self):
+        return {
+            "browsers": len(self._slots),
+            "max_contexts": self.max_contexts,
+            "active_contexts": sum(s.active for s in self._slots),
+            "uses": [s.uses for s in self._slots],
+            "recycled": self.recycled,
+        }
+
+    async def _launch(self):
+        with span("browser_launch"):
+            browser = await self._playwright.chromium.launch(headless=self.headless)
+        return _BrowserSlot(browser)
+
+    async def _pick_slot(self):
+        async with self._lock:
+            for slot in list(self._slots):
+                if not slot.is_healthy():
+                    await self._recycle(slot, locked=True)
+            return min(self._slots, key=lambda s: s.active)
+
+    async def _recycle(self, slot, locked=False):
+        """Swap a crashed or worn-out browser for a fresh one"""
+        if locked:
+            await self._replace(slot)
+        else:
+            async with self._lock:
+                await self._replace(slot)
+
+    async def _replace(self, slot):
+        if slot not in self._slots:
+            return
+        print(f"♻️ Recycling browser (uses={slot.uses}, healthy={slot.is_healthy()})")
+        self._slots[self._slots.index(slot)] = await self._launch()
+        slot.retired = True
+        self.recycled += 1
+        if slot.active == 0 or not slot.is_healthy():
+            await self._close_slot(slot)
+
+    async def _close_slot(self, slot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    async def _warm_up(self):
+        """Open and close a blank page in every browser so the first chain skips renderer start-up"""
+        for slot in self._slots:
+            context = await slot.browser.new_context()
+            try:
+                page = await context.new_page()
+                await page.goto("about:blank")
+            finally:
+                await context.close()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(BROWSER_HEALTH_INTERVAL)
+            for slot in list(self._slots):
+                try:
+                    if not slot.is_healthy() or (slot.active == 0 and slot.is_worn_out()):
+                        await self._recycle(slot)
+                except Exception as e:
+                    print(f"Browser health check error: {e}")
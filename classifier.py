@@ -0,0 +1,342 @@
+# classifier.py - read the quiz text once: task kind, operation, filter, grouping and answer type
+import re
+from functools import lru_cache
+
+# When several operations are mentioned, the first in this list wins
+OPERATIONS = ["correlation", "regression", "percentile", "median", "std", "variance", "distinct", "mode",
+              "mean", "max", "min", "count", "sum"]
+# The ones a chunked running aggregate can compute; the rest need the whole column
+STREAMING_OPS = ("mean", "max", "min", "count", "sum")
+
+# tag -> alternatives; every tag is matched on word boundaries in one combined pass,
+# so "summary" is not "sum" and "capital" is not "api"
+KEYWORDS = {
+    "op:mean": r"mean|average|avg",
+    "op:max": r"max|maximum|largest|highest|biggest",
+    "op:min": r"min|minimum|smallest|lowest",
+    "op:count": r"count|how many|number of rows|number of records",
+    "op:sum": r"sum|total|add up",
+    "op:correlation": r"correlation|correlated|pearson",
+    "op:regression": r"regression|slope|intercept|r-squared|r squared|r2|predict|predicted|line of best fit",
+    "op:percentile": r"percentile|quartile|p\d{1,2}",
+    "op:median": r"median",
+    "op:std": r"standard deviation|std|stdev|std dev",
+    "op:variance": r"variance",
+    "op:distinct": r"distinct|unique",
+    "op:mode": r"mode|most common|most frequent",
+    "op:join": r"join|joined|merge|merged|combine|combined|both files|across files",
+    "source:api": r"api|endpoint|apis",
+    "source:csv": r"csv",
+    "source:pdf": r"pdf",
+    "source:image": r"image|images|picture|photo|png|jpe?g|gif|screenshot|chart|diagram",
+    "source:audio": r"audio|sound|recording|clip|wav|mp3|listen",
+    "ask:color": r"colou?r|colou?rs|hex|rgb",
+    "ask:width": r"width|wide",
+    "ask:height": r"height|tall",
+    "ask:pixels": r"pixels|pixel count|resolution|dimensions",
+    "ask:brightness": r"brightness|bright|luminance|grayscale|greyscale",
+    "ask:duration": r"duration|how long|seconds|length in seconds",
+    "ask:sample_rate": r"sample rate|sampling rate|hz|khz",
+    "ask:channels": r"channels|stereo|mono",
+    "ask:text": r"text|written|says|reads|transcribe|transcription|ocr",
+    "answer:boolean": r"true or false|yes or no|true/false|yes/no|boolean",
+    "answer:json": r"json object|json array|as json|in json",
+    "answer:string": r"as a string|as text|the name of|which \w+ has",
+    "answer:date": r"yyyy-mm-dd|iso date|as a date",
+    "answer:explicit": r"answer\s*:",
+}
+_GROUPS = {f"k{i}": tag for i, tag in enumerate(KEYWORDS)}
+KEYWORD_RE = re.compile(
+    r"(?<![\w-])(?:" + "|".join(f"(?P<{name}>{KEYWORDS[tag]})" for name, tag in _GROUPS.items()) + r")(?![\w-])",
+    re.IGNORECASE,
+)
+
+COMPARATORS = [
+    (">=", r">=|greater than or equal to|at least|no less than"),
+    ("<=", r"<=|less than or equal to|at most|no more than"),
+    (">", r">|greater than|more than|above|over|exceeding|exceeds"),
+    ("<", r"<|less than|below|under|fewer than"),
+    ("==", r"==|=|equal to|equals"),
+]
+NUMBER = r"(-?\d+(?:\.\d+)?)"
+COMPARATOR_RES = [
+    (symbol, re.compile(rf"(?:\b([\w ]+?)\s+)?(?:is\s+)?(?:{words})\s*(?:the\s+)?(?:cut-?off|{NUMBER})"))
+    for symbol, words in COMPARATORS
+]
+# Equality against a quoted value: region is "North", category = 'b'
+TEXT_EQUALS_RE = re.compile(r"\b([\w ]+?)\s+(?:is|=|==|equals|equal to)\s+[\"'`]([^\"'`]+)[\"'`]", re.IGNORECASE)
+# Unquoted equality against one word: "where region is north"; kept only when the subject names a column
+LOOSE_EQUALS_RE = re.compile(r"\b([\w ]+?)\s+(?:is|equals|equal to|==|=)\s+([a-z][\w-]*)\b", re.IGNORECASE)
+NOT_VALUES = {"the", "a", "an", "not", "no", "in", "of", "to", "than", "equal", "greater", "less", "more", "fewer",
+              "at", "it", "this", "that", "what", "which", "how", "there", "your", "its", "also", "only", "above",
+              "below", "over", "under", "between", "provided", "given", "shown", "listed", "available", "required"}
+# A condition the question puts on the rows: where/whose/for/with followed by a comparison word
+CLAUSE_RE = re.compile(r"\b(?:where|whose|for|with)\b[^.?!;,\n]*", re.IGNORECASE)
+CONDITION_RE = re.compile(r"\b(?:is|are|was|were|equals?|equal to|not|above|below|over|under|greater|less|more|"
+                          r"fewer|at least|at most|between|contains?|starts? with|ends? with)\b|[<>=]", re.IGNORECASE)
+# Where a bare clause ("for category b", "with region north") names a column, the next word is its value
+COLUMN_VALUE_RE = r"(?:the\s+)?{}(?:\s+column)?\s+(?:of\s+|=\s*)?[\"'`]?([\w.-]+)[\"'`]?"
+CUTOFF_RE = re.compile(r"\bcut-?off\b\D{0,20}?" + NUMBER, re.IGNORECASE)
+GROUP_RE = re.compile(r"\b(?:by|per|for each|grouped by)\s+(?:the\s+)?[\"'`]?([\w ]+?)[\"'`]?(?:[\s,.?]|$)",
+                      re.IGNORECASE)
+PERCENTILE_RE = re.compile(r"\b(\d{1,2}(?:\.\d+)?)(?:st|nd|rd|th)?[\s-]*percentile|\bp(\d{1,2})\b", re.IGNORECASE)
+QUARTILES = {"first quartile": 0.25, "lower quartile": 0.25, "third quartile": 0.75, "upper quartile": 0.75}
+PREDICT_RE = re.compile(r"\bpredict\w*\b.*?\b(?:for|when|at|if)\b[^\d-]{0,40}?" + NUMBER, re.IGNORECASE)
+# "Which region has the highest total sales?": the group whose aggregate ranks first
+RANK_RE = re.compile(
+    r"\bwhich\s+([\w ]+?)\s+(?:has|had|have|with|shows|showed|recorded|got)\s+(?:the\s+)?"
+    r"(highest|largest|biggest|greatest|most|maximum|max|top|lowest|smallest|least|fewest|minimum|min)\b([^.?!]*)",
+    re.IGNORECASE,
+)
+RANK_MAX = ("highest", "largest", "biggest", "greatest", "most", "maximum", "max", "top")
+DECIMALS_RE = re.compile(r"\b(\d+)\s+decimal(?:\s+places?)?|\bround(?:ed)?\s+to\s+(?:the\s+)?nearest\s+(integer|whole)",
+                         re.IGNORECASE)
+URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]*')
+
+
+class Classification:
+    """What one quiz asks for; computed once and shared by every solver"""
+
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.tags = set()
+        self.words = {}  # tag -> the words that matched it, in order
+        for match in KEYWORD_RE.finditer(text):
+            tag = _GROUPS[match.lastgroup]
+            self.tags.add(tag)
+            self.words.setdefault(tag, []).append(match.group().lower())
+
+        self.operation = next((op for op in OPERATIONS if f"op:{op}" in self.tags), None)
+        answer_types = [tag.split(":", 1)[1] for tag in self.tags if tag.startswith("answer:")]
+        self.answer_type = next((t for t in ("boolean", "json", "date", "string") if t in answer_types), "number")
+
+        group = GROUP_RE.search(text)
+        self.group_phrase = group.group(1) if group else None
+        # Spans already explained by something other than a filter (group-by, ranking, regression input)
+        covered = [group.span()] if group else []
+        # Ranking groups: the operation becomes the per-group aggregate and the answer is a group label
+        self.rank = None
+        rank = RANK_RE.search(text)
+        if rank:
+            self.rank = "max" if rank.group(2).lower() in RANK_MAX else "min"
+            covered.append(rank.span())
+            self.group_phrase = self.group_phrase or rank.group(1)
+            measure = rank.group(3).lower()
+            if re.search(r"\b(?:average|mean|avg)\b", measure):
+                self.operation = "mean"
+            elif re.search(r"\b(?:number of|count|rows?|records?|entries|occurrences)\b", measure) or not measure.strip():
+                self.operation = "count"
+            else:
+                self.operation = "sum"
+        # Regression: slope unless the text asks for another statistic; "predict ... for 12" gives x
+        self.stat = None
+        self.x = None
+        if self.operation == "regression":
+            words = self.words["op:regression"]
+            self.stat = next((s for s, names in (("predict", ("predict", "predicted")), ("r2", ("r-squared", "r squared", "r2")),
+                                                 ("intercept", ("intercept",))) if any(w in names for w in words)), "slope")
+            predict = PREDICT_RE.search(text)
+            if predict:
+                self.x = float(predict.group(1))
+                covered.append(predict.span())
+            else:
+                self.stat = "slope" if self.stat == "predict" else self.stat
+        # Percentile as a fraction: "90th percentile", "p95", "third quartile"
+        self.q = 0.5 if self.operation == "median" else None
+        if self.operation == "percentile":
+            match = PERCENTILE_RE.search(text)
+            quartile = next((q for name, q in QUARTILES.items() if name in self.lower), None)
+            self.q = float(match.group(1) or match.group(2)) / 100 if match else quartile or 0.5
+        decimals = DECIMALS_RE.search(text)
+        self.decimals = (0 if decimals.group(2) else int(decimals.group(1))) if decimals else None
+
+        # (subject phrase or None, symbol, value) of every comparison, in text order; all of them apply
+        # URLs are blanked out (same length, so positions hold) to keep "?page=2" from reading as a filter
+        plain = URL_RE.sub(lambda m: " " * len(m.group()), text)
+        found = []
+        taken = []
+        for symbol, pattern in COMPARATOR_RES:
+            for match in pattern.finditer(plain.lower()):
+                # The operator and value decide overlap; the lazy subject phrase may reach back over an earlier one
+                start = match.end(1) if match.group(1) else match.start()
+                if any(start < end and match.end() > begin for begin, end in taken):
+                    continue
+                value = match.group(2)
+                if value is None:
+                    cutoff = CUTOFF_RE.search(text)
+                    if not cutoff:
+                        continue
+                    value = cutoff.group(1)
+                if self.x is not None and float(value) == self.x:
+                    continue  # "predict y when x = 12" is the regression input, not a filter
+                taken.append((start, match.end()))
+                found.append((start, match.end(), (match.group(1) or "", symbol, float(value))))
+        for match in TEXT_EQUALS_RE.finditer(plain):
+            if not any(match.start(2) < end and match.end() > begin for begin, end in taken):
+                taken.append((match.end(1), match.end()))
+                found.append((match.end(1), match.end(), (match.group(1), "==", match.group(2))))
+        found.sort(key=lambda item: item[0])
+        self.filters = [f for _, _, f in found]
+        self.filter_spans = [(start, end) for start, end, _ in found]
+        # Unquoted candidates only become filters once the subject resolves to a column (see plan())
+        self.loose_filters = []
+        self.loose_spans = []
+        for match in LOOSE_EQUALS_RE.finditer(plain):
+            if match.group(2).lower() in NOT_VALUES:
+                continue
+            if any(match.end(1) < end and match.end() > begin for begin, end in taken):
+                continue
+            self.loose_filters.append((match.group(1), "==", match.group(2)))
+            self.loose_spans.append((match.end(1), match.end()))
+        self.covered = covered
+        self.clauses = _conditions(plain)
+        self.bare_clauses = _conditions(plain, bare=True)
+        numeric = [f for f in self.filters if not isinstance(f[2], str)]
+        self.filter = numeric[0] if numeric else None
+        # Sentence punctuation right after a URL is not part of it
+        self.urls = [url.rstrip(".,;:!?)'") for url in URL_RE.findall(text)]
+        self._plans = {}
+
+    def has(self, *tags):
+        return any(tag in self.tags for tag in tags)
+
+    @property
+    def streamable(self):
+        """Whether the chunked one-pass aggregate can answer this: a basic operation and at most one numeric filter"""
+        return (self.operation in STREAMING_OPS and self.rank is None and not self.loose_filters
+                and self.filters == ([self.filter] if self.filter else []))
+
+    def plan(self, columns):
+        """
+        Resolve the operation, target column, filters and group-by against a
+        table's columns: {op, column, filter: (column, symbol, value), filters,
+        group_by, columns, q, stat, x, rank, unparsed}. `filter` is the first
+        numeric filter, `columns` every mentioned column in text order, `rank`
+        "max" or "min" when the answer is the group whose aggregate ranks
+        first, `unparsed` the condition clauses no filter accounts for.
+        """
+        key = tuple(columns)
+        if key not in self._plans:
+            self._plans[key] = self._resolve(columns)
+        return dict(self._plans[key])
+
+    def _resolve(self, columns):
+        plan = {"op": self.operation, "column": None, "filter": None, "filters": [], "group_by": None,
+                "columns": [], "q": self.q, "stat": self.stat, "x": self.x,
+                "rank": self.rank, "unparsed": []}
+        if self.group_phrase:
+            plan["group_by"] = match_column(self.group_phrase, columns)
+        plan["filters"] = [(match_column(phrase, columns), symbol, value) for phrase, symbol, value in self.filters]
+        # Numeric filters without a subject apply to the target; text ones need a column of their own
+        explained = [span for span, (column, _, value) in zip(self.filter_spans, plan["filters"])
+                     if column is not None or not isinstance(value, str)]
+        for (phrase, symbol, value), span in zip(self.loose_filters, self.loose_spans):
+            column = match_column(phrase, columns)
+            if column is not None:
+                plan["filters"].append((column, symbol, value))
+                explained.append(span)
+        explained += self.covered
+        for start, end, words in self.bare_clauses:
+            pair = _column_value(words, columns)
+            if pair and not any(begin < end and stop > start for begin, stop in explained):
+                plan["filters"].append((pair[0], "==", pair[1]))
+                explained.append((start, end))
+        plan["unparsed"] = [text for start, end, text in self.clauses
+                            if not any(begin < end and stop > start for begin, stop in explained)]
+        if self.filter:
+            phrase, symbol, value = self.filter
+            plan["filter"] = (match_column(phrase, columns), symbol, value)
+
+        plan["columns"] = [c for c in mentioned_columns(self.lower, columns) if c != plan["group_by"]]
+        # The target is the first mentioned column nothing filters on, else the first mentioned at all
+        candidates = [c for c in plan["columns"] if c not in {f[0] for f in plan["filters"]}] or plan["columns"]
+        plan["column"] = candidates[0] if candidates else None
+        return plan
+
+    def to_dict(self):
+        return {"operation": self.operation, "answer_type": self.answer_type, "tags": sorted(self.tags),
+                "filters": self.filters, "group_by": self.group_phrase, "q": self.q, "stat": self.stat,
+                "x": self.x, "decimals": self.decimals, "rank": self.rank}
+
+
+def _conditions(text, bare=False):
+    """
+    (start, end, text) of every row condition: where/whose/for/with clauses,
+    split on and/or. With bare=True, the parts without a comparison word
+    instead, less the clause keyword ("category b" from "for category b");
+    they only count once they name a column.
+    """
+    found = []
+    for clause in CLAUSE_RE.finditer(text):
+        start = clause.start()
+        for part in re.split(r"(\s+(?:and|or)\s+)", clause.group()):
+            words = part if start > clause.start() else part.split(None, 1)[-1]  # not the clause keyword itself
+            separator = part.strip().lower() in ("and", "or")
+            if not separator and bool(CONDITION_RE.search(words)) != bare:
+                found.append((start, start + len(part), (words if bare else part).strip()))
+            start += len(part)
+    return found
+
+
+def _column_value(words, columns):
+    """(column, value) when `words` open with a column name and a value: "category b", "the region 'north'" """
+    for column in sorted(columns, key=lambda c: len(str(c)), reverse=True):
+        name = str(column).lower()
+        if len(name) < 2:
+            continue
+        match = re.match(COLUMN_VALUE_RE.format(re.escape(name)), words, re.IGNORECASE)
+        # "category a" ends the clause, so its "a" is a value; "category a bit higher" is prose
+        if match and (match.group(1).lower() not in NOT_VALUES or not words[match.end():].strip(" .")):
+            value = match.group(1).rstrip(".")
+            return column, float(value) if re.fullmatch(NUMBER, value) else value
+    return None
+
+
+@lru_cache(maxsize=256)
+def classify(text):
+    """Classification of a quiz text, memoised so every caller shares one pass"""
+    return Classification(text)
+
+
+def mentioned_columns(text, columns):
+    # Longest names first so "unit price" wins over "price"
+    found = []
+    for column in sorted(columns, key=len, reverse=True):
+        name = str(column).lower()
+        if len(name) > 1 and not name.isdigit():
+            match = re.search(rf"(?<!\w){re.escape(name)}(?!\w)", text)
+            if match:
+                found.append((match.start(), column))
+    return [column for _, column in sorted(found)]
+
+
+def numeric_target(plan, numeric):
+    """
+    The column to aggregate when the plan's target is not numeric: the first
+    numeric column the question names that no filter or group uses, then
+    any named numeric column, then the first unnamed one that is not an id.
+    """
+    used = {f[0] for f in plan["filters"]} | {plan["group_by"]}
+    named = [c for c in plan["columns"] if c in numeric]
+    unnamed = [c for c in numeric if c not in used]
+    for candidates in ([c for c in named if c not in used], named, [c for c in unnamed if not _is_id(c)], unnamed):
+        if candidates:
+            return candidates[0]
+    return None
+
+
+def _is_id(column):
+    name = str(column).lower()
+    return name == "id" or name.endswith(("_id", " id", "-id"))
+
+
+def match_column(phrase, columns):
+    phrase = phrase.lower().strip()
+    if not phrase:
+        return None
+    for column in sorted(columns, key=len, reverse=True):
+        name = str(column).lower()
+        if name and re.search(rf"(?<!\w){re.escape(name)}(?:\s+column)?$", phrase):
+            return column
+    return None
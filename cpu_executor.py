@@ -0,0 +1,206 @@
+# cpu_executor.py - run CPU-heavy parsing off the event loop in a shared process pool
+import os
+import time
+import pickle
+import asyncio
+import contextvars
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+import pandas as pd
+from metrics import REGISTRY
+
+# PDF_WORKERS was the size of the PDF-only pool this replaces
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1)))))
+# Inputs smaller than this are parsed inline; the pool round trip would cost more
+CPU_OFFLOAD_MIN_BYTES = int(os.getenv("CPU_OFFLOAD_MIN_BYTES", str(256 << 10)))
+# DataFrames at least this big come back through shared memory instead of the result pipe
+CPU_SHARED_MIN_BYTES = int(os.getenv("CPU_SHARED_MIN_BYTES", str(1 << 20)))
+
+# Workers come from a forkserver (spawn where there is none): forking the server process itself would copy
+# locks held by its threads (asyncio.to_thread, the resolver) and can deadlock a worker
+CPU_START_METHOD = os.getenv(
+    "CPU_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+_executor = None
+_inflight = set()
+# Wall-clock time (time.time()) by which CPU work for the current quiz step must finish
+_deadline = contextvars.ContextVar("cpu_deadline", default=None)
+# Set inside a worker process while a task runs, for check_deadline()
+_worker_deadline = None
+
+CPU_TASK_SECONDS = REGISTRY.histogram("cpu_task_seconds", "CPU pool tasks, submit to result, by task")
+CPU_TASKS = REGISTRY.counter("cpu_tasks_total", "CPU pool tasks by task and outcome")
+REGISTRY.gauge("cpu_tasks", "CPU pool tasks waiting for a worker vs. running",
+               lambda: {(("state", "running"),): sum(1 for f in list(_inflight) if f.running()),
+                        (("state", "queued"),): sum(1 for f in list(_inflight) if not f.running())})
+
+
+class DeadlineExceeded(Exception):
+    """A CPU task noticed that its quiz step is out of time"""
+
+
+class SharedFrame:
+    """
+    A DataFrame handed back from a worker: its column buffers sit in one
+    shared memory block and only the small pickle skeleton crosses the pipe.
+    """
+
+    def __init__(self, df):
+        buffers = []
+        self.meta = pickle.dumps(df, protocol=5, buffer_callback=buffers.append)
+        raws = [b.raw() for b in buffers]
+        self.sizes = [r.nbytes for r in raws]
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(self.sizes)))
+        offset = 0
+        for raw, size in zip(raws, self.sizes):
+            shm.buf[offset:offset + size] = raw
+            offset += size
+        self.name = shm.name
+        shm.close()
+        # The parent unlinks the block once it has read it
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    def load(self):
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            views, offset = [], 0
+            for size in self.sizes:
+                views.append(shm.buf[offset:offset + size])
+                offset += size
+            # One memcpy out of the block; the frame must not outlive the mapping
+            df = pickle.loads(self.meta, buffers=views).copy(deep=True)
+            for view in views:
+                view.release()
+            return df
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=CPU_WORKERS,
+                                        mp_context=multiprocessing.get_context(CPU_START_METHOD))
+    return _executor
+
+
+def start():
+    """Create the pool and its first worker at server startup, so the first quiz does not wait for them"""
+    _get_executor().submit(os.getpid)
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+@contextmanager
+def deadline(seconds):
+    """CPU work started in this block (this quiz step) stops once `seconds` have passed"""
+    token = _deadline.set(time.time() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline():
+    """Called by long-running worker functions between units of work (pages, chunks)"""
+    if _worker_deadline is not None and time.time() > _worker_deadline:
+        raise DeadlineExceeded("quiz step deadline passed")
+
+
+def _call(fn, args, task_deadline):
+    """Worker entry point: run fn under the step deadline and share large DataFrames"""
+    global _worker_deadline
+    _worker_deadline = task_deadline
+    try:
+        check_deadline()
+        return _share(fn(*args))
+    finally:
+        _worker_deadline = None
+
+
+def _share(result):
+    if isinstance(result, pd.DataFrame) and result.memory_usage(deep=False).sum() >= CPU_SHARED_MIN_BYTES:
+        return SharedFrame(result)
+    if isinstance(result, tuple):
+        return tuple(_share(item) for item in result)
+    return result
+
+
+def _unshare(result):
+    if isinstance(result, SharedFrame):
+        return result.load()
+    if isinstance(result, tuple):
+        return tuple(_unshare(item) for item in result)
+    return result
+
+
+async def run(fn, *args, size=None, name=None):
+    """
+    Run fn(*args) in the process pool and return its result. fn must be a
+    module-level function. Inputs under CPU_OFFLOAD_MIN_BYTES (pass `size`)
+    run inline instead. Queued work is cancelled when the caller is
+    cancelled; running work stops at its next check_deadline() once the
+    step deadline passes.
+    """
+    name = name or fn.__name__
+    if size is not None and size < CPU_OFFLOAD_MIN_BYTES:
+        return fn(*args)
+
+    task_deadline = _deadline.get()
+    start = time.perf_counter()
+    future = _get_executor().submit(_call, fn, args, task_deadline)
+    _inflight.add(future)
+    future.add_done_callback(_inflight.discard)
+    status = "ok"
+    try:
+        remaining = None if task_deadline is None else max(0.0, task_deadline - time.time())
+        async with asyncio.timeout(remaining):
+            result = await asyncio.wrap_future(future)
+        return _unshare(result)
+    except (asyncio.CancelledError, TimeoutError):
+        future.cancel()
+        status = "cancelled"
+        raise
+    except DeadlineExceeded:
+        status = "deadline"
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        if status != "ok":
+            # It may still finish after we gave up: free any shared memory it hands back
+            future.add_done_callback(_discard)
+        CPU_TASK_SECONDS.observe(time.perf_counter() - start, task=name)
+        CPU_TASKS.inc(task=name, status=status)
+
+
+def _discard(future):
+    if not future.cancelled() and future.exception() is None:
+        _release(future.result())
+
+
+def _release(result):
+    if isinstance(result, SharedFrame):
+        try:
+            shm = shared_memory.SharedMemory(name=result.name)
+            shm.close()
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    elif isinstance(result, tuple):
+        for item in result:
+            _release(item)
+
+
+def stats():
+    running = sum(1 for f in list(_inflight) if f.running())
+    return {"workers": CPU_WORKERS, "running": running, "queued": len(_inflight) - running}
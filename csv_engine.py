@@ -0,0 +1,315 @@
+# csv_engine.py - streaming, chunked CSV aggregation for quiz data files
+import os
+import asyncio
+from io import BytesIO
+import numpy as np
+import pandas as pd
+import cpu_executor
+from classifier import classify, numeric_target
+
+CSV_CHUNK_BYTES = int(os.getenv("CSV_CHUNK_BYTES", str(1 << 20)))
+# Files up to this size also keep their parsed DataFrame for the download cache
+CSV_FRAME_CACHE_BYTES = int(os.getenv("CSV_FRAME_CACHE_BYTES", str(32 << 20)))
+
+
+def plan_from_instructions(instructions, columns):
+    """
+    Work out what to compute from the task text: the operation, the
+    target column, an optional filter predicate and an optional group-by.
+    """
+    return classify(instructions).plan(columns)
+
+
+class StreamingAggregate:
+    """One-pass sum/count/mean/min/max, optionally filtered and grouped"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.groups = None
+        self.rows = 0
+
+    def update(self, df):
+        self.rows += len(df)
+        column = self.plan["column"]
+        if self.plan["filter"]:
+            df = df[_predicate(df, self.plan["filter"])]
+        if column is None:
+            # Counting rows: every row contributes a 1
+            values = pd.Series(1.0, index=df.index)
+        else:
+            values = df[column]
+        if self.plan["group_by"]:
+            part = values.groupby(df[self.plan["group_by"]]).agg(["count", "sum", "min", "max"])
+            self.groups = part if self.groups is None else _merge_groups(self.groups, part)
+            return
+        if column is None:
+            self.count += len(df)
+            return
+        values = values.dropna()
+        if values.empty:
+            return
+        self.count += int(values.count())
+        self.total += float(values.sum())
+        low, high = float(values.min()), float(values.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def merge(self, other):
+        """Fold in a partial aggregate computed over other rows (e.g. in a worker process)"""
+        self.rows += other.rows
+        self.count += other.count
+        self.total += other.total
+        for name, pick in (("minimum", min), ("maximum", max)):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            setattr(self, name, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        if other.groups is not None:
+            self.groups = other.groups if self.groups is None else _merge_groups(self.groups, other.groups)
+
+    def result(self):
+        op = self.plan["op"]
+        if op is None:
+            return None
+        if self.groups is not None:
+            stats = self.groups.copy()
+            stats["mean"] = stats["sum"] / stats["count"]
+            series = stats[op]
+            return {str(k): _clean_number(v) for k, v in series.items()}
+        if op == "count" or self.plan["column"] is None:
+            return self.count
+        if self.count == 0:
+            return None
+        return _clean_number({
+            "sum": self.total,
+            "mean": self.total / self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+        }[op])
+
+
+async def aggregate_csv_stream(chunks, instructions, chunk_bytes=CSV_CHUNK_BYTES, keep_frames=False):
+    """
+    Parse an async iterator of CSV bytes chunk by chunk with typed dtypes,
+    feeding each parsed chunk to a StreamingAggregate. Chunks are parsed and
+    aggregated in the CPU pool while the download continues, at most
+    CPU_WORKERS of them in flight, so memory stays bounded by the chunk size
+    rather than the file size.
+    Returns (answer, plan, frame); frame is the whole parsed file when
+    keep_frames is set and the file is under CSV_FRAME_CACHE_BYTES.
+    """
+    buffer = b""
+    header = None
+    dtypes = None
+    aggregate = None
+    frames = [] if keep_frames else None
+    consumed = 0
+    inflight = []
+
+    async def collect(task):
+        nonlocal frames
+        part, df = await task
+        aggregate.merge(part)
+        if frames is not None:
+            if df is not None:
+                frames.append(df)
+            else:
+                frames = None
+
+    try:
+        async for data in _rechunk(chunks, chunk_bytes):
+            buffer += data
+            cut = buffer.rfind(b"\n")
+            if cut == -1 or (header is None and buffer.count(b"\n", 0, cut + 1) < 2):
+                # Dtypes are inferred from the first chunk, so it needs a header plus data
+                continue
+            piece, buffer = buffer[:cut + 1], buffer[cut + 1:]
+            consumed += len(piece)
+            keep = frames is not None and consumed <= CSV_FRAME_CACHE_BYTES
+            if header is None:
+                header, dtypes, df = await cpu_executor.run(_parse_first, piece, size=len(piece))
+                aggregate = StreamingAggregate(plan_from_instructions(instructions, header))
+                _fill_default_column(aggregate.plan, df)
+                aggregate.update(df)
+                if frames is not None:
+                    frames.append(df)
+                continue
+            inflight.append(asyncio.ensure_future(cpu_executor.run(
+                _aggregate_piece, piece, header, dtypes, aggregate.plan, keep, size=len(piece))))
+            if len(inflight) >= cpu_executor.CPU_WORKERS:
+                await collect(inflight.pop(0))
+
+        if buffer.strip():
+            if header is None:
+                header, dtypes, df = _parse_first(buffer)
+                aggregate = StreamingAggregate(plan_from_instructions(instructions, header))
+                _fill_default_column(aggregate.plan, df)
+                aggregate.update(df)
+                if frames is not None:
+                    frames.append(df)
+            else:
+                keep = frames is not None and consumed + len(buffer) <= CSV_FRAME_CACHE_BYTES
+                inflight.append(asyncio.ensure_future(cpu_executor.run(
+                    _aggregate_piece, buffer, header, dtypes, aggregate.plan, keep, size=len(buffer))))
+        while inflight:
+            await collect(inflight.pop(0))
+    finally:
+        for task in inflight:
+            task.cancel()
+
+    if aggregate is None:
+        return None, None, None
+    print(f"📊 CSV plan: {aggregate.plan} over {aggregate.rows} rows")
+    frame = pd.concat(frames, ignore_index=True) if frames else None
+    return aggregate.result(), aggregate.plan, frame
+
+
+def aggregate_frame(df, instructions):
+    """Run the same instruction-driven aggregation over an in-memory DataFrame"""
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    aggregate = StreamingAggregate(plan_from_instructions(instructions, list(df.columns)))
+    _fill_default_column(aggregate.plan, df)
+    aggregate.update(df)
+    return aggregate.result(), aggregate.plan
+
+
+async def solve_csv(http_client, url, instructions, cache=None):
+    """
+    Stream a CSV download straight into the aggregator. With a download
+    cache, a previously parsed DataFrame skips both network and parsing.
+    Returns (answer, plan).
+    """
+    if cache is None:
+        async with http_client.request("GET", url) as resp:
+            resp.raise_for_status()
+            answer, plan, _ = await aggregate_csv_stream(resp.content.iter_chunked(64 * 1024), instructions)
+        return answer, plan
+
+    sha256 = cache.fresh_sha256(url)
+    df = cache.load_frame(sha256) if sha256 else None
+    if df is not None:
+        print(f"📦 Cached DataFrame for {url}")
+        answer, plan = aggregate_frame(df, instructions)
+        print(f"📊 CSV plan: {plan} over {len(df)} rows")
+        return answer, plan
+
+    download = cache.download(http_client, url)
+    answer, plan, frame = await aggregate_csv_stream(download.chunks(), instructions, keep_frames=True)
+    if frame is not None and download.sha256:
+        cache.save_frame(download.sha256, frame)
+    return answer, plan
+
+
+async def load_csv_frame(http_client, url, cache=None):
+    """The whole CSV as one DataFrame, parsed in the CPU pool; the download cache's parsed copy skips both"""
+    sha256 = cache.fresh_sha256(url) if cache is not None else None
+    df = cache.load_frame(sha256) if sha256 else None
+    if df is not None:
+        print(f"📦 Cached DataFrame for {url}")
+        return df
+    if cache is None:
+        data = await http_client.get_bytes(url)
+    else:
+        data, sha256 = await cache.get_bytes(http_client, url)
+    _, _, df = await cpu_executor.run(_parse_first, data, size=len(data))
+    if cache is not None and sha256 and len(data) <= CSV_FRAME_CACHE_BYTES:
+        cache.save_frame(sha256, df)
+    return df
+
+
+async def _rechunk(chunks, size):
+    pending = []
+    pending_size = 0
+    async for data in chunks:
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= size:
+            yield b"".join(pending)
+            pending, pending_size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+def _parse_first(piece):
+    """Parse the first chunk: detect a header row and fix dtypes for the rest of the file"""
+    first_line = piece.split(b"\n", 1)[0].decode("utf-8", "replace")
+    has_header = not all(_is_number(cell) for cell in first_line.split(",") if cell.strip())
+    if has_header:
+        df = pd.read_csv(BytesIO(piece))
+        df.columns = [str(c).strip() for c in df.columns]
+    else:
+        df = pd.read_csv(BytesIO(piece), header=None)
+        df.columns = [str(c) for c in df.columns]
+    dtypes = {c: (np.float64 if pd.api.types.is_numeric_dtype(df[c]) else object) for c in df.columns}
+    return list(df.columns), dtypes, df.astype(dtypes)
+
+
+def _aggregate_piece(piece, header, dtypes, plan, keep_frame):
+    """Worker: parse one chunk and aggregate it; the parsed frame comes back only if asked for"""
+    df = _parse_piece(piece, header, dtypes)
+    part = StreamingAggregate(plan)
+    part.update(df)
+    return part, (df if keep_frame else None)
+
+
+def _parse_piece(piece, header, dtypes):
+    try:
+        return pd.read_csv(BytesIO(piece), header=None, names=header, dtype=dtypes)
+    except (ValueError, TypeError):
+        # A numeric column picked up a stray value: parse loosely and coerce
+        df = pd.read_csv(BytesIO(piece), header=None, names=header, dtype=object)
+        for column, dtype in dtypes.items():
+            if dtype is np.float64:
+                df[column] = pd.to_numeric(df[column], errors="coerce")
+        return df
+
+
+def _fill_default_column(plan, df):
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    if plan["column"] not in numeric and plan["op"] != "count":
+        plan["column"] = numeric_target(plan, numeric)
+    # The stream applies one numeric filter; any other condition is reported rather than silently dropped
+    numeric_filters = [f for f in plan["filters"] if not isinstance(f[2], str)]
+    ignored = [f for f in plan["filters"] if isinstance(f[2], str)] + numeric_filters[1:]
+    if ignored:
+        plan["unparsed"] = plan["unparsed"] + [" ".join(str(part) for part in f) for f in ignored]
+    if plan["filter"] and plan["filter"][0] is None:
+        target = plan["column"] if plan["column"] is not None else (numeric or [None])[0]
+        plan["filter"] = (target, plan["filter"][1], plan["filter"][2]) if target is not None else None
+
+
+def _predicate(df, flt):
+    column, symbol, value = flt
+    values = df[column]
+    return {
+        ">=": values >= value,
+        "<=": values <= value,
+        ">": values > value,
+        "<": values < value,
+        "==": values == value,
+    }[symbol]
+
+
+def _merge_groups(left, right):
+    merged = left.add(right[["count", "sum"]], fill_value=0)[["count", "sum"]]
+    both = pd.concat([left[["min", "max"]], right[["min", "max"]]])
+    extremes = both.groupby(level=0).agg({"min": "min", "max": "max"})
+    return merged.join(extremes)
+
+
+def _is_number(cell):
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def _clean_number(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,70 @@
+# deadline.py - chain time budget split into per-step budgets
+import os
+import time
+from collections import deque
+
+CHAIN_BUDGET = float(os.getenv("CHAIN_BUDGET", "180"))
+# Kept back from every step so the answer can still be submitted
+SUBMIT_RESERVE = float(os.getenv("SUBMIT_RESERVE", "8"))
+# Each step may use 1/STEP_SHARE of the time left, as if that many steps were still to come
+STEP_SHARE = float(os.getenv("STEP_SHARE", "3"))
+STEP_MIN = float(os.getenv("STEP_MIN", "15"))
+# A step may also take this many times the slowest recent step: slow steps raise the budget, fast ones never cap it
+STEP_HEADROOM = float(os.getenv("STEP_HEADROOM", "3"))
+
+
+class ChainDeadline:
+    """
+    Tracks the time left for a quiz chain and hands each step a budget
+    derived from what remains, raised when recent steps were slow.
+    """
+
+    def __init__(self, budget=CHAIN_BUDGET, history=10):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.latencies = deque(maxlen=history)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        return max(0.0, self.budget - self.elapsed())
+
+    def expired(self):
+        # Not worth starting a step that cannot even reach its submit
+        return self.remaining() <= SUBMIT_RESERVE
+
+    def step_budget(self):
+        """Seconds the next step may spend before submitting its best answer"""
+        available = self.remaining() - SUBMIT_RESERVE
+        budget = max(STEP_MIN, available / STEP_SHARE)
+        if self.latencies:
+            budget = max(budget, STEP_HEADROOM * max(self.latencies))
+        return max(0.0, min(available, budget))
+
+    def step(self):
+        return StepBudget(self, self.step_budget())
+
+    def record(self, seconds):
+        self.latencies.append(seconds)
+
+
+class StepBudget:
+    """One quiz step's share of the chain budget"""
+
+    def __init__(self, chain, seconds):
+        self.chain = chain
+        self.seconds = seconds
+        self.started = time.monotonic()
+
+    def remaining(self):
+        return max(0.0, self.seconds - (time.monotonic() - self.started))
+
+    def submit_timeout(self):
+        """Time allowed for the submit call: the reserve, but never past the chain deadline"""
+        return max(1.0, min(SUBMIT_RESERVE, self.chain.remaining()))
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started
+        self.chain.record(elapsed)
+        return elapsed
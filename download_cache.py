@@ -0,0 +1,340 @@
+# download_cache.py - content-addressed cache for quiz data files and their parsed artifacts
+#
+# The URL index is a SQLite file, so every server worker (SERVER_WORKERS > 1) can share one
+# cache directory: index writes and eviction are transactions, and eviction never drops a
+# blob another process has already opened (an unlinked file stays readable on POSIX).
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import pandas as pd
+
+DOWNLOAD_CACHE_DIR = os.getenv("DOWNLOAD_CACHE_DIR", os.path.join(".cache", "downloads"))
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(512 << 20)))
+DOWNLOAD_CACHE_MEMORY_BYTES = int(os.getenv("DOWNLOAD_CACHE_MEMORY_BYTES", str(64 << 20)))
+# Within this many seconds a cached URL is reused without revalidating
+DOWNLOAD_CACHE_FRESH = float(os.getenv("DOWNLOAD_CACHE_FRESH", "300"))
+
+READ_CHUNK = 64 * 1024
+
+
+class Download:
+    """
+    One URL's body as an async stream of chunks. On a miss the body is
+    hashed and written to disk as it streams; on a hit it is replayed
+    from memory or disk. sha256 is set once the stream is consumed.
+    """
+
+    def __init__(self, cache, http_client, url):
+        self.cache = cache
+        self.http_client = http_client
+        self.url = url
+        self.sha256 = None
+        self.size = 0
+        self.from_cache = False
+
+    async def chunks(self):
+        await self.cache.wait_for_prefetch(self.url)
+        entry = self.cache.lookup(self.url)
+        if entry and time.time() - entry["fetched_at"] < DOWNLOAD_CACHE_FRESH:
+            source = self.cache.open_blob(entry)
+            if source is not None:
+                async for chunk in self._replay(entry, source):
+                    yield chunk
+                return
+            entry = None  # another worker evicted it since the lookup
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with self.http_client.request("GET", self.url, headers=headers) as resp:
+            if resp.status == 304 and entry:
+                source = self.cache.open_blob(entry)
+                if source is not None:
+                    self.cache.touch(self.url, refreshed=True)
+                    async for chunk in self._replay(entry, source):
+                        yield chunk
+                    return
+            else:
+                resp.raise_for_status()
+                async for chunk in self._store(resp):
+                    yield chunk
+                return
+        # Revalidated a blob another worker evicted meanwhile: fetch it whole
+        async with self.http_client.request("GET", self.url) as resp:
+            resp.raise_for_status()
+            async for chunk in self._store(resp):
+                yield chunk
+
+    async def _store(self, resp):
+        """Stream a 200 response through, hashing it into a blob"""
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                async for chunk in resp.content.iter_chunked(READ_CHUNK):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    self.size += len(chunk)
+                    yield chunk
+            self.sha256 = digest.hexdigest()
+            self.cache.commit(self.url, self.sha256, tmp_path, self.size,
+                              resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    async def _replay(self, entry, source):
+        """Yield a cached body from memory (bytes) or from an already opened blob file"""
+        self.from_cache = True
+        self.sha256 = entry["sha256"]
+        self.size = entry["size"]
+        self.cache.touch(self.url)
+        if isinstance(source, bytes):
+            for i in range(0, len(source), READ_CHUNK):
+                yield source[i:i + READ_CHUNK]
+            return
+        with source as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, READ_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class DownloadCache:
+    """
+    URL -> content index with ETag/Last-Modified revalidation, SHA-256
+    addressed blobs on disk, a small in-memory tier, size-bounded LRU
+    eviction, and parsed artifacts stored next to each blob. Safe to share
+    between processes.
+    """
+
+    FIELDS = ("url", "sha256", "size", "etag", "last_modified", "fetched_at", "last_used")
+
+    def __init__(self, root=DOWNLOAD_CACHE_DIR, max_bytes=DOWNLOAD_CACHE_MAX_BYTES,
+                 memory_bytes=DOWNLOAD_CACHE_MEMORY_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.blob_dir = os.path.join(root, "blobs")
+        self.artifact_dir = os.path.join(root, "artifacts")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.index_path = os.path.join(root, "index.sqlite")
+        for path in (self.blob_dir, self.artifact_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(self.index_path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " url TEXT PRIMARY KEY, sha256 TEXT, size INTEGER, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS urls_sha256 ON urls (sha256)")
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self.hits = 0
+        self.misses = 0
+        self._prefetching = {}
+
+    def download(self, http_client, url):
+        return Download(self, http_client, url)
+
+    def prefetch(self, http_client, url):
+        """Start downloading `url` in the background unless it is fresh or already on its way"""
+        if url in self._prefetching or self.fresh_sha256(url):
+            return
+        task = asyncio.create_task(self.download(http_client, url).read())
+        self._prefetching[url] = task
+        task.add_done_callback(lambda t: self._prefetch_done(url, t))
+
+    async def wait_for_prefetch(self, url):
+        """Let a running prefetch of `url` finish so it is served from cache, not fetched twice"""
+        task = self._prefetching.get(url)
+        if task is not None and task is not asyncio.current_task():
+            await asyncio.wait([task])
+
+    def _prefetch_done(self, url, task):
+        self._prefetching.pop(url, None)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Prefetch of {url} failed: {task.exception()}")
+
+    async def get_bytes(self, http_client, url):
+        """Whole body plus its SHA-256, from cache when possible"""
+        download = self.download(http_client, url)
+        data = await download.read()
+        self.memory_put(download.sha256, data)
+        return data, download.sha256
+
+    def fresh_sha256(self, url):
+        """SHA-256 of a URL's cached body if it can be reused without revalidating"""
+        entry = self._entry(url)
+        if entry and time.time() - entry["fetched_at"] < DOWNLOAD_CACHE_FRESH \
+                and os.path.exists(self.blob_path(entry["sha256"])):
+            return entry["sha256"]
+        return None
+
+    def lookup(self, url):
+        entry = self._entry(url)
+        if entry and os.path.exists(self.blob_path(entry["sha256"])):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def open_blob(self, entry):
+        """The cached body as bytes (memory tier) or an open file, or None if it was evicted"""
+        data = self.memory_get(entry["sha256"])
+        if data is not None:
+            return data
+        try:
+            return open(self.blob_path(entry["sha256"]), "rb")
+        except FileNotFoundError:
+            return None
+
+    def touch(self, url, refreshed=False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute("UPDATE urls SET last_used = ?, fetched_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._db.execute("UPDATE urls SET last_used = ? WHERE url = ?", (now, url))
+
+    def commit(self, url, sha256, tmp_path, size, etag, last_modified):
+        now = time.time()
+        with self._transaction():
+            # Inside the write lock, so no other worker's eviction can remove the blob before its row exists
+            blob = self.blob_path(sha256)
+            if not os.path.exists(blob):
+                os.replace(tmp_path, blob)
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, size, etag, last_modified, fetched_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, sha256, size, etag, last_modified, now, now),
+            )
+            self._evict()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256)
+
+    def memory_get(self, sha256):
+        data = self._memory.get(sha256)
+        if data is not None:
+            self._memory.move_to_end(sha256)
+        return data
+
+    def memory_put(self, sha256, data):
+        if sha256 is None or sha256 in self._memory or len(data) > self.memory_bytes // 4:
+            return
+        self._memory[sha256] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_size -= len(old)
+
+    # Parsed artifacts: DataFrames as Parquet (pickle without pyarrow), everything else as JSON
+
+    def load_frame(self, sha256):
+        for ext, reader in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+            path = os.path.join(self.artifact_dir, sha256 + ".frame" + ext)
+            if os.path.exists(path):
+                try:
+                    return reader(path)
+                except Exception as e:
+                    print(f"Cached frame unreadable, ignoring: {e}")
+        return None
+
+    def save_frame(self, sha256, df):
+        base = os.path.join(self.artifact_dir, sha256 + ".frame")
+        try:
+            df.to_parquet(base + ".parquet")
+        except ImportError:
+            df.to_pickle(base + ".pkl")
+
+    def load_json(self, sha256, kind):
+        path = os.path.join(self.artifact_dir, f"{sha256}.{kind}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_json(self, sha256, kind, value):
+        path = os.path.join(self.artifact_dir, f"{sha256}.{kind}.json")
+        _atomic_write(path, json.dumps(value).encode("utf-8"))
+
+    def stats(self):
+        return {
+            "urls": self._count(),
+            "disk_bytes": self._disk_size(),
+            "memory_bytes": self._memory_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _evict(self):
+        """Drop least recently used blobs (and their artifacts) until under max_bytes; runs in a transaction"""
+        blobs = self._db.execute(
+            "SELECT sha256, MAX(size), MAX(last_used) FROM urls GROUP BY sha256 ORDER BY MAX(last_used)"
+        ).fetchall()
+        total = sum(size for _, size, _ in blobs)
+        for sha256, size, _ in blobs:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+            for name in os.listdir(self.artifact_dir):
+                if name.startswith(sha256):
+                    os.remove(os.path.join(self.artifact_dir, name))
+            if os.path.exists(self.blob_path(sha256)):
+                os.remove(self.blob_path(sha256))
+            dropped = self._memory.pop(sha256, None)
+            if dropped is not None:
+                self._memory_size -= len(dropped)
+            total -= size
+
+    def _count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def _disk_size(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM urls GROUP BY sha256)"
+            ).fetchone()
+        return row[0]
+
+    def _entry(self, url):
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(self.FIELDS)} FROM urls WHERE url = ?", (url,)).fetchone()
+        return dict(zip(self.FIELDS, row)) if row else None
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+
+def _atomic_write(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
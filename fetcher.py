@@ -0,0 +1,331 @@
+# fetcher.py - tiered quiz page fetch: plain HTTP first, headless browser only when needed
+import re
+import json
+import base64
+import binascii
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "table", "h1", "h2", "h3", "h4", "h5", "h6",
+    "pre", "section", "article", "header", "footer", "form", "blockquote", "hr",
+}
+SKIP_TAGS = {"script", "style", "noscript", "template", "head", "title"}
+# Audio/video/embedded attachments: tag -> attribute holding the URL (or data: URI)
+MEDIA_TAGS = {"audio": "src", "video": "src", "source": "src", "embed": "src", "object": "data"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+# Inline JS that only decodes base64 into the DOM, e.g. el.innerHTML = atob(`...`)
+ATOB_RE = re.compile(r"atob\(\s*(?:`([^`]*)`|\"([^\"]*)\"|'([^']*)')\s*\)")
+# Element ids that scripts write into; the browser waits until they have content
+SCRIPT_TARGET_RE = re.compile(
+    r"(?:getElementById\(\s*['\"]([\w-]+)['\"]\s*\)|querySelector\(\s*['\"]#([\w-]+)['\"]\s*\))"
+)
+# Signs that a script builds or changes the page at runtime
+DOM_SCRIPT_RE = re.compile(
+    r"document\.write|innerHTML|innerText|textContent|appendChild|insertAdjacent|createElement"
+    r"|fetch\(|XMLHttpRequest|\$\(|React|Vue|angular|__NEXT_DATA__",
+    re.IGNORECASE,
+)
+SPA_ROOT_RE = re.compile(r"<div[^>]+id=[\"'](?:root|app|__next)[\"'][^>]*>\s*</div>", re.IGNORECASE)
+
+# Everything the solvers need from a rendered page, collected in one page.evaluate round trip.
+# Returns the same structure as parse_html so both fetch paths feed the solvers identically.
+EXTRACT_SCRIPT = """
+() => {
+    const text = (el) => (el.innerText || el.textContent || "").trim();
+    const jsonBlocks = [];
+    for (const el of document.querySelectorAll("pre, code, script[type*='json']")) {
+        const raw = (el.textContent || "").trim();
+        if (raw.startsWith("{") || raw.startsWith("[")) {
+            try { jsonBlocks.push(JSON.parse(raw)); } catch (e) {}
+        }
+    }
+    const ids = {};
+    for (const el of document.querySelectorAll("[id]")) {
+        ids[el.id] = text(el);
+    }
+    return {
+        full_text: document.body ? document.body.innerText : "",
+        html: document.documentElement.outerHTML,
+        links: [...document.querySelectorAll("a[href]")].map((a) => ({url: a.href, text: text(a)})),
+        forms: [...document.forms].map((f) => ({
+            action: f.action,
+            method: (f.getAttribute("method") || "get").toLowerCase(),
+            fields: [...f.elements].map((e) => ({name: e.name || null, type: e.type || e.tagName.toLowerCase()})),
+        })),
+        tables: [...document.querySelectorAll("table")].map((t) => ({
+            html: t.innerHTML,
+            rows: [...t.rows].map((r) => [...r.cells].map(text)),
+        })),
+        images: [...document.images].map((i) => ({src: i.currentSrc || i.src, alt: i.alt || ""})),
+        media: [...document.querySelectorAll("audio[src], video[src], source[src], embed[src], object[data]")].map(
+            (m) => ({src: m.src || m.data, type: m.type || m.tagName.toLowerCase()})),
+        scripts: [...document.scripts].map((s) => ({
+            src: s.src || null, type: s.type || null, text: s.src ? "" : s.textContent,
+        })),
+        ids: ids,
+        json_blocks: jsonBlocks,
+    };
+}
+"""
+
+
+class _PageParser(HTMLParser):
+    """Build the same task_info structure as parse_task_instructions, without a browser"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.text = []
+        self.links = []
+        self.forms = []
+        self.tables = []
+        self.images = []
+        self.media = []
+        self.scripts = []
+        self.ids = {}
+        self.json_blocks = []
+        self._skip = 0
+        self._link = None
+        self._table = None
+        self._row = None
+        self._cell = None
+        self._id_stack = []
+        self._script = None
+        self._raw = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            if tag == "script":
+                self._script = {"src": attrs.get("src"), "type": attrs.get("type"), "text": []}
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        elif tag in ("td", "th"):
+            self.text.append(" ")
+        if tag == "a" and attrs.get("href"):
+            self._link = {"url": urljoin(self.base_url, attrs["href"]), "text": []}
+        elif tag == "img" and attrs.get("src"):
+            self.images.append({"src": urljoin(self.base_url, attrs["src"]), "alt": attrs.get("alt", "")})
+        elif tag in MEDIA_TAGS and attrs.get(MEDIA_TAGS[tag]):
+            self.media.append({"src": urljoin(self.base_url, attrs[MEDIA_TAGS[tag]]), "type": attrs.get("type") or tag})
+        elif tag == "form":
+            self.forms.append({
+                "action": urljoin(self.base_url, attrs.get("action") or ""),
+                "method": (attrs.get("method") or "get").lower(),
+                "fields": [],
+            })
+        elif tag in ("input", "select", "textarea") and self.forms:
+            self.forms[-1]["fields"].append({"name": attrs.get("name"), "type": attrs.get("type", tag)})
+        if tag == "table":
+            if self._table is None:
+                # Keep only the inner HTML of the outermost table, like element.innerHTML
+                self._table = {"depth": 1, "html": [], "rows": []}
+            else:
+                self._table["depth"] += 1
+                self._table["html"].append(self.get_starttag_text() or "")
+        elif self._table is not None:
+            self._table["html"].append(self.get_starttag_text() or "")
+            if tag == "tr":
+                self._row = []
+                self._table["rows"].append(self._row)
+            elif tag in ("td", "th") and self._row is not None:
+                self._cell = []
+        if tag in ("pre", "code"):
+            self._raw.append([])
+        if attrs.get("id") and tag not in VOID_TAGS:
+            self._id_stack.append((tag, attrs["id"], len(self.text)))
+
+    def handle_endtag(self, tag):
+        if self._table is not None:
+            if tag == "table":
+                self._table["depth"] -= 1
+            if tag in ("td", "th") and self._cell is not None:
+                self._row.append(" ".join("".join(self._cell).split()))
+                self._cell = None
+            if self._table["depth"] == 0:
+                self.tables.append({"html": "".join(self._table["html"]), "rows": self._table["rows"]})
+                self._table = None
+                self._row = None
+            else:
+                self._table["html"].append(f"</{tag}>")
+        if tag in ("pre", "code") and self._raw:
+            self._add_json_block("".join(self._raw.pop()))
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            if tag == "script" and self._script is not None:
+                self._script["text"] = "".join(self._script["text"])
+                self.scripts.append(self._script)
+                if self._script["type"] and "json" in self._script["type"]:
+                    self._add_json_block(self._script["text"])
+                self._script = None
+        if tag == "a" and self._link is not None:
+            self._link["text"] = "".join(self._link["text"]).strip()
+            self.links.append(self._link)
+            self._link = None
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if self._id_stack and self._id_stack[-1][0] == tag:
+            _, element_id, start = self._id_stack.pop()
+            self.ids[element_id] = "".join(self.text[start:]).strip()
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script["text"].append(data)
+            return
+        if self._table is not None:
+            self._table["html"].append(data)
+            if self._cell is not None:
+                self._cell.append(data)
+        for raw in self._raw:
+            raw.append(data)
+        if self._skip:
+            return
+        self.text.append(data)
+        if self._link is not None:
+            self._link["text"].append(data)
+
+    def _add_json_block(self, raw):
+        raw = raw.strip()
+        if raw[:1] in ("{", "["):
+            try:
+                self.json_blocks.append(json.loads(raw))
+            except ValueError:
+                pass
+
+    def task_info(self, html):
+        text = "".join(self.text)
+        text = re.sub(r"[ \t]+", " ", text)
+        text = re.sub(r"\s*\n\s*", "\n", text).strip()
+        return {
+            "full_text": text,
+            "html": html,
+            "links": self.links,
+            "forms": self.forms,
+            "tables": self.tables,
+            "images": self.images,
+            "media": self.media,
+            "scripts": self.scripts,
+            "ids": self.ids,
+            "json_blocks": self.json_blocks,
+        }
+
+
+def parse_html(html, base_url):
+    """Parse a quiz page in-process into a task_info dict"""
+    parser = _PageParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.task_info(html)
+
+
+def decode_atob(text):
+    """Decode every base64 literal passed to atob() in a script"""
+    decoded = []
+    for match in ATOB_RE.finditer(text):
+        literal = next(g for g in match.groups() if g is not None)
+        try:
+            decoded.append(base64.b64decode("".join(literal.split())).decode("utf-8"))
+        except (binascii.Error, UnicodeDecodeError):
+            continue
+    return decoded
+
+
+def script_targets(scripts):
+    """Ids of the elements inline scripts write into"""
+    targets = []
+    for script in scripts:
+        for match in SCRIPT_TARGET_RE.finditer(script["text"]):
+            targets.append(match.group(1) or match.group(2))
+    return targets
+
+
+def needs_browser(task_info):
+    """
+    Decide whether the page must be rendered. Pages whose scripts only
+    drop atob()-decoded content into the DOM are decoded in-process.
+    """
+    html = task_info["html"]
+    if SPA_ROOT_RE.search(html):
+        return True
+    decodable = False
+    for script in task_info["scripts"]:
+        if script["type"] and "json" in script["type"]:
+            continue
+        if script["src"]:
+            return True
+        code = ATOB_RE.sub("", script["text"])
+        if ATOB_RE.search(script["text"]) and not re.search(r"fetch\(|XMLHttpRequest|eval\(", code):
+            decodable = True
+            continue
+        if DOM_SCRIPT_RE.search(code):
+            return True
+    return not decodable and not task_info["full_text"].strip() and bool(task_info["scripts"])
+
+
+def inline_decoded_content(task_info, base_url):
+    """Merge atob()-decoded script output into task_info as if the browser had rendered it"""
+    for script in task_info["scripts"]:
+        for fragment in decode_atob(script["text"]):
+            extra = parse_html(fragment, base_url)
+            task_info["full_text"] = f"{task_info['full_text']}\n{extra['full_text']}".strip()
+            for key in ("links", "forms", "tables", "images", "media", "json_blocks"):
+                task_info[key].extend(extra[key])
+            task_info["ids"].update(extra["ids"])
+    return task_info
+
+
+async def fetch_page(http_client, url):
+    """
+    Fast path: fetch the page over HTTP and parse it in-process.
+    Returns (task_info, needs_render); when needs_render is True the
+    caller should render the page with render_page instead.
+    """
+    async with http_client.request("GET", url) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get("Content-Type", "")
+        body = await resp.text()
+        final_url = str(resp.url)
+
+    if "html" not in content_type and not body.lstrip().startswith("<"):
+        task_info = {"full_text": body, "html": body, "links": [], "forms": [], "tables": [],
+                     "images": [], "media": [], "scripts": [], "ids": {}, "json_blocks": []}
+        if "json" in content_type:
+            try:
+                task_info["json_blocks"].append(json.loads(body))
+            except ValueError:
+                pass
+        return task_info, False
+
+    task_info = parse_html(body, final_url)
+    if needs_browser(task_info):
+        return task_info, True
+    return inline_decoded_content(task_info, final_url), False
+
+
+async def render_page(page, url, html=None, timeout=15000):
+    """
+    Browser path: navigate and wait on a DOM condition instead of a fixed
+    sleep — body text present and every element scripts write into filled.
+    """
+    await page.goto(url, wait_until="domcontentloaded")
+    targets = script_targets(parse_html(html, url)["scripts"]) if html else []
+    try:
+        await page.wait_for_function(
+            """(ids) => document.body && document.body.innerText.trim().length > 0 &&
+                ids.every((id) => {
+                    const el = document.getElementById(id);
+                    return !el || el.innerText.trim().length > 0;
+                })""",
+            arg=targets,
+            timeout=timeout,
+        )
+    except Exception as e:
+        print(f"⚠️ Render wait gave up: {e}")
+
+
+async def extract_page(page):
+    """Pull text, links, tables, forms, images, scripts and JSON blocks in a single round trip"""
+    return await page.evaluate(EXTRACT_SCRIPT)
@@ -0,0 +1,164 @@
+# http_client.py - app-scoped aiohttp session shared by downloads and submissions
+import os
+import time
+import random
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+import aiohttp
+
+HTTP_LIMIT = int(os.getenv("HTTP_LIMIT", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "10"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "60"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.25"))
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Timings of requests made inside a collect_timings() block (per chain / per quiz)
+_collected = contextvars.ContextVar("http_timings", default=None)
+
+
+@contextmanager
+def collect_timings():
+    """Collect the timing record of every request made in this block"""
+    timings = []
+    token = _collected.set(timings)
+    try:
+        yield timings
+    finally:
+        _collected.reset(token)
+
+
+class HttpClient:
+    """
+    One keep-alive aiohttp session for the whole app, so a quiz chain
+    reuses its TCP/TLS connections instead of opening one per download.
+    """
+
+    def __init__(self, limit=HTTP_LIMIT, limit_per_host=HTTP_LIMIT_PER_HOST,
+                 retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.session = None
+        self.timings = deque(maxlen=500)
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=HTTP_KEEPALIVE,
+            ttl_dns_cache=300,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=HTTP_TOTAL_TIMEOUT,
+            sock_connect=HTTP_CONNECT_TIMEOUT,
+            sock_read=HTTP_READ_TIMEOUT,
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        self.session = aiohttp.ClientSession(
+            connector=connector, timeout=timeout, trace_configs=[trace]
+        )
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    @asynccontextmanager
+    async def request(self, method, url, retry=None, **kwargs):
+        """
+        Yield the response for `method url`. GET/HEAD are retried with
+        exponential backoff on connection errors and 429/5xx responses
+        until the headers arrive; other methods are sent once.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in ("GET", "HEAD")
+        attempts = self.retries + 1 if retry else 1
+        start = time.perf_counter()
+
+        for attempt in range(1, attempts + 1):
+            try:
+                resp = await self.session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == attempts:
+                    self._record(method, url, None, start, attempt, error=str(e) or type(e).__name__)
+                    raise
+                await self._sleep_backoff(attempt)
+                continue
+
+            if resp.status in RETRY_STATUSES and attempt < attempts:
+                resp.release()
+                await self._sleep_backoff(attempt)
+                continue
+
+            try:
+                yield resp
+            finally:
+                resp.release()
+                self._record(method, url, resp.status, start, attempt)
+            return
+
+    async def get_bytes(self, url, **kwargs):
+        async with self.request("GET", url, **kwargs) as resp:
+            resp.raise_for_status()
+            return await resp.read()
+
+    async def get_text(self, url, **kwargs):
+        async with self.request("GET", url, **kwargs) as resp:
+            resp.raise_for_status()
+            return await resp.text()
+
+    async def get_json(self, url, **kwargs):
+        async with self.request("GET", url, **kwargs) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def post_json(self, url, payload, **kwargs):
+        async with self.request("POST", url, json=payload, **kwargs) as resp:
+            return await resp.json(content_type=None)
+
+    def stats(self):
+        return {
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "recent_requests": len(self.timings),
+        }
+
+    async def _sleep_backoff(self, attempt):
+        delay = self.backoff * (2 ** (attempt - 1))
+        await asyncio.sleep(delay + random.uniform(0, delay))
+
+    def _record(self, method, url, status, start, attempts, error=None):
+        timing = {
+            "method": method,
+            "url": url,
+            "host": urlsplit(url).netloc,
+            "status": status,
+            "elapsed": round(time.perf_counter() - start, 4),
+            "attempts": attempts,
+        }
+        if error:
+            timing["error"] = error
+        self.timings.append(timing)
+        collected = _collected.get()
+        if collected is not None:
+            collected.append(timing)
+
+    async def _on_connection_created(self, session, ctx, params):
+        self.connections_created += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.connections_reused += 1
@@ -0,0 +1,327 @@
+# job_store.py - where quiz-chain jobs are queued and recorded, so several server processes can share them
+#
+# JOB_STORE selects the backend:
+#   memory                      - this process only (default, single worker)
+#   sqlite:///.cache/jobs.db    - one SQLite file shared by every worker on the host
+#   file:///.cache/jobs         - a directory of JSON files, claimed by atomic rename
+import os
+import json
+import time
+import sqlite3
+import threading
+
+JOB_STORE = os.getenv("JOB_STORE", "memory")
+FINISHED = ("done", "failed")
+
+
+def open_store(spec=JOB_STORE):
+    """Build a store from a JOB_STORE spec (sqlite:///relative or sqlite:////absolute, likewise file://)"""
+    if spec == "memory":
+        return MemoryJobStore()
+    scheme, _, path = spec.partition("://")
+    path = path[1:] if path.startswith("/") else path
+    if scheme == "sqlite" and path:
+        return SQLiteJobStore(path)
+    if scheme == "file" and path:
+        return FileJobStore(path)
+    raise ValueError(f"Unknown JOB_STORE {spec!r} (use memory, sqlite:///path or file:///dir)")
+
+
+def new_record(job_id, url, email):
+    return {"id": job_id, "url": url, "email": email, "status": "queued", "error": None,
+            "results": [], "summary": None, "created_at": time.time(),
+            "started_at": None, "finished_at": None}
+
+
+class MemoryJobStore:
+    """Jobs live in this process; the behaviour of a single-worker server"""
+
+    shared = False
+
+    def __init__(self):
+        self.records = {}
+
+    def add(self, record):
+        self.records[record["id"]] = record
+
+    def claim(self, owner):
+        for record in self.records.values():
+            if record["status"] == "queued":
+                record["status"] = "running"
+                record["started_at"] = time.time()
+                return dict(record, results=list(record["results"]))
+        return None
+
+    def update(self, job_id, **fields):
+        if job_id in self.records:
+            self.records[job_id].update(fields)
+
+    def add_result(self, job_id, result):
+        if job_id in self.records:
+            self.records[job_id]["results"].append(result)
+
+    def load(self, job_id):
+        record = self.records.get(job_id)
+        return dict(record, results=list(record["results"])) if record else None
+
+    def counts(self):
+        counts = {"queued": 0, "running": 0}
+        for record in self.records.values():
+            if record["status"] in counts:
+                counts[record["status"]] += 1
+        return counts
+
+    def heartbeat(self, job_ids):
+        pass
+
+    def reap(self, stale_after):
+        return []  # a crashed process takes its in-memory jobs with it
+
+    def trim(self, history):
+        finished = [r for r in self.records.values() if r["status"] in FINISHED]
+        for record in sorted(finished, key=lambda r: r["created_at"])[:max(0, len(self.records) - history)]:
+            del self.records[record["id"]]
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore:
+    """Jobs in one SQLite file; claims are atomic across processes"""
+
+    shared = True
+
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, url TEXT, email TEXT, status TEXT, error TEXT, summary TEXT,"
+            " created_at REAL, started_at REAL, finished_at REAL, owner TEXT, heartbeat REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " job_id TEXT, seq INTEGER, data TEXT, PRIMARY KEY (job_id, seq))"
+        )
+
+    def add(self, record):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, url, email, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (record["id"], record["url"], record["email"], record["status"], record["created_at"]),
+            )
+
+    def claim(self, owner):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row:
+                    now = time.time()
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, heartbeat = ? WHERE id = ?",
+                        (owner, now, now, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.load(row[0]) if row else None
+
+    def update(self, job_id, **fields):
+        if "summary" in fields:
+            fields["summary"] = json.dumps(fields["summary"], default=str)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def add_result(self, job_id, result):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO results (job_id, seq, data) "
+                "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM results WHERE job_id = ?",
+                (job_id, json.dumps(result, default=str), job_id),
+            )
+
+    def load(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, url, email, status, error, summary, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            results = self._db.execute(
+                "SELECT data FROM results WHERE job_id = ? ORDER BY seq", (job_id,)
+            ).fetchall()
+        keys = ("id", "url", "email", "status", "error", "summary", "created_at", "started_at", "finished_at")
+        record = dict(zip(keys, row))
+        record["summary"] = json.loads(record["summary"]) if record["summary"] else None
+        record["results"] = [json.loads(data) for (data,) in results]
+        return record
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status IN ('queued', 'running') GROUP BY status"
+            ).fetchall()
+        return {"queued": 0, "running": 0, **dict(rows)}
+
+    def heartbeat(self, job_ids):
+        if not job_ids:
+            return
+        with self._lock:
+            self._db.executemany("UPDATE jobs SET heartbeat = ? WHERE id = ?",
+                                 [(time.time(), job_id) for job_id in job_ids])
+
+    def reap(self, stale_after):
+        """Fail running jobs whose worker stopped heart-beating (crashed or killed)"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND heartbeat < ?", (now - stale_after,)
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'worker lost', finished_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                [(now, job_id) for (job_id,) in rows],
+            )
+        return [job_id for (job_id,) in rows]
+
+    def trim(self, history):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (history,),
+            ).fetchall()
+            for (job_id,) in rows:
+                self._db.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+                self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def close(self):
+        self._db.close()
+
+
+class FileJobStore:
+    """
+    Jobs as files under one directory: jobs/<id>.json (+ .jsonl results),
+    and a marker per job in queue/ that a worker claims by renaming it into
+    running/ - rename is atomic, so exactly one process wins.
+    """
+
+    shared = True
+
+    def __init__(self, root):
+        self.root = root
+        for name in ("jobs", "queue", "running"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _write(self, record):
+        path = self._path("jobs", f"{record['id']}.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({k: v for k, v in record.items() if k != "results"}, f, default=str)
+        os.replace(tmp, path)
+
+    def _read(self, job_id):
+        try:
+            with open(self._path("jobs", f"{job_id}.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def add(self, record):
+        self._write(record)
+        open(self._path("queue", f"{record['created_at']:.6f}-{record['id']}"), "w").close()
+
+    def claim(self, owner):
+        for marker in sorted(os.listdir(self._path("queue"))):
+            try:
+                os.rename(self._path("queue", marker), self._path("running", marker))
+            except FileNotFoundError:
+                continue  # another worker got there first
+            # rename keeps the enqueue mtime; the claim is the first heartbeat, or reap() could fail it at once
+            os.utime(self._path("running", marker))
+            job_id = marker.split("-", 1)[1]
+            self.update(job_id, status="running", started_at=time.time())
+            return self.load(job_id)
+        return None
+
+    def update(self, job_id, **fields):
+        record = self._read(job_id)
+        if record is None:
+            return
+        record.update(fields)
+        self._write(record)
+        if record["status"] in FINISHED:
+            for marker in os.listdir(self._path("running")):
+                if marker.endswith(f"-{job_id}"):
+                    self._remove(self._path("running", marker))
+
+    def add_result(self, job_id, result):
+        with open(self._path("jobs", f"{job_id}.jsonl"), "a") as f:
+            f.write(json.dumps(result, default=str) + "\n")
+
+    def load(self, job_id):
+        record = self._read(job_id)
+        if record is None:
+            return None
+        record["results"] = []
+        try:
+            with open(self._path("jobs", f"{job_id}.jsonl")) as f:
+                record["results"] = [json.loads(line) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            pass
+        return record
+
+    def counts(self):
+        return {"queued": len(os.listdir(self._path("queue"))),
+                "running": len(os.listdir(self._path("running")))}
+
+    def heartbeat(self, job_ids):
+        for marker in os.listdir(self._path("running")):
+            if marker.split("-", 1)[1] in job_ids:
+                try:
+                    os.utime(self._path("running", marker))
+                except FileNotFoundError:
+                    pass
+
+    def reap(self, stale_after):
+        lost = []
+        cutoff = time.time() - stale_after
+        for marker in os.listdir(self._path("running")):
+            try:
+                if os.path.getmtime(self._path("running", marker)) >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            job_id = marker.split("-", 1)[1]
+            self.update(job_id, status="failed", error="worker lost", finished_at=time.time())
+            lost.append(job_id)
+        return lost
+
+    def trim(self, history):
+        records = [r for r in (self._read(name[:-5]) for name in os.listdir(self._path("jobs"))
+                               if name.endswith(".json")) if r]
+        finished = sorted((r for r in records if r["status"] in FINISHED), key=lambda r: r["created_at"])
+        for record in finished[:max(0, len(records) - history)]:
+            self._remove(self._path("jobs", f"{record['id']}.json"))
+            self._remove(self._path("jobs", f"{record['id']}.jsonl"))
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        pass
@@ -0,0 +1,222 @@
+# jobs.py - background quiz-chain jobs with status polling and SSE progress
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+from metrics import CHAINS, CHAIN_SECONDS
+from job_store import open_store, new_record, FINISHED
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "200"))
+# Admission control: /solve is refused once this many jobs are waiting in the (shared) queue
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "100"))
+JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "10"))
+# How often idle workers and SSE streams poll a shared store for changes made by other processes
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+JOB_HEARTBEAT = float(os.getenv("JOB_HEARTBEAT", "5"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "60"))
+
+
+class QueueFull(Exception):
+    """The job queue is at its limit; the client should retry after `retry_after` seconds"""
+
+    def __init__(self, queued, retry_after):
+        super().__init__(f"{queued} jobs already queued")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+def _view(record):
+    """Public JSON shape of a job record"""
+    return {
+        "job_id": record["id"],
+        "url": record["url"],
+        "email": record["email"],
+        "status": record["status"],
+        "error": record["error"],
+        "results": record["results"],
+        "summary": record["summary"],
+        "created_at": record["created_at"],
+        "started_at": record["started_at"],
+        "finished_at": record["finished_at"],
+    }
+
+
+class Job:
+    """A quiz chain running in this process; every change is written through to the store"""
+
+    def __init__(self, record, store):
+        self.store = store
+        self.id = record["id"]
+        self.url = record["url"]
+        self.email = record["email"]
+        self.status = record["status"]
+        self.results = list(record["results"])
+        self.summary = record["summary"]
+        self.error = record["error"]
+        self.created_at = record["created_at"]
+        self.started_at = record["started_at"]
+        self.finished_at = record["finished_at"]
+        self._changed = asyncio.Event()
+
+    def add_result(self, result):
+        self.results.append(result)
+        self.store.add_result(self.id, result)
+        self._notify()
+
+    def set_status(self, status, error=None):
+        self.status = status
+        self.error = error
+        if status == "running":
+            self.started_at = time.time()
+        elif status in FINISHED:
+            self.finished_at = time.time()
+        self.store.update(self.id, status=status, error=error, summary=self.summary,
+                          started_at=self.started_at, finished_at=self.finished_at)
+        self._notify()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def to_dict(self):
+        return _view(dict(self.__dict__, results=list(self.results)))
+
+    def _notify(self):
+        # Wake everyone waiting on the current event, then arm a new one for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class JobManager:
+    """
+    Runs quiz chains on a bounded pool of background workers. Jobs are queued
+    in a job store; with a shared store (JOB_STORE=sqlite:// or file://) every
+    server process pulls from the same queue and can report on any job.
+    """
+
+    def __init__(self, run_chain, workers=JOB_WORKERS, history=JOB_HISTORY,
+                 store=None, queue_limit=JOB_QUEUE_LIMIT):
+        self.run_chain = run_chain
+        self.workers = max(1, workers)
+        self.history = history
+        self.queue_limit = queue_limit
+        self.store = store or open_store()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.jobs = {}  # jobs running in this process
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.store.close()
+
+    def submit(self, url, email):
+        """Queue a chain and return its record; raises QueueFull when the queue is at its limit"""
+        queued = self.store.counts()["queued"]
+        if queued >= self.queue_limit:
+            raise QueueFull(queued, JOB_RETRY_AFTER)
+        record = new_record(uuid.uuid4().hex, url, email)
+        self.store.add(record)
+        self.store.trim(self.history)
+        self._wakeup.set()
+        return _view(record)
+
+    def get(self, job_id):
+        """Current view of a job, live if it runs here, otherwise as last written to the store"""
+        job = self.jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        record = self.store.load(job_id)
+        return _view(record) if record else None
+
+    async def events(self, job_id):
+        """
+        Yield Server-Sent Events: the current status and results so far, then
+        new results as they arrive, then 'done' with the whole job. Jobs run by
+        this process wake the stream at once; others are polled from the store.
+        """
+        status, sent = None, 0
+        while True:
+            job = self.jobs.get(job_id)
+            # Take the change event before the snapshot so no update falls in between
+            changed = job._changed if job else None
+            view = job.to_dict() if job else self.get(job_id)
+            if view is None:
+                return
+            if status is None:
+                status = view["status"]
+                yield _sse("status", {"status": status, "error": view["error"]})
+            for result in view["results"][sent:]:
+                yield _sse("result", result)
+            sent = len(view["results"])
+            if view["status"] != status:
+                status = view["status"]
+                yield _sse("status", {"status": status, "error": view["error"]})
+            if status in FINISHED:
+                yield _sse("done", view)
+                return
+            if changed:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=JOB_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    def stats(self):
+        counts = self.store.counts()
+        return {"workers": self.workers, "queue_limit": self.queue_limit,
+                "queued": counts["queued"], "running": counts["running"], "local": len(self.jobs)}
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            record = self.store.claim(self.owner)
+            if record is None:
+                # Back-pressure: only claim when a worker is free; otherwise jobs wait in the store
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job = Job(record, self.store)
+            self.jobs[job.id] = job
+            job.set_status("running")
+            try:
+                job.summary = await self.run_chain(job)
+                job.set_status("done")
+            except asyncio.CancelledError:
+                job.set_status("failed", "cancelled")
+                raise
+            except Exception as e:
+                print(f"❌ Job {job.id} failed: {e}")
+                job.set_status("failed", str(e))
+            finally:
+                CHAINS.inc(status=job.status)
+                CHAIN_SECONDS.observe(time.time() - job.started_at)
+                self.jobs.pop(job.id, None)
+
+    async def _maintain(self):
+        # Keep our running jobs alive in the store and fail those of workers that died
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT)
+            try:
+                self.store.heartbeat(list(self.jobs))
+                for job_id in self.store.reap(JOB_STALE_AFTER):
+                    print(f"💀 Job {job_id} lost its worker, marked failed")
+            except Exception as e:
+                print(f"Job store maintenance error: {e}")
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,98 @@
+# llm_cache.py - SQLite cache of chat completion replies, keyed by the exact request payload
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+
+
+class CacheMiss(KeyError):
+    """Replay mode found no cached reply for a request"""
+
+
+def request_key(payload):
+    """Stable hash of a chat completion payload (model, messages, codeword, limits)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent reply cache. Identical requests in flight at the same time
+    share one network call; with replay=True a miss raises CacheMiss instead
+    of calling the API.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, replay=False):
+        self.path = path
+        self.replay = replay
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS replies ("
+            " key TEXT PRIMARY KEY, model TEXT, request TEXT, reply TEXT, created REAL)"
+        )
+        self._db.commit()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.deduped = 0
+
+    def close(self):
+        self._db.close()
+
+    def get(self, key):
+        row = self._db.execute("SELECT reply FROM replies WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, payload, reply):
+        self._db.execute(
+            "INSERT OR REPLACE INTO replies (key, model, request, reply, created) VALUES (?, ?, ?, ?, ?)",
+            (key, payload.get("model"), json.dumps(payload, sort_keys=True), reply, time.time()),
+        )
+        self._db.commit()
+
+    def lookup(self, payload):
+        """Cached reply for a payload, or None; raises CacheMiss in replay mode"""
+        reply = self.get(request_key(payload))
+        if reply is not None:
+            self.hits += 1
+        elif self.replay:
+            self.misses += 1
+            raise CacheMiss(request_key(payload))
+        return reply
+
+    async def fetch(self, payload, call):
+        """Return the cached reply, or await call() once per distinct payload and store it"""
+        key = request_key(payload)
+        reply = self.get(key)
+        if reply is not None:
+            self.hits += 1
+            return reply
+        if self.replay:
+            self.misses += 1
+            raise CacheMiss(key)
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._fill(key, payload, call))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.deduped += 1
+        # shield: one waiter being cancelled must not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def _fill(self, key, payload, call):
+        reply = await call()
+        self.put(key, payload, reply)
+        return reply
+
+    def stats(self):
+        entries = self._db.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "deduped": self.deduped}
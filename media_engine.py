@@ -0,0 +1,455 @@
+# media_engine.py - decode image/audio attachments in the CPU pool and answer from what they contain
+import os
+import re
+import io
+import zlib
+import wave
+import asyncio
+import base64
+import struct
+import hashlib
+import binascii
+import numpy as np
+import cpu_executor
+
+try:
+    from PIL import Image  # optional: JPEG/GIF/WebP and every PNG variant; PNG-only fallback below
+except ImportError:
+    Image = None
+try:
+    import pytesseract  # optional: OCR, needs the tesseract binary and Pillow
+except ImportError:
+    pytesseract = None
+try:
+    import mutagen  # optional: duration and tags for MP3/OGG/FLAC/M4A; WAV needs nothing
+except ImportError:
+    mutagen = None
+
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(20 << 20)))
+MEDIA_MAX_ITEMS = int(os.getenv("MEDIA_MAX_ITEMS", "8"))
+MEDIA_TOP_COLORS = int(os.getenv("MEDIA_TOP_COLORS", "5"))
+
+IMAGE_EXTS = ("png", "jpg", "jpeg", "gif", "webp", "bmp")
+AUDIO_EXTS = ("wav", "mp3", "ogg", "opus", "m4a", "flac")
+EXT_RE = re.compile(r"\.(" + "|".join(IMAGE_EXTS + AUDIO_EXTS) + r")(?![a-z0-9])")
+DATA_URI_RE = re.compile(r"data:((?:image|audio)/[\w.+-]+)(?:;[\w=.-]+)*;base64,([A-Za-z0-9+/=\s]+)")
+NUMBER_RE = re.compile(r"-?\d+(?:,\d{3})*(?:\.\d+)?")
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG colour type -> samples per pixel
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+# ------------------------
+# Finding attachments
+# ------------------------
+def media_kind(source, mime=None):
+    """"image", "audio" or None for a URL / data: URI"""
+    mime = mime or (source[5:source.find(";")] if source.startswith("data:") else "")
+    if mime.startswith(("image/", "audio/")):
+        return mime.split("/", 1)[0]
+    match = EXT_RE.search(source.lower().split("#", 1)[0])
+    if match:
+        return "image" if match.group(1) in IMAGE_EXTS else "audio"
+    return None
+
+
+def media_sources(task_info):
+    """
+    Every image/audio attachment on a quiz page, in page order and without
+    duplicates: <img>, <audio>/<video>/<source>/<embed>/<object>, links to
+    media files and base64 data: URIs anywhere in the HTML.
+    Returns [(kind, source)].
+    """
+    found = []
+    for image in task_info.get("images", []):
+        found.append((media_kind(image["src"]) or "image", image["src"]))
+    for item in task_info.get("media", []):
+        kind = media_kind(item["src"], item.get("type") if "/" in (item.get("type") or "") else None)
+        found.append((kind or ("audio" if item.get("type") == "audio" else None), item["src"]))
+    for link in task_info.get("links", []):
+        found.append((media_kind(link["url"]), link["url"]))
+    for match in DATA_URI_RE.finditer(task_info.get("html", "")):
+        found.append((match.group(1).split("/", 1)[0], match.group()))
+    seen = set()
+    sources = []
+    for kind, source in found:
+        if kind and source not in seen:
+            seen.add(source)
+            sources.append((kind, source))
+    return sources[:MEDIA_MAX_ITEMS]
+
+
+def decode_data_uri(uri):
+    """(mime, bytes) of a base64 data: URI"""
+    header, _, payload = uri.partition(",")
+    return header[5:].split(";", 1)[0], base64.b64decode("".join(payload.split()))
+
+
+# ------------------------
+# Images
+# ------------------------
+def analyze_image(data):
+    """
+    Worker: size and format, then from the pixels the mean colour,
+    brightness and dominant colours, and OCR text when tesseract is
+    available. Returns a small JSON-able dict.
+    """
+    features = {"kind": "image", **_image_header(data)}
+    pixels, image = None, None
+    if Image is not None:
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+            features.update(format=(image.format or features.get("format") or "").lower(),
+                            width=image.width, height=image.height)
+            pixels = np.asarray(image.convert("RGBA"))
+        except Exception as e:
+            print(f"Image decode failed: {e}")
+            image = None
+    elif data[:8] == PNG_SIGNATURE:
+        pixels = _decode_png(data)
+    if pixels is not None:
+        features.update(pixel_features(pixels))
+
+    text = ""
+    if image is not None and pytesseract is not None:
+        cpu_executor.check_deadline()
+        try:
+            text = pytesseract.image_to_string(image).strip()
+        except Exception as e:
+            print(f"OCR failed: {e}")
+    features["text"] = text
+    features["numbers"] = [_number(n) for n in NUMBER_RE.findall(text)]
+    return features
+
+
+def pixel_features(pixels):
+    """Colour statistics of an HxWx4 RGBA array, transparent pixels left out"""
+    height, width = pixels.shape[:2]
+    flat = pixels.reshape(-1, 4)
+    opaque = flat[flat[:, 3] > 0, :3] if (flat[:, 3] < 255).any() else flat[:, :3]
+    if len(opaque) == 0:
+        opaque = flat[:, :3]
+    rgb = opaque.astype(np.uint32)
+    packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    colors, counts = np.unique(packed, return_counts=True)
+    distinct = len(colors)
+    if distinct > 4096:
+        # Photos: bucket to 4 bits per channel and report each bucket's centre
+        colors, counts = np.unique(packed & 0xF0F0F0, return_counts=True)
+        colors = colors | 0x080808
+    top = np.argsort(-counts, kind="stable")[:MEDIA_TOP_COLORS]
+    mean = opaque.mean(axis=0)
+    return {
+        "width": int(width),
+        "height": int(height),
+        "pixels": int(width * height),
+        "mean_rgb": [round(float(v), 2) for v in mean],
+        # Rec. 601 luma, 0-255
+        "brightness": round(float((opaque @ np.array([0.299, 0.587, 0.114])).mean()), 2),
+        "distinct_colors": int(distinct),
+        "colors": [{"hex": f"#{int(colors[i]):06x}", "share": round(float(counts[i]) / len(opaque), 4)}
+                   for i in top],
+    }
+
+
+def _image_header(data):
+    """Format and size from the file header alone, for when the pixels can't be decoded"""
+    if data[:8] == PNG_SIGNATURE and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return {"format": "png", "width": width, "height": height}
+    if data[:4] == b"GIF8" and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return {"format": "gif", "width": width, "height": height}
+    if data[:2] == b"\xff\xd8":
+        pos = 2
+        while pos + 9 <= len(data) and data[pos] == 0xFF:
+            marker, length = data[pos + 1], struct.unpack(">H", data[pos + 2:pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+                return {"format": "jpeg", "width": width, "height": height}
+            pos += 2 + length
+        return {"format": "jpeg"}
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return {"format": "webp"}
+    return {}
+
+
+def _decode_png(data):
+    """8-bit non-interlaced PNG -> HxWx4 uint8 RGBA, or None for anything else"""
+    pos = 8
+    header, palette, alpha, idat = None, None, None, []
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"PLTE":
+            palette = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            alpha = np.frombuffer(chunk, dtype=np.uint8)
+        elif kind == b"IDAT":
+            idat.append(chunk)
+        elif kind == b"IEND":
+            break
+    if header is None:
+        return None
+    width, height, depth, color, _, _, interlace = header
+    if depth != 8 or interlace or color not in PNG_CHANNELS or (color == 3 and palette is None):
+        return None
+    channels = PNG_CHANNELS[color]
+    stride = width * channels
+    try:
+        raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8)[:height * (stride + 1)]
+        raw = raw.reshape(height, stride + 1)
+    except (zlib.error, ValueError):
+        return None
+
+    kinds = raw[:, 0]
+    if np.isin(kinds, (3, 4)).any():
+        rows = _unfilter(kinds, raw[:, 1:].reshape(height, width, channels))
+    else:
+        rows = _unfilter_rows(kinds, raw[:, 1:], channels)
+
+    pixels = rows.reshape(height, width, channels)
+    if color == 3:
+        rgb = palette[pixels[..., 0]]
+        table = np.full(len(palette), 255, dtype=np.uint8)
+        if alpha is not None:
+            table[:len(alpha)] = alpha[:len(palette)]
+        return np.dstack([rgb, table[pixels[..., 0]]])
+    if color in (0, 4):
+        gray = pixels[..., 0]
+        opacity = pixels[..., 1] if color == 4 else np.full_like(gray, 255)
+        return np.dstack([gray, gray, gray, opacity])
+    if color == 2:
+        return np.dstack([pixels, np.full(pixels.shape[:2], 255, dtype=np.uint8)])
+    return pixels
+
+
+def _unfilter_rows(kinds, lines, channels):
+    """None (0), Sub (1) and Up (2) rows, one row at a time"""
+    # uint8 arithmetic wraps modulo 256 exactly as PNG filters expect
+    height, stride = lines.shape
+    rows = np.empty((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.uint8)
+    for y in range(height):
+        if y % 256 == 0:
+            cpu_executor.check_deadline()
+        kind, line = kinds[y], lines[y]
+        if kind == 0:
+            rows[y] = line
+        elif kind == 1:
+            rows[y] = np.cumsum(line.reshape(-1, channels), axis=0, dtype=np.uint8).reshape(-1)
+        else:
+            rows[y] = line + previous
+        previous = rows[y]
+    return rows
+
+
+def _unfilter(kinds, lines):
+    """
+    Any mix of filters, HxWxC. Average (3) and Paeth (4) need the pixel to
+    the left already decoded, so pixels are decoded one anti-diagonal at a
+    time: all of a pixel's left, up and upper-left neighbours lie on the
+    two diagonals before it, and each diagonal is one vectorised step.
+    """
+    height, width, channels = lines.shape
+    # Skewed so pixel (y, x) sits at [y + 1, y + x + 1] and each diagonal is a column;
+    # the zero row and column, and cells outside the image, stand in for "no neighbour"
+    skewed = np.zeros((height + 1, height + width, channels), dtype=np.int32)
+    filtered = np.zeros_like(skewed)
+    ys, xs = np.indices((height, width))
+    filtered[ys + 1, ys + xs + 1] = lines
+    # 0/1 weight per row for each filter in use, so a diagonal blends the predictors without branching
+    weights = [(kind, (kinds == kind).astype(np.int32)[:, None]) for kind in (1, 2, 3, 4) if (kinds == kind).any()]
+    for k in range(height + width - 1):
+        if k % 256 == 0:
+            cpu_executor.check_deadline()
+        lo, hi = max(0, k - width + 1), min(height, k + 1)
+        left, up, upper_left = skewed[lo + 1:hi + 1, k], skewed[lo:hi, k], skewed[lo:hi, k - 1]
+        predicted = np.zeros_like(left)
+        for kind, weight in weights:
+            if kind == 1:
+                predictor = left
+            elif kind == 2:
+                predictor = up
+            elif kind == 3:
+                predictor = (left + up) >> 1
+            else:
+                estimate = left + up - upper_left
+                da, db, dc = np.abs(estimate - left), np.abs(estimate - up), np.abs(estimate - upper_left)
+                predictor = np.where((da <= db) & (da <= dc), left, np.where(db <= dc, up, upper_left))
+            predicted += weight[lo:hi] * predictor
+        skewed[lo + 1:hi + 1, k + 1] = (filtered[lo + 1:hi + 1, k + 1] + predicted) & 0xFF
+    rows = skewed[ys + 1, ys + xs + 1]
+    return rows.astype(np.uint8).reshape(height, width * channels)
+
+
+# ------------------------
+# Audio
+# ------------------------
+def analyze_audio(data):
+    """
+    Worker: format, channels, sample rate and duration; for WAV also the
+    RMS/peak level and share of near-silent samples from the PCM data.
+    """
+    features = {"kind": "audio", "format": _audio_format(data)}
+    if features["format"] == "wav":
+        try:
+            with wave.open(io.BytesIO(data)) as w:
+                channels, width, rate, frames = w.getnchannels(), w.getsampwidth(), w.getframerate(), w.getnframes()
+                raw = w.readframes(frames)
+        except (wave.Error, EOFError) as e:
+            print(f"WAV decode failed: {e}")
+            return features
+        features.update(channels=channels, sample_rate=rate, sample_width=width, frames=frames,
+                        duration=frames / rate if rate else None)
+        samples = _pcm(raw, width)
+        if samples is not None and len(samples):
+            level = np.abs(samples)
+            features.update(rms=round(float(np.sqrt(np.mean(samples ** 2))), 6), peak=round(float(level.max()), 6),
+                            silence=round(float(np.mean(level < 0.01)), 4))
+    elif mutagen is not None:
+        try:
+            parsed = mutagen.File(io.BytesIO(data))
+        except Exception as e:
+            print(f"Audio metadata failed: {e}")
+            parsed = None
+        if parsed is not None:
+            info = parsed.info
+            features.update(duration=getattr(info, "length", None), sample_rate=getattr(info, "sample_rate", None),
+                            channels=getattr(info, "channels", None), bitrate=getattr(info, "bitrate", None))
+            tags = parsed.tags or {}
+            features["tags"] = {str(k): str(v[0] if isinstance(v, list) and v else v) for k, v in tags.items()
+                                if str(k).lower() in ("title", "artist", "album", "date", "tit2", "tpe1", "talb")}
+    return features
+
+
+def _audio_format(data):
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:4] == b"fLaC":
+        return "flac"
+    if data[4:8] == b"ftyp":
+        return "m4a"
+    return None
+
+
+def _pcm(raw, width):
+    """Interleaved PCM bytes -> float samples in [-1, 1]"""
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    if width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        value = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        return np.where(value & 0x800000, value - 0x1000000, value).astype(np.float32) / 8388608
+    if width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    return None
+
+
+# ------------------------
+# Loading and answering
+# ------------------------
+async def load_media(http_client, kind, source, cache=None):
+    """
+    Features of one attachment. Decoded results are cached by content hash,
+    so the same image or clip is only analysed once across quizzes.
+    """
+    if source.startswith("data:"):
+        try:
+            _, data = decode_data_uri(source)
+        except (binascii.Error, ValueError):
+            return None
+        sha256 = hashlib.sha256(data).hexdigest()
+    elif cache is None:
+        data = await http_client.get_bytes(source)
+        sha256 = None
+    else:
+        sha256 = cache.fresh_sha256(source)
+        features = cache.load_json(sha256, "media") if sha256 else None
+        if features is not None:
+            return features
+        data, sha256 = await cache.get_bytes(http_client, source)
+
+    if cache is not None and sha256:
+        features = cache.load_json(sha256, "media")
+        if features is not None:
+            print(f"📦 Cached {kind} features for {source[:60]}")
+            return features
+    if len(data) > MEDIA_MAX_BYTES:
+        print(f"⚠️ Skipping {kind} over MEDIA_MAX_BYTES: {source[:60]}")
+        return None
+    analyze = analyze_image if kind == "image" else analyze_audio
+    features = await cpu_executor.run(analyze, data, size=len(data), name=f"analyze_{kind}")
+    if cache is not None and sha256:
+        cache.save_json(sha256, "media", features)
+    return features
+
+
+def answer_from_media(items, task):
+    """Pick the measurement the question asks for from the first attachment that has it"""
+    for features in items:
+        if features["kind"] == "image":
+            answer = _image_answer(features, task)
+        else:
+            answer = _audio_answer(features, task)
+        if answer is not None:
+            return answer
+    return None
+
+
+def _image_answer(features, task):
+    if task.has("ask:color") and features.get("colors"):
+        return features["colors"][0]["hex"]
+    if task.has("ask:width") and task.has("ask:height") and "width" in features:
+        return f"{features['width']}x{features['height']}"
+    for tag, key in (("ask:width", "width"), ("ask:height", "height"), ("ask:pixels", "pixels"),
+                     ("ask:brightness", "brightness")):
+        if task.has(tag) and features.get(key) is not None:
+            return features[key]
+    if task.has("ask:text") and features.get("text") and task.answer_type == "string":
+        return features["text"]
+    numbers = features.get("numbers") or []
+    if numbers:
+        reduce = {"sum": sum, "max": max, "min": min, "count": len, "mean": lambda v: sum(v) / len(v)}
+        return reduce[task.operation](numbers) if task.operation in reduce else numbers[0]
+    if task.has("ask:text") and features.get("text"):
+        return features["text"]
+    return None
+
+
+def _audio_answer(features, task):
+    for tag, key in (("ask:sample_rate", "sample_rate"), ("ask:channels", "channels"),
+                     ("ask:duration", "duration")):
+        if task.has(tag) and features.get(key) is not None:
+            return features[key]
+    return None
+
+
+async def solve_media(http_client, sources, task, cache=None):
+    """Analyse the attachments in the CPU pool, all at once, and answer from them in page order"""
+    results = await asyncio.gather(*(load_media(http_client, kind, source, cache=cache) for kind, source in sources),
+                                   return_exceptions=True)
+    items = []
+    for (kind, source), result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Could not analyse {kind} {source[:60]}: {result}")
+        elif result is not None:
+            items.append(result)
+    for item in items:
+        print(f"🖼️ {item['kind']}: { {k: v for k, v in item.items() if k not in ('colors', 'numbers', 'text')} }")
+    return answer_from_media(items, task)
+
+
+def _number(text):
+    value = float(text.replace(",", ""))
+    return int(value) if value.is_integer() else value
@@ -0,0 +1,163 @@
+# mock_quiz_server.py - local stand-in for the quiz host, for offline benchmarks
+#
+#   uvicorn mock_quiz_server:app --port 9000
+#
+# Each chain walks through text, CSV, PDF, API and JS-rendered tasks. Data is
+# derived from (chain, step) so answers are deterministic; /submit checks
+# them and returns the next URL like the real host does.
+import os
+import random
+import hashlib
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, Response, JSONResponse
+
+MOCK_CHAIN_LENGTH = int(os.getenv("MOCK_CHAIN_LENGTH", "5"))
+MOCK_CSV_ROWS = int(os.getenv("MOCK_CSV_ROWS", "5000"))
+TASK_TYPES = ["text", "csv", "pdf", "api", "js"]
+
+app = FastAPI(title="Mock Quiz Server")
+
+
+def _rng(chain, step):
+    seed = int(hashlib.sha256(f"{chain}/{step}".encode()).hexdigest()[:12], 16)
+    return random.Random(seed)
+
+
+def task_type(step):
+    return TASK_TYPES[step % len(TASK_TYPES)]
+
+
+def csv_rows(chain, step):
+    rng = _rng(chain, step)
+    return [(i, rng.randint(1, 1000), rng.choice("abcd")) for i in range(1, MOCK_CSV_ROWS + 1)]
+
+
+def csv_cutoff(chain, step):
+    return _rng(chain, step).randint(200, 800)
+
+
+def pdf_table(chain, step):
+    rng = _rng(chain, step)
+    return [(f"item{i}", rng.randint(1, 50), rng.randint(1, 20)) for i in range(1, 9)]
+
+
+def expected_answer(chain, step):
+    kind = task_type(step)
+    rng = _rng(chain, step)
+    if kind == "text":
+        return rng.randint(1000, 9999)
+    if kind == "csv":
+        cutoff = csv_cutoff(chain, step)
+        return sum(value for _, value, _ in csv_rows(chain, step) if value > cutoff)
+    if kind == "pdf":
+        return sum(qty for _, qty, _ in pdf_table(chain, step))
+    if kind == "api":
+        return rng.randint(10000, 99999)
+    a, b = rng.randint(10, 99), rng.randint(10, 99)
+    return a * b
+
+
+def _page(body):
+    return HTMLResponse(f"<!doctype html><html><head><title>Quiz</title></head><body>{body}</body></html>")
+
+
+@app.get("/quiz/{chain}/{step}")
+async def quiz_page(chain: str, step: int, request: Request):
+    base = str(request.base_url).rstrip("/")
+    submit = f"<p>Post your answer to {base}/submit</p>"
+    kind = task_type(step)
+    rng = _rng(chain, step)
+    if kind == "text":
+        return _page(f"<h1>Quiz {step}</h1><p>Answer: {expected_answer(chain, step)}</p>{submit}")
+    if kind == "csv":
+        return _page(
+            f"<h1>Quiz {step}</h1><p>Download <a href=\"/data/{chain}/{step}.csv\">this file</a>. "
+            f"What is the sum of the value column where value &gt; {csv_cutoff(chain, step)}?</p>{submit}"
+        )
+    if kind == "pdf":
+        return _page(
+            f"<h1>Quiz {step}</h1><p>Download <a href=\"/data/{chain}/{step}.pdf\">the report</a>. "
+            f"What is the sum of the qty column on page 2?</p>{submit}"
+        )
+    if kind == "api":
+        return _page(
+            f"<h1>Quiz {step}</h1><p>Call the API endpoint {base}/api/{chain}/{step} "
+            f"and submit its total.</p>{submit}"
+        )
+    a, b = rng.randint(10, 99), rng.randint(10, 99)
+    return _page(
+        f"<div id=\"task\"></div>{submit}"
+        f"<script>const a = {a}, b = {b};"
+        f"document.getElementById(\"task\").innerHTML = "
+        f"\"<h1>Quiz {step}</h1><p>Answer: \" + (a * b) + \"</p>\";</script>"
+    )
+
+
+@app.get("/data/{chain}/{name}")
+async def data_file(chain: str, name: str):
+    step = int(name.split(".")[0])
+    if name.endswith(".csv"):
+        lines = ["id,value,category"] + [f"{i},{v},{c}" for i, v, c in csv_rows(chain, step)]
+        return Response("\n".join(lines) + "\n", media_type="text/csv")
+    rows = pdf_table(chain, step)
+    pages = [
+        ["Quarterly report", "Summary page with no table"],
+        ["Inventory", "item   qty   price"] + [f"{item}   {qty}   {price}" for item, qty, price in rows],
+    ]
+    return Response(make_pdf(pages), media_type="application/pdf")
+
+
+@app.get("/api/{chain}/{step}")
+async def api(chain: str, step: int):
+    return {"total": expected_answer(chain, step), "items": list(range(5))}
+
+
+@app.post("/submit")
+async def submit(request: Request):
+    payload = await request.json()
+    url = payload.get("url", "")
+    chain, step = url.rstrip("/").split("/")[-2:]
+    step = int(step)
+    expected = expected_answer(chain, step)
+    try:
+        correct = float(payload.get("answer")) == float(expected)
+    except (TypeError, ValueError):
+        correct = False
+    next_url = None
+    if step + 1 < MOCK_CHAIN_LENGTH:
+        next_url = f"{str(request.base_url).rstrip('/')}/quiz/{chain}/{step + 1}"
+    reason = "" if correct else f"expected {expected}"
+    return JSONResponse({"correct": correct, "url": next_url, "reason": reason})
+
+
+def make_pdf(pages):
+    """Minimal text-only PDF, one list of lines per page, no dependencies"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        text = " ".join(f"({line}) Tj T*" for line in lines)
+        stream = f"BT /F1 10 Tf 50 750 Td 14 TL {text} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=9000)
@@ -0,0 +1,130 @@
+# page_manager.py - one reusable browser page per quiz chain, recreated when it crashes or bloats
+import os
+import asyncio
+
+PAGE_MAX_HEAP_BYTES = int(os.getenv("PAGE_MAX_HEAP_BYTES", str(256 << 20)))
+PAGE_MAX_USES = int(os.getenv("PAGE_MAX_USES", "50"))
+
+# Chromium-only and coarse without --enable-precise-memory-info, which is fine for a threshold
+HEAP_SCRIPT = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+class PageManager:
+    """
+    Lends the chain's page to each quiz and takes it back afterwards.
+
+    Between quizzes the page is reset to about:blank, which drops the old
+    document with its timers and listeners, and its JS heap is measured
+    there, so whatever is still held is leaked. The page is replaced when
+    it crashed or was closed, passed PAGE_MAX_HEAP_BYTES after a reset or
+    has served PAGE_MAX_USES quizzes.
+    """
+
+    def __init__(self, context, max_heap_bytes=PAGE_MAX_HEAP_BYTES, max_uses=PAGE_MAX_USES):
+        self.context = context
+        self.max_heap_bytes = max_heap_bytes
+        self.max_uses = max_uses
+        self._page = None
+        self._busy = False
+        self._uses = 0
+        self._pending = None  # reset of the page after its last quiz
+        self._extra = set()  # throwaway pages lent while the chain page is still held
+        self._crashed = set()
+        self.created = 0
+        self.reused = 0
+        self.recreated = {}  # reason -> count
+        self.heap_bytes = []  # JS heap after each reset, in quiz order
+
+    async def acquire(self):
+        """The chain page, once its previous quiz has been reset away"""
+        if self._pending is not None:
+            await asyncio.gather(self._pending, return_exceptions=True)
+        if self._busy and self._page is not None and self._page.is_closed():
+            # Closed by its holder instead of released: take it back, or every later quiz gets a throwaway page
+            self._busy = False
+        if self._busy:
+            # Still held, e.g. by a discarded prefetch: lend a page that is closed on release
+            page = await self._open()
+            self._extra.add(page)
+            return page
+        if self._page is not None and (self._page.is_closed() or self._page in self._crashed):
+            await self._retire("crash" if self._page in self._crashed else "closed")
+        if self._page is None:
+            self._page = await self._open()
+        if self._uses:
+            self.reused += 1
+        self._busy = True
+        self._uses += 1
+        return self._page
+
+    def release(self, page):
+        """Hand a page back; returns the task resetting it, which the next acquire() waits for"""
+        if page is not self._page:
+            # A lent throwaway page, or one that has already been replaced
+            self._extra.discard(page)
+            return asyncio.ensure_future(_close(page))
+        self._pending = asyncio.ensure_future(self._reset(page))
+        return self._pending
+
+    async def aclose(self):
+        if self._pending is not None:
+            await asyncio.gather(self._pending, return_exceptions=True)
+        pages = [p for p in [self._page, *self._extra] if p is not None]
+        self._page = None
+        self._extra.clear()
+        await asyncio.gather(*(_close(p) for p in pages), return_exceptions=True)
+
+    def stats(self):
+        return {
+            "pages_created": self.created,
+            "reused": self.reused,
+            "recreated": dict(self.recreated),
+            "heap_bytes": list(self.heap_bytes),
+            "peak_heap_bytes": max(self.heap_bytes, default=0),
+        }
+
+    async def _reset(self, page):
+        reason = None
+        try:
+            if page.is_closed() or page in self._crashed:
+                reason = "crash" if page in self._crashed else "closed"
+            else:
+                await page.goto("about:blank")
+                heap = int(await page.evaluate(HEAP_SCRIPT) or 0)
+                self.heap_bytes.append(heap)
+                if heap > self.max_heap_bytes:
+                    reason = "memory"
+                elif self._uses >= self.max_uses:
+                    reason = "uses"
+        except Exception as e:
+            print(f"Page reset failed: {e}")
+            reason = "reset_failed"
+        try:
+            if reason:
+                await self._retire(reason)
+                # Replace it now, while the chain is busy submitting, rather than on the next acquire
+                self._page = await self._open()
+        finally:
+            self._busy = False
+
+    async def _open(self):
+        page = await self.context.new_page()
+        page.on("crash", self._crashed.add)
+        self.created += 1
+        return page
+
+    async def _retire(self, reason):
+        print(f"♻️ Replacing chain page ({reason}, {self._uses} use(s))")
+        self.recreated[reason] = self.recreated.get(reason, 0) + 1
+        page, self._page = self._page, None
+        self._crashed.discard(page)
+        self._uses = 0
+        await _close(page)
+
+
+async def _close(page):
+    try:
+        if not page.is_closed():
+            await page.close()
+    except Exception:
+        pass
@@ -0,0 +1,154 @@
+# pdf_engine.py - parallel page-level PDF extraction with table recognition
+import os
+import re
+import asyncio
+import hashlib
+from io import BytesIO
+from collections import OrderedDict
+import pandas as pd
+import PyPDF2
+import cpu_executor
+from analytics import run_query
+from classifier import classify, mentioned_columns
+
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "4"))
+PDF_PAGE_CACHE = int(os.getenv("PDF_PAGE_CACHE", "2000"))
+
+PAGE_RE = re.compile(r"\bpages?\s+(\d+)(?:\s*(?:-|to|and|through)\s*(\d+))?", re.IGNORECASE)
+NUMBER_RE = re.compile(r"-?\d+(?:,\d{3})*(?:\.\d+)?")
+
+# (sha256 of the PDF, page index) -> extracted text
+_page_cache = OrderedDict()
+
+
+def _extract_range(pdf_data, start, stop):
+    """Worker: extract text for pages [start, stop) of one PDF"""
+    reader = PyPDF2.PdfReader(BytesIO(pdf_data))
+    texts = []
+    for i in range(start, stop):
+        cpu_executor.check_deadline()
+        texts.append(reader.pages[i].extract_text() or "")
+    return texts
+
+
+def _page_count(pdf_data):
+    return len(PyPDF2.PdfReader(BytesIO(pdf_data)).pages)
+
+
+async def extract_pages(pdf_data):
+    """
+    Text of every page, in order. Pages are split across the process pool
+    for long documents, and each page's text is cached by PDF hash.
+    """
+    digest = hashlib.sha256(pdf_data).hexdigest()
+    count = await cpu_executor.run(_page_count, pdf_data, size=len(pdf_data))
+
+    pages = [_page_cache.get((digest, i)) for i in range(count)]
+    missing = [i for i, text in enumerate(pages) if text is None]
+    if missing:
+        start, stop = missing[0], missing[-1] + 1
+        if stop - start < PDF_PARALLEL_MIN_PAGES:
+            ranges = [(start, stop)]
+        else:
+            step = -(-(stop - start) // cpu_executor.CPU_WORKERS)
+            ranges = [(i, min(i + step, stop)) for i in range(start, stop, step)]
+        runs = [cpu_executor.run(_extract_range, pdf_data, a, b, size=len(pdf_data)) for a, b in ranges]
+        for (a, _), texts in zip(ranges, await asyncio.gather(*runs)):
+            for offset, text in enumerate(texts):
+                pages[a + offset] = text
+                _remember(digest, a + offset, text)
+    return pages
+
+
+def _remember(digest, index, text):
+    _page_cache[(digest, index)] = text
+    _page_cache.move_to_end((digest, index))
+    while len(_page_cache) > PDF_PAGE_CACHE:
+        _page_cache.popitem(last=False)
+
+
+def target_pages(instructions, page_count):
+    """0-based page indices the question refers to ("on page 2", "pages 3-5"), or all pages"""
+    selected = []
+    for match in PAGE_RE.finditer(instructions):
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        selected.extend(i - 1 for i in range(first, last + 1) if 1 <= i <= page_count)
+    return sorted(set(selected)) or list(range(page_count))
+
+
+def page_tables(text):
+    """
+    Recognise tables in extracted page text: runs of at least two lines
+    with the same number of whitespace-separated cells, first row as header
+    when it isn't numeric. Each table is returned as a DataFrame.
+    """
+    tables = []
+    run = []
+    for line in text.splitlines() + [""]:
+        cells = re.split(r"\s{2,}|\t", line.strip()) if re.search(r"\s{2,}|\t", line.strip()) else line.split()
+        if len(cells) >= 2 and (not run or len(cells) == len(run[0])):
+            run.append(cells)
+            continue
+        if len(run) >= 2:
+            tables.append(_to_frame(run))
+        run = [cells] if len(cells) >= 2 else []
+    return [t for t in tables if t is not None]
+
+
+def _to_frame(rows):
+    has_header = not any(NUMBER_RE.fullmatch(cell) for cell in rows[0])
+    header = rows[0] if has_header else [str(i) for i in range(len(rows[0]))]
+    df = pd.DataFrame(rows[1:] if has_header else rows, columns=header)
+    for column in df.columns:
+        numeric = pd.to_numeric(df[column].str.replace(",", ""), errors="coerce")
+        if numeric.notna().mean() >= 0.8:
+            df[column] = numeric
+    if not any(pd.api.types.is_numeric_dtype(df[c]) for c in df.columns):
+        return None
+    return df
+
+
+def answer_from_pages(pages, instructions):
+    """Answer from tables on the targeted pages first, then from their plain numbers"""
+    selected = target_pages(instructions, len(pages))
+    text = "\n".join(pages[i] for i in selected)
+    task = classify(instructions)
+
+    tables = [t for i in selected for t in page_tables(pages[i])]
+    # Prefer a table that has a column the question names
+    tables.sort(key=lambda t: not mentioned_columns(task.lower, list(t.columns)))
+    for table in tables:
+        answer, plan = run_query([table], instructions)
+        if answer is not None and plan["column"] is not None:
+            print(f"📄 PDF table plan: {plan} on pages {[i + 1 for i in selected]}")
+            return answer
+
+    numbers = [float(n.replace(",", "")) for n in NUMBER_RE.findall(text)]
+    if not numbers:
+        return None
+    if "sum" in task.words.get("op:sum", []):
+        total = sum(numbers)
+        return int(total) if total == int(total) else total
+    if task.operation in ("sum", "count"):
+        return int(numbers[-1]) if numbers[-1] == int(numbers[-1]) else numbers[-1]  # Usually the last number
+    return None
+
+
+async def solve_pdf(http_client, url, instructions, cache=None):
+    """Download (or reuse) a PDF and answer from its pages; cached page text skips both"""
+    if cache is None:
+        pages = await extract_pages(await http_client.get_bytes(url))
+    else:
+        sha256 = cache.fresh_sha256(url)
+        pages = cache.load_json(sha256, "pages") if sha256 else None
+        if pages is None:
+            pdf_data, sha256 = await cache.get_bytes(http_client, url)
+            pages = cache.load_json(sha256, "pages")
+            if pages is None:
+                pages = await extract_pages(pdf_data)
+                cache.save_json(sha256, "pages", pages)
+        else:
+            print(f"📦 Cached page text for {url}")
+    print(f"📄 Extracted {len(pages)} page(s)")
+    return await cpu_executor.run(answer_from_pages, pages, instructions, size=sum(map(len, pages)))
@@ -0,0 +1,106 @@
+# pipeline.py - overlap quiz steps: prefetch the next page, reuse one browser page, reset it in the background
+import asyncio
+import contextvars
+from page_manager import PageManager
+
+
+class ChainPipeline:
+    """
+    Per-chain helper that lets the next quiz start loading as soon as the
+    submit response names it, while the current step is still wrapping up.
+    """
+
+    def __init__(self, context, load, cache=None, http_client=None):
+        # load(url, new_page) -> (task_info, page_or_None)
+        self.context = context
+        self.load = load
+        self.cache = cache
+        self.http_client = http_client
+        self.pages = PageManager(context)
+        self._next = None
+        self._background = set()
+
+    def prefetch(self, url):
+        """Start loading `url` (page plus linked data files) right away"""
+        if self._next and self._next[0] == url:
+            return
+        self._discard_next()
+        print(f"⏩ Prefetching next quiz: {url}")
+        # Fresh context: the prefetch must not report into the current step's timing collectors
+        task = asyncio.create_task(self._load_and_warm(url), context=contextvars.Context())
+        self._next = (url, task)
+
+    async def load_page(self, url):
+        """The prefetched result for `url` if there is one, else load it now"""
+        if self._next and self._next[0] == url:
+            _, task = self._next
+            self._next = None
+            return await task
+        self._discard_next()
+        return await self._load_and_warm(url)
+
+    async def new_page(self):
+        """The chain's page, reused from quiz to quiz (see PageManager)"""
+        return await self.pages.acquire()
+
+    def close_later(self, page):
+        """Give a page back without making the next step wait for its reset"""
+        if page is not None:
+            self._run_in_background(self.pages.release(page))
+
+    async def aclose(self):
+        self._discard_next()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        await self.pages.aclose()
+
+    async def _load_and_warm(self, url):
+        lent = []
+
+        async def new_page():
+            page = await self.new_page()
+            lent.append(page)
+            return page
+
+        try:
+            task_info, page = await self.load(url, new_page)
+        except BaseException:
+            # Timed out or cancelled mid-render: the page goes back to the manager, not just closed,
+            # or it would stay lent out and every later quiz would get a throwaway page
+            for page in lent:
+                self.close_later(page)
+            raise
+        if self.cache is not None and self.http_client is not None:
+            for link in task_info.get("links", []):
+                if any(ext in link["url"].lower() for ext in (".csv", ".pdf", ".json")):
+                    self.cache.prefetch(self.http_client, link["url"])
+        return task_info, page
+
+    def _discard_next(self):
+        if self._next is None:
+            return
+        _, task = self._next
+        self._next = None
+        task.cancel()
+
+        async def close_orphan():
+            try:
+                _, page = await task
+            except BaseException:
+                return
+            if page is not None:
+                await self.pages.release(page)
+
+        self._run_in_background(close_orphan())
+
+    def _run_in_background(self, coro):
+        task = asyncio.create_task(_quietly(coro))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+async def _quietly(coro):
+    try:
+        await coro
+    except Exception as e:
+        print(f"Background cleanup error: {e}")
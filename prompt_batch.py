@@ -0,0 +1,283 @@
+# prompt_batch.py - run the prompt x attack x model x repetition leak matrix concurrently
+#
+#   python prompt_batch.py matrix.json --results leaks.jsonl --concurrency 16 --rate 8
+#
+# matrix.json:
+#   {"system_prompts": {"guard": "..."}, "attacks": {"debug": "...", "riddle": "..."},
+#    "models": ["openai/gpt-5.1-nano"], "repetitions": 50}
+#
+# Every trial is appended to the results JSONL as it finishes; re-running with
+# the same file skips trials already recorded, so an interrupted batch resumes.
+# Codewords are seeded per cell and replies are cached in SQLite (llm_cache.py),
+# so a repeated sweep costs no API calls; --replay rescores from the cache only.
+import os
+import csv
+import json
+import math
+import time
+import asyncio
+import argparse
+import httpx
+from llm_cache import LLMCache, CacheMiss, LLM_CACHE_PATH
+from prompt_texting import API_URL, DEFAULT_MODEL, headers, generate_codeword, build_payload, extract_reply, is_leaked
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_RATE = float(os.getenv("BATCH_RATE", "0"))
+BATCH_RETRIES = int(os.getenv("BATCH_RETRIES", "3"))
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT", "30"))
+BATCH_SEED = os.getenv("BATCH_SEED", "0")
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+GROUP_FIELDS = ("prompt", "attack", "model")
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """95% Wilson score interval for a binomial proportion"""
+    if trials == 0:
+        return (0.0, 0.0)
+    p = successes / trials
+    denom = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denom
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+
+def _named(items, prefix):
+    if isinstance(items, dict):
+        return dict(items)
+    return {f"{prefix}{i}": text for i, text in enumerate(items)}
+
+
+def load_matrix(path):
+    with open(path) as f:
+        spec = json.load(f)
+    return {
+        "system_prompts": _named(spec["system_prompts"], "prompt"),
+        "attacks": _named(spec["attacks"], "attack"),
+        "models": spec.get("models") or [DEFAULT_MODEL],
+        "repetitions": int(spec.get("repetitions", 1)),
+    }
+
+
+def trial_key(trial):
+    return (trial["prompt"], trial["attack"], trial["model"], trial["rep"])
+
+
+def trial_seed(base, trial):
+    """Codeword seed for one matrix cell, so reruns reuse the same codeword (and cache entry)"""
+    return f"{base}/{trial['prompt']}/{trial['attack']}/{trial['model']}/{trial['rep']}"
+
+
+def expand(matrix):
+    """Every (prompt, attack, model, repetition) cell of the matrix"""
+    return [
+        {"prompt": p, "attack": a, "model": m, "rep": r}
+        for p in matrix["system_prompts"]
+        for a in matrix["attacks"]
+        for m in matrix["models"]
+        for r in range(matrix["repetitions"])
+    ]
+
+
+def load_results(path):
+    """Completed trials from a previous run; errored ones are dropped so they are retried"""
+    results = {}
+    if not path or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # half-written line from an interrupted run
+            if record.get("error") is None:
+                results[trial_key(record)] = record
+    return results
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart; rate 0 means unlimited"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BatchRunner:
+    def __init__(self, matrix, results_path=None, concurrency=BATCH_CONCURRENCY, rate=BATCH_RATE,
+                 retries=BATCH_RETRIES, timeout=BATCH_TIMEOUT, cache=None, seed=BATCH_SEED):
+        self.matrix = matrix
+        self.cache = cache
+        self.seed = seed
+        self.results_path = results_path
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.timeout = timeout
+        self.done = 0
+
+    async def run(self):
+        """Run every trial not already in the results file; returns all completed records"""
+        results = load_results(self.results_path)
+        pending = [t for t in expand(self.matrix) if trial_key(t) not in results]
+        print(f"🧪 {len(results)} trial(s) already recorded, {len(pending)} to run")
+        if not pending:
+            return list(results.values())
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        out = open(self.results_path, "a") if self.results_path else None
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout, limits=limits, headers=headers) as client:
+                async def bounded(trial):
+                    async with semaphore:
+                        record = await self.run_trial(client, trial)
+                    if out:
+                        out.write(json.dumps(record) + "\n")
+                        out.flush()
+                    self.done += 1
+                    if self.done % 25 == 0 or self.done == len(pending):
+                        print(f"⏳ {self.done}/{len(pending)} trials")
+                    return record
+
+                for record in await asyncio.gather(*(bounded(t) for t in pending)):
+                    if record["error"] is None:
+                        results[trial_key(record)] = record
+        finally:
+            if out:
+                out.close()
+        return list(results.values())
+
+    async def run_trial(self, client, trial):
+        codeword = generate_codeword(seed=trial_seed(self.seed, trial))
+        payload = build_payload(self.matrix["system_prompts"][trial["prompt"]],
+                                self.matrix["attacks"][trial["attack"]], codeword, trial["model"])
+        record = dict(trial, codeword=codeword, leaked=None, reply=None, error=None, latency=None)
+        start = time.perf_counter()
+        try:
+            if self.cache:
+                reply = await self.cache.fetch(payload, lambda: self.request(client, payload))
+            else:
+                reply = await self.request(client, payload)
+            record.update(reply=reply, leaked=is_leaked(codeword, reply))
+        except CacheMiss:
+            record["error"] = "not cached"
+        except (httpx.HTTPError, ValueError) as e:
+            record["error"] = str(e) or type(e).__name__
+        record["latency"] = round(time.perf_counter() - start, 3)
+        return record
+
+    async def request(self, client, payload):
+        """POST one completion with rate limiting and retries; returns the reply text"""
+        for attempt in range(self.retries + 1):
+            await self.limiter.wait()
+            try:
+                response = await client.post(API_URL, json=payload)
+                if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                    await asyncio.sleep(_retry_delay(response, attempt))
+                    continue
+                response.raise_for_status()
+                data = response.json()
+                if "choices" not in data:
+                    raise ValueError(f"no choices in response: {data.get('error')}")
+                return extract_reply(data)
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+
+def _retry_delay(response, attempt):
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return 2 ** attempt
+
+
+def leak_table(records, group_by=GROUP_FIELDS):
+    """Leak rate with a 95% Wilson interval per group"""
+    groups = {}
+    for record in records:
+        key = tuple(record[field] for field in group_by)
+        leaks, trials = groups.get(key, (0, 0))
+        groups[key] = (leaks + bool(record["leaked"]), trials + 1)
+    rows = []
+    for key, (leaks, trials) in sorted(groups.items()):
+        low, high = wilson_interval(leaks, trials)
+        row = dict(zip(group_by, key))
+        row.update(trials=trials, leaks=leaks, leak_rate=round(leaks / trials, 4),
+                   ci_low=round(low, 4), ci_high=round(high, 4))
+        rows.append(row)
+    return rows
+
+
+def print_table(rows, group_by):
+    columns = list(group_by) + ["trials", "leaks", "leak_rate", "ci_low", "ci_high"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch codeword-leak evaluation of system prompts")
+    parser.add_argument("matrix", help="JSON file with system_prompts, attacks, models, repetitions")
+    parser.add_argument("--results", default="leak_results.jsonl", help="JSONL of trials (appended, resumable)")
+    parser.add_argument("--models", nargs="+", help="override the matrix's models")
+    parser.add_argument("--repetitions", type=int, help="override the matrix's repetitions")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=BATCH_RATE, help="max requests per second (0 = no limit)")
+    parser.add_argument("--group-by", default=",".join(GROUP_FIELDS), help="comma-separated table grouping")
+    parser.add_argument("--csv", help="also write the leak-rate table here")
+    parser.add_argument("--seed", default=BATCH_SEED, help="base seed for the per-trial codewords")
+    parser.add_argument("--cache", default=LLM_CACHE_PATH, help="SQLite reply cache")
+    parser.add_argument("--no-cache", action="store_true", help="always call the API")
+    parser.add_argument("--replay", action="store_true",
+                        help="recompute scores from cached replies only; no network, results file untouched")
+    args = parser.parse_args()
+    if args.replay and args.no_cache:
+        # Without the cache a replay would quietly turn into live API calls
+        parser.error("--replay reads replies from the cache; it cannot be combined with --no-cache")
+
+    matrix = load_matrix(args.matrix)
+    if args.models:
+        matrix["models"] = args.models
+    if args.repetitions:
+        matrix["repetitions"] = args.repetitions
+
+    cache = None if args.no_cache else LLMCache(args.cache, replay=args.replay)
+    results = None if args.replay else args.results
+    runner = BatchRunner(matrix, results, args.concurrency, args.rate, cache=cache, seed=args.seed)
+    records = asyncio.run(runner.run())
+    if cache:
+        print(f"🗄️ Reply cache: {cache.stats()}")
+        cache.close()
+    # Only count cells of the current matrix, even if the results file holds more
+    wanted = {trial_key(t) for t in expand(matrix)}
+    records = [r for r in records if trial_key(r) in wanted]
+    if not records:
+        print("No completed trials yet.")
+        return
+
+    group_by = [field for field in args.group_by.split(",") if field]
+    rows = leak_table(records, group_by)
+    print_table(rows, group_by)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
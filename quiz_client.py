@@ -0,0 +1,224 @@
+# quiz_client.py - async client: fire /solve calls, follow their progress, report latency and success
+#
+#   python quiz_client.py https://tds-llm-analysis.s-anand.net/project2
+#   python quiz_client.py --urls-file urls.txt --requests 200 --concurrency 20 --rate 5 --ramp-up 30 \
+#       --json report.json --csv chains.csv
+import os
+import csv
+import json
+import time
+import math
+import asyncio
+import argparse
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STUDENT_EMAIL = os.getenv("STUDENT_EMAIL")
+STUDENT_SECRET = os.getenv("STUDENT_SECRET")
+SERVER = os.getenv("QUIZ_SERVER", "http://127.0.0.1:8000")
+DEFAULT_QUIZ_URL = "https://tds-llm-analysis.s-anand.net/project2"
+
+CSV_FIELDS = ["index", "url", "job_id", "status", "http_status", "accept_latency",
+              "chain_latency", "quizzes", "correct", "error"]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for no data"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "n": 0}
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "mean": round(sum(values) / len(values), 4),
+        "n": len(values),
+    }
+
+
+def launch_offsets(count, rate, ramp_up):
+    """
+    Seconds after start at which each request is sent. The send rate climbs
+    linearly from 0 to `rate` over `ramp_up` seconds, then holds; rate 0
+    sends everything at once (concurrency still applies).
+    """
+    if rate <= 0:
+        return [0.0] * count
+    offsets = []
+    ramp_requests = rate * ramp_up / 2
+    for i in range(count):
+        if i < ramp_requests:
+            offsets.append(math.sqrt(2 * ramp_up * i / rate))
+        else:
+            offsets.append(ramp_up + (i - ramp_requests) / rate)
+    return offsets
+
+
+async def read_events(response):
+    """Parse a text/event-stream body into (event, data) pairs"""
+    event = None
+    async for raw in response.content:
+        line = raw.decode().rstrip("\r\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            yield event, json.loads(line[len("data: "):])
+
+
+class Client:
+    """Sends /solve calls for a list of quiz URLs under a concurrency cap and launch schedule"""
+
+    def __init__(self, server=SERVER, concurrency=4, rate=0, ramp_up=0, verbose=True):
+        self.server = server.rstrip("/")
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.ramp_up = ramp_up
+        self.verbose = verbose
+
+    def log(self, index, message):
+        if self.verbose:
+            print(f"[{index}] {message}", flush=True)
+
+    async def run(self, urls):
+        """Run every URL once, in order, and return one record per chain"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        offsets = launch_offsets(len(urls), self.rate, self.ramp_up)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=10)
+        start = time.perf_counter()
+
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async def scheduled(index, url, offset):
+                await asyncio.sleep(max(0.0, start + offset - time.perf_counter()))
+                async with semaphore:
+                    return await self.solve(session, index, url)
+
+            return await asyncio.gather(*(
+                scheduled(i, url, offset) for i, (url, offset) in enumerate(zip(urls, offsets))
+            ))
+
+    async def solve(self, session, index, url):
+        record = {"index": index, "url": url, "job_id": None, "status": "failed", "http_status": None,
+                  "accept_latency": None, "chain_latency": None, "quizzes": 0, "correct": 0,
+                  "error": None, "step_times": []}
+        payload = {"email": STUDENT_EMAIL, "secret": STUDENT_SECRET, "url": url}
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{self.server}/solve", json=payload) as resp:
+                record["http_status"] = resp.status
+                body = await resp.json(content_type=None)
+            record["accept_latency"] = round(time.perf_counter() - start, 4)
+            if record["http_status"] >= 400:
+                record["error"] = body.get("detail") if isinstance(body, dict) else str(body)
+                self.log(index, f"❌ /solve returned {record['http_status']}: {record['error']}")
+                return record
+
+            if "events_url" not in body:
+                # receive_requests.py answers synchronously once the chain is over
+                record["status"] = "done"
+                self.log(index, f"✅ Done: {body.get('answer')!r}")
+            else:
+                record["job_id"] = body["job_id"]
+                self.log(index, f"📩 Job {body['job_id']} queued for {url}")
+                await self.follow(session, index, body["events_url"], record)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            record["error"] = str(e) or type(e).__name__
+            self.log(index, f"❌ {record['error']}")
+        record["chain_latency"] = round(time.perf_counter() - start, 4)
+        return record
+
+    async def follow(self, session, index, events_url, record):
+        async with session.get(f"{self.server}{events_url}") as resp:
+            async for event, data in read_events(resp):
+                if event == "result":
+                    record["quizzes"] += 1
+                    record["correct"] += bool(data["correct"])
+                    if data.get("step_time") is not None:
+                        record["step_times"].append(data["step_time"])
+                    mark = "✅" if data["correct"] else "❌"
+                    self.log(index, f"{mark} Quiz #{data['quiz']}: {data['url']} -> {data['answer']}")
+                elif event == "status":
+                    self.log(index, f"ℹ️ Job status: {data['status']}")
+                elif event == "done":
+                    record["status"] = data["status"]
+                    record["error"] = data.get("error")
+                    return
+
+
+def report(records, wall_time):
+    """Aggregate per-chain records into latency and success statistics"""
+    done = [r for r in records if r["status"] == "done"]
+    quizzes = sum(r["quizzes"] for r in records)
+    return {
+        "requests": len(records),
+        "succeeded": len(done),
+        "failed": len(records) - len(done),
+        "success_rate": round(len(done) / len(records), 4) if records else None,
+        "wall_time": round(wall_time, 3),
+        "chains_per_minute": round(len(done) / wall_time * 60, 2) if wall_time else None,
+        "accept_latency": summarize([r["accept_latency"] for r in records if r["accept_latency"] is not None]),
+        "chain_latency": summarize([r["chain_latency"] for r in done]),
+        "step_latency": summarize([t for r in records for t in r["step_times"]]),
+        "quizzes": quizzes,
+        "accuracy": round(sum(r["correct"] for r in records) / quizzes, 4) if quizzes else None,
+        "http_status": {str(k): sum(1 for r in records if r["http_status"] == k)
+                        for k in sorted({r["http_status"] for r in records}, key=str)},
+    }
+
+
+def write_csv(path, records):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def load_urls(args):
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file) as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    urls = urls or [DEFAULT_QUIZ_URL]
+    total = args.requests or len(urls)
+    return [urls[i % len(urls)] for i in range(total)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send quiz URLs to the solver and report how it coped")
+    parser.add_argument("urls", nargs="*", help="quiz URLs (default: the project2 entry URL)")
+    parser.add_argument("--urls-file", help="file with one quiz URL per line")
+    parser.add_argument("--server", default=SERVER)
+    parser.add_argument("--requests", type=int, default=0, help="total /solve calls, cycling through the URLs")
+    parser.add_argument("--concurrency", type=int, default=4, help="max chains in flight")
+    parser.add_argument("--rate", type=float, default=0, help="requests per second after ramp-up (0 = no limit)")
+    parser.add_argument("--ramp-up", type=float, default=0, help="seconds to climb linearly to --rate")
+    parser.add_argument("--json", help="write the aggregate report (and per-chain records) here")
+    parser.add_argument("--csv", help="write one row per chain here")
+    parser.add_argument("--quiet", action="store_true", help="only print the final report")
+    args = parser.parse_args()
+
+    urls = load_urls(args)
+    client = Client(args.server, args.concurrency, args.rate, args.ramp_up, verbose=not args.quiet)
+    print(f"🚀 Sending {len(urls)} request(s) to {client.server} (concurrency {client.concurrency})")
+    start = time.perf_counter()
+    records = asyncio.run(client.run(urls))
+    summary = report(records, time.perf_counter() - start)
+
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "chains": records}, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, records)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,32 @@
 import os
+import re
 import time
-import asyncio
-import json
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from playwright.async_api import async_playwright
 from dotenv import load_dotenv
+from browser_pool import BrowserPool
+from fetcher import extract_page, render_page
+from page_manager import PageManager
 
 load_dotenv()
 
 STUDENT_EMAIL = os.getenv("STUDENT_EMAIL")
 STUDENT_SECRET = os.getenv("STUDENT_SECRET")
+# "submit_url": "..." inside any inline script, JSON or JS object literal
+SUBMIT_URL_RE = re.compile(r'"submit_url"\s*:\s*"([^"]+)"')
 
-app = FastAPI(title="Async Quiz Solver API")
+@asynccontextmanager
+async def lifespan(app):
+    # Chromium is launched once here and shared by every /solve call
+    app.state.browser_pool = BrowserPool()
+    await app.state.browser_pool.start()
+    try:
+        yield
+    finally:
+        await app.state.browser_pool.stop()
+
+app = FastAPI(title="Async Quiz Solver API", lifespan=lifespan)
 
 # ------------------------
 # Request model
@@ -30,21 +44,21 @@ async def solve_quiz_logic(page):
     Fully async quiz-solving logic.
     Replace dummy logic with actual computation from the quiz page.
     """
-    await page.wait_for_load_state("networkidle")
-    content = await page.content()
+    task_info = await extract_page(page)
 
     # Extract submit_url if present
     submit_url = None
-    try:
-        scripts = await page.query_selector_all("script, pre")
-        for s in scripts:
-            txt = await s.inner_text()
-            if '"submit_url"' in txt:
-                data = json.loads(txt)
-                submit_url = data.get("submit_url")
+    for block in task_info["json_blocks"]:
+        if isinstance(block, dict) and block.get("submit_url"):
+            submit_url = block["submit_url"]
+            break
+    else:
+        # Not in a JSON block: pages may also set it in plain inline JS
+        for script in task_info["scripts"]:
+            match = SUBMIT_URL_RE.search(script["text"])
+            if match:
+                submit_url = match.group(1)
                 break
-    except Exception:
-        submit_url = None
 
     # Dummy answer computation (replace with real logic)
     answer = 12345
@@ -78,21 +92,26 @@ async def solve_quiz(payload: QuizRequest):
 
     # 2️⃣ Visit the quiz page
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            await page.goto(payload.url, wait_until="networkidle")
-
-            # Solve first quiz
-            answer, next_url = await solve_quiz_logic(page)
-
-            # Follow next quizzes until 3-minute deadline
-            start_time = time.time()
-            while next_url and time.time() - start_time < 180:
-                await page.goto(next_url, wait_until="networkidle")
+        async with app.state.browser_pool.context() as context:
+            # One page for the whole chain, reset between quizzes instead of reopened
+            pages = PageManager(context)
+            try:
+                page = await pages.acquire()
+                await render_page(page, payload.url)
+
+                # Solve first quiz
                 answer, next_url = await solve_quiz_logic(page)
 
-            await browser.close()
+                # Follow next quizzes until 3-minute deadline
+                start_time = time.time()
+                while next_url and time.time() - start_time < 180:
+                    await pages.release(page)
+                    page = await pages.acquire()
+                    await render_page(page, next_url)
+                    answer, next_url = await solve_quiz_logic(page)
+            finally:
+                await pages.aclose()
+            print(f"📄 Chain pages: {pages.stats()}")
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Quiz solving failed: {str(e)}")
@@ -104,3 +123,10 @@ async def solve_quiz(payload: QuizRequest):
         "url": payload.url,
         "answer": answer
     }
+
+if __name__ == "__main__":
+    import uvicorn
+    # /solve here holds the connection for the whole chain, so workers share nothing;
+    # SERVER_WORKERS processes each get their own browser pool
+    uvicorn.run("receive_requests:app", host=os.getenv("HOST", "127.0.0.1"),
+                port=int(os.getenv("PORT", "8000")), workers=int(os.getenv("SERVER_WORKERS", "1")))
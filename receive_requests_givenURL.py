@@ -1,27 +1,75 @@
 # receive_requests.py - FULL SOLVER
 import os
-import time
 import asyncio
-import json
-import re
-import base64
-from io import BytesIO
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from playwright.async_api import async_playwright
 from dotenv import load_dotenv
-import aiohttp
-import pandas as pd
-import PyPDF2
+from browser_pool import BrowserPool
+from route_profile import RouteProfile
+from http_client import HttpClient, collect_timings
+from jobs import JobManager, QueueFull
+from fetcher import fetch_page, render_page, extract_page
+import cpu_executor
+from download_cache import DownloadCache
+from answer_log import AnswerLog, content_hash
+from strategies import race
+from solvers import QuizContext, strategies_for, load_plugins
+from classifier import classify
+from analytics import coerce_answer
+from deadline import ChainDeadline
+from pipeline import ChainPipeline
+from metrics import (REGISTRY, ANSWERS, SOLVER_WINS, STEP_SECONDS, span, collect_spans,
+                     render as render_metrics)
 
 load_dotenv()
 
 STUDENT_EMAIL = os.getenv("STUDENT_EMAIL")
 STUDENT_SECRET = os.getenv("STUDENT_SECRET")
-SUBMIT_URL = "https://tds-llm-analysis.s-anand.net/submit"
+SUBMIT_URL = os.getenv("SUBMIT_URL", "https://tds-llm-analysis.s-anand.net/submit")
 
-app = FastAPI(title="Full Quiz Solver")
+@asynccontextmanager
+async def lifespan(app):
+    """Start the shared browser pool, HTTP client and job workers once instead of per /solve call"""
+    load_plugins()
+    cpu_executor.start()
+    app.state.browser_pool = BrowserPool()
+    app.state.route_profile = RouteProfile()
+    app.state.http_client = HttpClient()
+    app.state.download_cache = DownloadCache()
+    app.state.answer_log = AnswerLog()
+    app.state.job_manager = JobManager(run_quiz_chain)
+    await app.state.http_client.start()
+    await app.state.browser_pool.start()
+    await app.state.job_manager.start()
+    try:
+        yield
+    finally:
+        await app.state.job_manager.stop()
+        await app.state.browser_pool.stop()
+        await app.state.http_client.close()
+        app.state.answer_log.close()
+        cpu_executor.shutdown()
+
+app = FastAPI(title="Full Quiz Solver", lifespan=lifespan)
+
+REGISTRY.gauge("quiz_jobs", "Quiz chain jobs by state",
+               lambda: {(("state", k),): v for k, v in app.state.job_manager.stats().items() if k in ("queued", "running")})
+REGISTRY.gauge("browser_active_contexts", "Browser contexts currently lent out",
+               lambda: app.state.browser_pool.stats()["active_contexts"])
+REGISTRY.gauge("browser_asset_cache_bytes", "Static asset bytes held for the browser route handler",
+               lambda: app.state.route_profile.cache.stats()["bytes"])
+REGISTRY.gauge("http_connections", "HTTP connections opened vs. reused",
+               lambda: {(("kind", "created"),): app.state.http_client.connections_created,
+                        (("kind", "reused"),): app.state.http_client.connections_reused})
+REGISTRY.gauge("download_cache_lookups", "Download cache lookups by outcome",
+               lambda: {(("outcome", "hit"),): app.state.download_cache.hits,
+                        (("outcome", "miss"),): app.state.download_cache.misses})
+REGISTRY.gauge("answer_replays", "Answer log lookups: replayed, solved afresh, replay rejected",
+               lambda: {(("outcome", "hit"),): app.state.answer_log.hits,
+                        (("outcome", "miss"),): app.state.answer_log.misses,
+                        (("outcome", "rejected"),): app.state.answer_log.rejected})
 
 class QuizRequest(BaseModel):
     email: str
@@ -29,244 +77,119 @@ class QuizRequest(BaseModel):
     url: str
 
 async def parse_task_instructions(page):
-    """Extract task instructions from quiz page"""
+    """Extract task instructions from quiz page in one page.evaluate round trip"""
     try:
-        # Get all text content
-        body_text = await page.evaluate("document.body.innerText")
-        
-        # Get HTML for more detailed parsing
-        html_content = await page.content()
-        
-        # Look for common instruction patterns
-        task_info = {
-            "full_text": body_text,
-            "html": html_content,
-            "links": [],
-            "forms": [],
-            "tables": [],
-            "images": []
-        }
-        
-        # Extract all links
-        links = await page.query_selector_all("a[href]")
-        for link in links:
-            href = await link.get_attribute("href")
-            text = await link.inner_text()
-            task_info["links"].append({"url": href, "text": text})
-        
-        # Extract table data
-        tables = await page.query_selector_all("table")
-        if tables:
-            for table in tables:
-                table_html = await table.inner_html()
-                task_info["tables"].append(table_html)
-        
-        return task_info
+        return await extract_page(page)
     except Exception as e:
         print(f"Error parsing instructions: {e}")
         return {}
 
-async def solve_csv_task(csv_url, page, instructions):
-    """Solve tasks involving CSV files"""
-    try:
-        print(f"📊 Downloading CSV: {csv_url}")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(csv_url) as resp:
-                csv_content = await resp.text()
-        
-        df = pd.read_csv(StringIO(csv_content))
-        
-        # Check what operation is requested
-        instructions_lower = instructions.lower()
-        
-        if "sum" in instructions_lower:
-            # Find numeric column and sum
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                col = numeric_cols[0]
-                answer = df[col].sum()
-                return int(answer) if answer == int(answer) else float(answer)
-        
-        elif "count" in instructions_lower:
-            return len(df)
-        
-        elif "mean" in instructions_lower or "average" in instructions_lower:
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                col = numeric_cols[0]
-                answer = df[col].mean()
-                return float(answer)
-        
-        elif "max" in instructions_lower:
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                col = numeric_cols[0]
-                return int(df[col].max())
-        
-        elif "min" in instructions_lower:
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            if len(numeric_cols) > 0:
-                col = numeric_cols[0]
-                return int(df[col].min())
-        
-        return None
-    except Exception as e:
-        print(f"CSV solve error: {e}")
-        return None
-
-async def solve_pdf_task(pdf_url, page, instructions):
-    """Solve tasks involving PDF files"""
-    try:
-        print(f"📄 Downloading PDF: {pdf_url}")
-        async with aiohttp.ClientSession() as session:
-            async with session.get(pdf_url) as resp:
-                pdf_data = await resp.read()
-        
-        pdf_reader = PyPDF2.PdfReader(BytesIO(pdf_data))
-        text = ""
-        for page_obj in pdf_reader.pages:
-            text += page_obj.extract_text()
-        
-        instructions_lower = instructions.lower()
-        
-        # Look for numbers in PDF
-        if "sum" in instructions_lower:
-            numbers = [float(n) for n in re.findall(r'\d+\.?\d*', text)]
-            if numbers:
-                return int(sum(numbers)) if sum(numbers) == int(sum(numbers)) else sum(numbers)
-        
-        # Look for specific keywords
-        if "total" in instructions_lower or "count" in instructions_lower:
-            numbers = [int(n) for n in re.findall(r'\d+', text)]
-            if numbers:
-                return numbers[-1]  # Usually the last number
-        
-        return None
-    except Exception as e:
-        print(f"PDF solve error: {e}")
-        return None
-
-async def solve_api_task(page, instructions):
-    """Solve tasks involving API calls"""
-    try:
-        # Look for API endpoints and headers in page
-        if "api" in instructions.lower() or "endpoint" in instructions.lower():
-            # Extract potential API URLs from instructions
-            api_urls = re.findall(r'https?://[^\s<>"{}|\\^`\[\]]*', instructions)
-            
-            for api_url in api_urls:
-                if "api" in api_url.lower():
-                    print(f"🔗 Calling API: {api_url}")
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(api_url) as resp:
-                            data = await resp.json()
-                            # Try to extract numeric answer
-                            if isinstance(data, dict):
-                                for key in ['answer', 'result', 'value', 'total']:
-                                    if key in data:
-                                        return data[key]
-                            elif isinstance(data, list) and len(data) > 0:
-                                return len(data)
-        
-        return None
-    except Exception as e:
-        print(f"API solve error: {e}")
-        return None
+def build_strategies(page, task_info):
+    """Every registered solver whose task signature matches this page, with how far its answers are trusted"""
+    return strategies_for(QuizContext(page, task_info, app.state.http_client, app.state.download_cache))
 
-async def solve_text_task(page, instructions):
-    """Solve tasks requiring text parsing"""
+async def load_task_info(page_url, new_page):
+    """
+    Fetch the quiz page over plain HTTP and parse it in-process; only pages
+    that need JS execution are rendered in a page from new_page().
+    Returns (task_info, page) where page is None on the fast path.
+    """
     try:
-        body_text = await page.evaluate("document.body.innerText")
-        
-        # Look for explicit answer format
-        if "answer" in body_text.lower():
-            # Try to extract answer after "answer:" or "answer is"
-            match = re.search(r'answer[:\s]+([^\n]+)', body_text, re.IGNORECASE)
-            if match:
-                answer_text = match.group(1).strip()
-                # Try to convert to number if possible
-                try:
-                    return int(answer_text)
-                except:
-                    try:
-                        return float(answer_text)
-                    except:
-                        return answer_text
-        
-        # Look for numbers in specific context
-        numbers = re.findall(r'\b\d+\b', body_text)
-        if numbers:
-            return int(numbers[-1])
-        
-        return None
+        with span("fetch"):
+            task_info, needs_render = await fetch_page(app.state.http_client, page_url)
+        if not needs_render:
+            print(f"⚡ Parsed without browser")
+            return task_info, None
+        html = task_info["html"]
     except Exception as e:
-        print(f"Text solve error: {e}")
-        return None
+        print(f"HTTP fetch failed, rendering instead: {e}")
+        html = None
+    
+    print(f"🌐 Rendering in browser")
+    # On failure or cancellation (step budget used up) the pipeline takes the page back
+    page = await new_page()
+    with span("render"):
+        await render_page(page, page_url, html=html)
+    with span("extract"):
+        task_info = await parse_task_instructions(page)
+    return task_info, page
 
-async def solve_quiz_logic(page, page_url):
+async def solve_quiz_logic(pipeline, page_url, step, job, replay=True):
     """
-    Main quiz-solving logic that handles various task types
+    Main quiz-solving logic that handles various task types.
+    Everything before the submit runs inside the step's time budget; when
+    it runs out, the best answer found so far is submitted instead.
+    A page unchanged since a correct submit gets that answer straight away.
     """
-    print(f"\n🎯 Solving quiz: {page_url}")
+    print(f"\n🎯 Solving quiz: {page_url} (budget {step.seconds:.1f}s)")
     
-    await page.wait_for_load_state("networkidle")
-    await asyncio.sleep(2)  # Wait for JS rendering
+    best = []
+    page = None
+    sha = None
+    try:
+        # CPU pool work shares the step budget: queued parses are dropped, running ones stop early
+        with cpu_executor.deadline(step.remaining()):
+            async with asyncio.timeout(step.remaining()):
+                with span("load"):
+                    task_info, page = await pipeline.load_page(page_url)
+                sha = content_hash(task_info)
+                answer = app.state.answer_log.lookup(page_url, sha, job.email) if replay else None
+                if answer is not None:
+                    solver = "replay"
+                    print(f"♻️ Page unchanged since a correct submit, replaying: {answer!r}")
+                    SOLVER_WINS.inc(solver=solver)
+                else:
+                    answer, solver = await pick_answer(page, task_info, step, best)
+    except TimeoutError:
+        print(f"⏱️ Step budget used up")
+        answer = coerce_answer(best[0].answer) if best else "0"
+        solver = f"{best[0].name}_timeout" if best else "fallback"
+        SOLVER_WINS.inc(solver=solver)
+    finally:
+        # Closing the page overlaps with the submit instead of delaying it
+        pipeline.close_later(page)
     
-    # Parse task instructions
-    task_info = await parse_task_instructions(page)
+    is_correct, next_url, answer, reason = await submit_answer(page_url, answer, step)
+    # Every submit is kept with its verdict: the audit trail, and what the next run replays
+    app.state.answer_log.record(page_url, sha, answer, is_correct, reason, solver, job.email, job.id)
+    if solver == "replay" and not is_correct and step.remaining() > 0:
+        print(f"♻️ Replayed answer rejected ({reason}), solving the page again")
+        return await solve_quiz_logic(pipeline, page_url, step, job, replay=False)
+    if next_url:
+        # Start loading the next quiz while this step's result is being recorded
+        pipeline.prefetch(next_url)
+    return is_correct, next_url, answer, reason
+
+async def pick_answer(page, task_info, step, best):
+    """
+    Race the solvers for a parsed quiz page; `best` always holds the best candidate so far.
+    Returns (answer, name of the solver that produced it).
+    """
     instructions = task_info.get("full_text", "")
     
     print(f"📝 Instructions: {instructions[:200]}...")
     
-    answer = None
-    
-    # 1️⃣ Check for CSV files
-    csv_links = [l for l in task_info["links"] if ".csv" in l["url"].lower()]
-    if csv_links:
-        csv_url = csv_links[0]["url"]
-        answer = await solve_csv_task(csv_url, page, instructions)
-        if answer:
-            print(f"✅ CSV answer: {answer}")
-    
-    # 2️⃣ Check for PDF files
-    if not answer:
-        pdf_links = [l for l in task_info["links"] if ".pdf" in l["url"].lower()]
-        if pdf_links:
-            pdf_url = pdf_links[0]["url"]
-            answer = await solve_pdf_task(pdf_url, page, instructions)
-            if answer:
-                print(f"✅ PDF answer: {answer}")
-    
-    # 3️⃣ Check for API tasks
-    if not answer:
-        answer = await solve_api_task(page, instructions)
-        if answer:
-            print(f"✅ API answer: {answer}")
+    def keep_best(candidate):
+        if not best or candidate.confidence > best[0].confidence:
+            best[:] = [candidate]
     
-    # 4️⃣ Fall back to text parsing
-    if not answer:
-        answer = await solve_text_task(page, instructions)
-        if answer:
-            print(f"✅ Text answer: {answer}")
+    # Run every applicable solver at once; the most confident answer wins
+    winner = await race(build_strategies(page, task_info), timeout=step.remaining(), on_candidate=keep_best)
     
-    # 5️⃣ If still no answer, try evaluating any form or interactive element
-    if not answer:
-        try:
-            el = await page.query_selector("#answer")
-            if el:
-                text = await el.inner_text()
-                try:
-                    answer = int(text.strip())
-                except:
-                    answer = text.strip()
-        except:
-            pass
-    
-    if not answer:
+    if winner is None:
         answer = "0"  # Fallback
         print(f"⚠️ No answer found, using fallback: {answer}")
-    
-    # Submit answer
+    else:
+        # Typed as the question asks (int vs. float vs. string vs. JSON) before it is submitted
+        task = classify(instructions)
+        answer = coerce_answer(winner.answer, task.answer_type, task.decimals)
+        print(f"✅ {winner.name} answer: {answer!r}")
+    solver = winner.name if winner else "fallback"
+    SOLVER_WINS.inc(solver=solver)
+    return answer, solver
+
+async def submit_answer(page_url, answer, step):
+    """POST the answer; returns (is_correct, next_url, answer, reason)"""
     print(f"📤 Submitting answer: {answer}")
     submission_payload = {
         "email": STUDENT_EMAIL,
@@ -275,100 +198,158 @@ async def solve_quiz_logic(page, page_url):
         "answer": answer
     }
     
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            SUBMIT_URL,
-            json=submission_payload,
-            headers={"Content-Type": "application/json"}
-        ) as resp:
-            try:
-                res_json = await resp.json()
-                print(f"📥 Server response: {res_json}")
-                next_url = res_json.get("url")
-                is_correct = res_json.get("correct", False)
-                reason = res_json.get("reason", "")
-                return is_correct, next_url, answer, reason
-            except Exception as e:
-                print(f"Error parsing response: {e}")
-                return False, None, answer, str(e)
+    try:
+        with span("submit"):
+            async with asyncio.timeout(step.submit_timeout()):
+                res_json = await app.state.http_client.post_json(SUBMIT_URL, submission_payload)
+        print(f"📥 Server response: {res_json}")
+        next_url = res_json.get("url")
+        is_correct = res_json.get("correct", False)
+        reason = res_json.get("reason", "")
+        return is_correct, next_url, answer, reason
+    except TimeoutError:
+        print(f"⏱️ Submit timed out")
+        return False, None, answer, "submit timed out"
+    except Exception as e:
+        print(f"Error parsing response: {e}")
+        return False, None, answer, str(e)
 
-@app.post("/solve")
-async def solve_quiz(payload: QuizRequest):
-    """Main endpoint to solve quiz chain"""
-    
-    # Validate credentials
-    if payload.email != STUDENT_EMAIL or payload.secret != STUDENT_SECRET:
-        raise HTTPException(status_code=403, detail="Invalid credentials")
-    
+async def run_quiz_chain(job):
+    """Walk the quiz chain for a job, publishing each result as it is produced"""
     print(f"\n{'='*60}")
-    print(f"🚀 Starting quiz chain from: {payload.url}")
+    print(f"🚀 Starting quiz chain from: {job.url}")
     print(f"{'='*60}")
     
-    current_url = payload.url
-    start_time = time.time()
+    current_url = job.url
+    deadline = ChainDeadline()  # 3 minutes
     quiz_count = 0
-    results = []
+    stage_totals = {}
+    step_times = []
     
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            
-            while current_url and (time.time() - start_time) < 180:  # 3 minutes
+    route_profile = app.state.route_profile
+    async with app.state.browser_pool.context(**route_profile.context_options()) as context:
+        # Blocked/cached request counts for this chain's context, reported per quiz
+        routes = await route_profile.apply(context)
+        pipeline = ChainPipeline(context, load_task_info, app.state.download_cache, app.state.http_client)
+        try:
+            while current_url and not deadline.expired():
                 quiz_count += 1
-                elapsed = time.time() - start_time
                 
-                print(f"\n⏱️ Elapsed: {elapsed:.1f}s | Quiz #{quiz_count}")
+                print(f"\n⏱️ Elapsed: {deadline.elapsed():.1f}s | Quiz #{quiz_count}")
                 
-                page = await browser.new_page()
+                step = deadline.step()
+                before = routes.snapshot()
+                with collect_timings() as http_timings, collect_spans() as spans:
+                    is_correct, next_url, answer, reason = await solve_quiz_logic(pipeline, current_url, step, job)
+                step_time = step.finish()
+                STEP_SECONDS.observe(step_time)
+                step_times.append(round(step_time, 4))
+                for record in spans:
+                    name = f"{record['stage']}_{record['solver']}" if "solver" in record else record["stage"]
+                    stage_totals[name] = round(stage_totals.get(name, 0) + record["elapsed"], 4)
+                ANSWERS.inc(result="correct" if is_correct else "incorrect")
                 
-                try:
-                    is_correct, next_url, answer, reason = await solve_quiz_logic(page, current_url)
-                    
-                    results.append({
-                        "quiz": quiz_count,
-                        "url": current_url,
-                        "answer": answer,
-                        "correct": is_correct,
-                        "reason": reason
-                    })
-                    
-                    if is_correct:
-                        print(f"✅ Correct!")
-                        if next_url:
-                            print(f"→ Next: {next_url}")
-                            current_url = next_url
-                        else:
-                            print(f"🎉 Quiz chain complete!")
-                            current_url = None
-                    else:
-                        print(f"❌ Incorrect: {reason}")
-                        if next_url:
-                            print(f"→ Trying next: {next_url}")
-                            current_url = next_url
-                        else:
-                            print(f"No next URL provided")
-                            current_url = None
+                job.add_result({
+                    "quiz": quiz_count,
+                    "url": current_url,
+                    "answer": answer,
+                    "correct": is_correct,
+                    "reason": reason,
+                    "step_time": step_time,
+                    "timings": spans,
+                    "http": http_timings,
+                    "routing": routes.since(before)
+                })
                 
-                finally:
-                    await page.close()
-            
-            await browser.close()
-    
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+                if is_correct:
+                    print(f"✅ Correct!")
+                    if next_url:
+                        print(f"→ Next: {next_url}")
+                        current_url = next_url
+                    else:
+                        print(f"🎉 Quiz chain complete!")
+                        current_url = None
+                else:
+                    print(f"❌ Incorrect: {reason}")
+                    if next_url:
+                        print(f"→ Trying next: {next_url}")
+                        current_url = next_url
+                    else:
+                        print(f"No next URL provided")
+                        current_url = None
+        finally:
+            await pipeline.aclose()
     
     print(f"\n{'='*60}")
-    print(f"✅ Completed {quiz_count} quizzes in {time.time() - start_time:.1f}s")
+    print(f"✅ Completed {quiz_count} quizzes in {deadline.elapsed():.1f}s")
     print(f"{'='*60}\n")
     
     return {
-        "email": payload.email,
+        "email": job.email,
         "quizzes_solved": quiz_count,
-        "results": results,
-        "total_time": time.time() - start_time
+        "total_time": deadline.elapsed(),
+        "timings": stage_totals,
+        "routing": routes.snapshot(),
+        "step_times": step_times,
+        # Page reuse and the JS heap measured after each quiz's reset
+        "pages": pipeline.pages.stats()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage/step/chain latency histograms and answer counters"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def get_job_or_404(job_id):
+    job = app.state.job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+@app.post("/solve", status_code=202)
+async def solve_quiz(payload: QuizRequest):
+    """Queue a quiz chain and return its job id right away"""
+    
+    # Validate credentials
+    if payload.email != STUDENT_EMAIL or payload.secret != STUDENT_SECRET:
+        raise HTTPException(status_code=403, detail="Invalid credentials")
+    
+    try:
+        job = app.state.job_manager.submit(payload.url, payload.email)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Too busy: {e}",
+                            headers={"Retry-After": str(e.retry_after)})
+    print(f"📥 Queued job {job['job_id']} for {payload.url}")
+    
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Current status and results of a quiz chain job"""
+    return get_job_or_404(job_id)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Server-Sent Events stream of a job's results as they are produced"""
+    get_job_or_404(job_id)
+    return StreamingResponse(
+        app.state.job_manager.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
+    # SERVER_WORKERS > 1 starts one process per worker, each with its own browser pool,
+    # all pulling chains from the job store (a shared SQLite file unless JOB_STORE says otherwise)
+    # and sharing one download cache, whose SQLite index keeps their writes and evictions apart
+    workers = int(os.getenv("SERVER_WORKERS", "1"))
+    if workers > 1 and os.getenv("JOB_STORE", "memory") == "memory":
+        os.environ["JOB_STORE"] = "sqlite:///.cache/jobs.db"
+    uvicorn.run("receive_requests_givenURL:app", host=os.getenv("HOST", "127.0.0.1"),
+                port=int(os.getenv("PORT", "8000")), workers=workers)
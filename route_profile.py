@@ -0,0 +1,207 @@
+# route_profile.py - context-level request routing: block what quizzes don't need, cache static assets
+import os
+import re
+import time
+import logging
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from metrics import REGISTRY
+
+ROUTE_PROFILE = os.getenv("ROUTE_PROFILE", "light")  # off | light | strict
+# Comma-separated overrides; empty keeps the profile's defaults
+ROUTE_BLOCK_TYPES = os.getenv("ROUTE_BLOCK_TYPES", "")
+ROUTE_BLOCK_HOSTS = os.getenv("ROUTE_BLOCK_HOSTS", "")  # added to TRACKER_HOSTS
+ROUTE_CACHE_BYTES = int(os.getenv("ROUTE_CACHE_BYTES", str(32 << 20)))
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", "300"))
+
+# Playwright resource types: aborted (blocked) or answered from the asset cache (cached).
+# "light" keeps stylesheets because they decide what innerText shows.
+PROFILES = {
+    "off": {"block": (), "cache": ()},
+    "light": {"block": ("image", "media", "font"), "cache": ("script", "stylesheet")},
+    "strict": {"block": ("image", "media", "font", "stylesheet", "texttrack", "eventsource", "websocket",
+                         "manifest", "other"),
+               "cache": ("script",)},
+}
+
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "connect.facebook.net", "hotjar.com", "segment.io", "segment.com", "mixpanel.com",
+    "plausible.io", "clarity.ms", "newrelic.com", "nr-data.net", "sentry.io", "fullstory.com",
+    "amplitude.com", "intercom.io", "cloudflareinsights.com",
+)
+
+ROUTED_REQUESTS = REGISTRY.counter("browser_requests_total", "Browser requests by routing outcome")
+ROUTE_BYTES_SAVED = REGISTRY.counter("browser_bytes_saved_total", "Response bytes served from the asset cache")
+MAX_AGE_RE = re.compile(r"\b(?:s-)?max-age\s*=\s*(\d+)")
+
+log = logging.getLogger(__name__)
+
+
+class RouteStats:
+    """Request counts for one browser context; snapshot() and since() give per-quiz deltas"""
+
+    FIELDS = ("requests", "blocked", "trackers", "cached", "passed", "bytes_saved", "bytes_fetched")
+
+    def __init__(self):
+        for name in self.FIELDS:
+            setattr(self, name, 0)
+
+    def snapshot(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def since(self, before):
+        return {name: getattr(self, name) - before.get(name, 0) for name in self.FIELDS}
+
+
+class AssetCache:
+    """URL -> (expires, status, headers, body) for static responses, LRU-bounded by body bytes"""
+
+    def __init__(self, max_bytes=ROUTE_CACHE_BYTES, ttl=ROUTE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(url)
+            return None
+        self._entries.move_to_end(url)
+        return entry
+
+    def put(self, url, status, headers, body, ttl=None):
+        if len(body) > self.max_bytes // 4:
+            return
+        self._drop(url)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[url] = (time.monotonic() + ttl, status, headers, body)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._size -= len(entry[3])
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._size}
+
+
+class RouteProfile:
+    """
+    One `context.route` handler per browser context: aborts the blocked
+    resource types and tracker hosts, serves repeated scripts/stylesheets
+    from a process-wide AssetCache, and lets everything else through.
+    Navigations are never blocked.
+    """
+
+    def __init__(self, name=ROUTE_PROFILE, block_types=ROUTE_BLOCK_TYPES, block_hosts=ROUTE_BLOCK_HOSTS,
+                 cache=None):
+        if name not in PROFILES:
+            raise ValueError(f"Unknown route profile {name!r}; expected one of {', '.join(PROFILES)}")
+        profile = PROFILES[name]
+        self.name = name
+        self.block_types = set(_split(block_types) or profile["block"])
+        self.cache_types = set(profile["cache"]) - self.block_types
+        self.block_hosts = tuple(TRACKER_HOSTS + tuple(_split(block_hosts))) if name != "off" else ()
+        self.cache = cache if cache is not None else AssetCache()
+
+    @property
+    def enabled(self):
+        return self.name != "off"
+
+    def context_options(self):
+        """new_context() options: service workers would fetch around the route handler"""
+        return {"service_workers": "block"} if self.enabled else {}
+
+    async def apply(self, context):
+        """Install the handler on a context; returns the RouteStats it fills"""
+        stats = RouteStats()
+        if self.enabled:
+            await context.route("**/*", lambda route: self._handle(route, stats))
+        return stats
+
+    async def _handle(self, route, stats):
+        request = route.request
+        stats.requests += 1
+        try:
+            if _host_matches(urlsplit(request.url).hostname or "", self.block_hosts):
+                stats.trackers += 1
+                ROUTED_REQUESTS.inc(outcome="tracker")
+                await route.abort("blockedbyclient")
+                return
+            kind = request.resource_type
+            if kind in self.block_types and not request.is_navigation_request():
+                stats.blocked += 1
+                ROUTED_REQUESTS.inc(outcome="blocked")
+                await route.abort("blockedbyclient")
+                return
+            if kind in self.cache_types and request.method == "GET":
+                await self._serve_cached(route, request, stats)
+                return
+            stats.passed += 1
+            ROUTED_REQUESTS.inc(outcome="passed")
+            await route.continue_()
+        except Exception as e:
+            # Usually the page closed mid-request. An unresolved route would stall the render
+            # wait until the step deadline, so hand the request on, or failing that abort it
+            log.warning("Route handler error for %s: %s", request.url[:80], e)
+            ROUTED_REQUESTS.inc(outcome="error")
+            await _resolve(route)
+
+    async def _serve_cached(self, route, request, stats):
+        entry = self.cache.get(request.url)
+        if entry is not None:
+            _, status, headers, body = entry
+            stats.cached += 1
+            stats.bytes_saved += len(body)
+            ROUTED_REQUESTS.inc(outcome="cached")
+            ROUTE_BYTES_SAVED.inc(len(body))
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        response = await route.fetch()
+        body = await response.body()
+        stats.passed += 1
+        stats.bytes_fetched += len(body)
+        ROUTED_REQUESTS.inc(outcome="passed")
+        ttl = _cache_ttl(response.headers)
+        if response.status == 200 and ttl:
+            self.cache.put(request.url, response.status, response.headers, body, ttl)
+        await route.fulfill(response=response, body=body)
+
+
+def _split(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _host_matches(host, hosts):
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+def _cache_ttl(headers):
+    """
+    Seconds a response may be reused across chains: only what the server
+    marks cacheable (max-age, immutable). No Cache-Control means no reuse.
+    """
+    control = headers.get("cache-control", "").lower()
+    if any(word in control for word in ("no-store", "no-cache", "private")):
+        return 0
+    if "immutable" in control:
+        return ROUTE_CACHE_TTL
+    age = MAX_AGE_RE.search(control)
+    return int(age.group(1)) if age else 0
+
+
+async def _resolve(route):
+    """Continue a route the handler failed on, else abort it; never raises"""
+    for settle in (route.continue_, route.abort):
+        try:
+            await settle()
+            return
+        except Exception as e:
+            log.debug("Could not settle route: %s", e)
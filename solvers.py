@@ -0,0 +1,200 @@
+# solvers.py - solver plugins: each registers itself with the task signatures it handles
+#
+# A plugin module only needs:
+#
+#   from solvers import solver
+#
+#   @solver("xml", confidence=0.8, handles={"link:xml"})
+#   async def solve_xml(ctx):
+#       ...return an answer, or None when it has nothing
+#
+# and to be listed in SOLVER_PLUGINS (comma-separated module names).
+import os
+import re
+import importlib
+import cpu_executor
+from classifier import classify
+from strategies import Strategy, Hedged
+from csv_engine import solve_csv
+from pdf_engine import solve_pdf
+from analytics import solve_analytics
+from media_engine import media_sources, solve_media
+from api_engine import solve_api
+
+SOLVER_PLUGINS = os.getenv("SOLVER_PLUGINS", "")
+# Confidence of a table answer whose plan left a condition of the question unparsed
+PARTIAL_PLAN_CONFIDENCE = float(os.getenv("PARTIAL_PLAN_CONFIDENCE", "0.5"))
+
+LINK_RE = re.compile(r"\.(csv|pdf|json|xlsx|txt|png|jpe?g|gif|webp|wav|mp3|ogg|opus|m4a)(?![a-z0-9])")
+
+
+class QuizContext:
+    """One quiz page as the solvers see it: parsed page, classified text, shared services"""
+
+    def __init__(self, page, task_info, http_client, cache):
+        self.page = page
+        self.task_info = task_info
+        self.http_client = http_client
+        self.cache = cache
+        self.instructions = task_info.get("full_text", "")
+        self.task = classify(self.instructions)
+        self.links = {}
+        for link in task_info.get("links", []):
+            match = LINK_RE.search(link["url"].lower())
+            if match:
+                self.links.setdefault(match.group(1), []).append(link["url"])
+        # (kind, URL or data: URI) of every image/audio attachment
+        self.media = media_sources(task_info)
+        # Signature of this quiz: text tags plus link:<ext>, element:<id> and media:<kind> tags
+        self.tags = set(self.task.tags)
+        self.tags.update(f"link:{kind}" for kind in self.links)
+        self.tags.update(f"element:{name}" for name in task_info.get("ids", {}))
+        self.tags.update(f"media:{kind}" for kind, _ in self.media)
+
+    def link(self, kind):
+        urls = self.links.get(kind)
+        return urls[0] if urls else None
+
+
+class Solver:
+    def __init__(self, name, run, confidence, handles=None, when=None):
+        self.name = name
+        self.run = run
+        self.confidence = confidence
+        self.handles = set(handles) if handles else None  # any of these tags; None means every quiz
+        self.when = when
+
+    def applies(self, ctx):
+        if self.handles is not None and not (self.handles & ctx.tags):
+            return False
+        return self.when is None or bool(self.when(ctx))
+
+
+SOLVERS = {}
+
+
+def solver(name, confidence, handles=None, when=None):
+    """Register an `async def fn(ctx)` solver; a later registration under the same name replaces it"""
+    def register(fn):
+        SOLVERS[name] = Solver(name, fn, confidence, handles, when)
+        return fn
+    return register
+
+
+def strategies_for(ctx):
+    """A Strategy for every registered solver whose signature matches this quiz"""
+    return [Strategy(s.name, lambda s=s: s.run(ctx), s.confidence) for s in SOLVERS.values() if s.applies(ctx)]
+
+
+def load_plugins(names=SOLVER_PLUGINS):
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        importlib.import_module(name)
+        print(f"🧩 Loaded solver plugin {name}")
+
+
+def hedge(answer, plan):
+    """A table answer, trusted less when its plan ignored a where/for/with condition"""
+    if answer is not None and plan and plan.get("unparsed"):
+        print(f"⚠️ Plan ignores {plan['unparsed']}; confidence {PARTIAL_PLAN_CONFIDENCE}")
+        return Hedged(answer, PARTIAL_PLAN_CONFIDENCE)
+    return answer
+
+
+def to_number(text):
+    """int, then float, else the stripped text"""
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+
+# ------------------------
+# Built-in solvers
+# ------------------------
+def needs_analytics(ctx):
+    """More than a running aggregate can answer: percentiles, pair statistics, text or several filters, a join"""
+    return not ctx.task.streamable or (ctx.task.has("op:join") and len(ctx.links["csv"]) > 1)
+
+
+@solver("csv", confidence=0.9, handles={"link:csv"}, when=lambda ctx: not needs_analytics(ctx))
+async def solve_csv_task(ctx):
+    """Solve tasks involving CSV files"""
+    url = ctx.link("csv")
+    print(f"📊 Streaming CSV: {url}")
+    return hedge(*await solve_csv(ctx.http_client, url, ctx.instructions, cache=ctx.cache))
+
+
+@solver("analytics", confidence=0.9, handles={"link:csv"}, when=needs_analytics)
+async def solve_analytics_task(ctx):
+    """Solve CSV tasks with the vectorized query engine, joining the files when asked to"""
+    urls = ctx.links["csv"] if ctx.task.has("op:join") else ctx.links["csv"][:1]
+    print(f"🧮 Loading {len(urls)} CSV file(s) for analytics")
+    return hedge(*await solve_analytics(ctx.http_client, urls, ctx.instructions, cache=ctx.cache))
+
+
+@solver("pdf", confidence=0.85, handles={"link:pdf"})
+async def solve_pdf_task(ctx):
+    """Solve tasks involving PDF files"""
+    url = ctx.link("pdf")
+    print(f"📄 Downloading PDF: {url}")
+    return await solve_pdf(ctx.http_client, url, ctx.instructions, cache=ctx.cache)
+
+
+@solver("image", confidence=0.8, handles={"media:image"},
+        when=lambda ctx: ctx.task.has("source:image", "ask:color", "ask:width", "ask:height", "ask:pixels",
+                                      "ask:brightness"))
+async def solve_image_task(ctx):
+    """Solve tasks about an image: colours, size, brightness, and text or numbers in it"""
+    sources = [m for m in ctx.media if m[0] == "image"]
+    print(f"🖼️ Analysing {len(sources)} image(s)")
+    return await solve_media(ctx.http_client, sources, ctx.task, cache=ctx.cache)
+
+
+@solver("audio", confidence=0.8, handles={"media:audio"},
+        when=lambda ctx: ctx.task.has("source:audio", "ask:duration", "ask:sample_rate", "ask:channels"))
+async def solve_audio_task(ctx):
+    """Solve tasks about an audio clip: duration, sample rate, channels"""
+    sources = [m for m in ctx.media if m[0] == "audio"]
+    print(f"🔊 Analysing {len(sources)} audio clip(s)")
+    return await solve_media(ctx.http_client, sources, ctx.task, cache=ctx.cache)
+
+
+@solver("api", confidence=0.85, handles={"source:api", "link:json"})
+async def solve_api_task(ctx):
+    """Solve tasks involving API calls: described headers and params, every page, selectors and aggregates"""
+    return await solve_api(ctx.http_client, ctx.task_info, ctx.instructions, ctx.task, cache=ctx.cache)
+
+
+@solver("answer_element", confidence=0.6, handles={"element:answer"})
+async def solve_answer_element(ctx):
+    """Read an #answer element if the page has one"""
+    text = ctx.task_info["ids"]["answer"]
+    return to_number(text) if text else None
+
+
+@solver("text", confidence=0.5)
+async def solve_text_task(ctx):
+    """Solve tasks that state the answer explicitly ("answer: ...")"""
+    if "answer" not in ctx.task.lower:
+        return None
+    return await cpu_executor.run(_explicit_answer, ctx.instructions, size=len(ctx.instructions))
+
+
+def _explicit_answer(text):
+    match = re.search(r'answer[:\s]+([^\n]+)', text, re.IGNORECASE)
+    return to_number(match.group(1)) if match else None
+
+
+@solver("number_guess", confidence=0.1)
+async def solve_number_guess(ctx):
+    """Last resort: the last number on the page"""
+    return await cpu_executor.run(_last_number, ctx.instructions, size=len(ctx.instructions))
+
+
+def _last_number(text):
+    numbers = re.findall(r'\b\d+\b', text)
+    return int(numbers[-1]) if numbers else None
@@ -0,0 +1,113 @@
+# strategies.py - run applicable solvers concurrently and keep the most confident answer
+import os
+import time
+import asyncio
+from metrics import span
+
+STRATEGY_TIMEOUT = float(os.getenv("STRATEGY_TIMEOUT", "60"))
+# An answer at or above this confidence wins immediately and cancels the rest
+STRATEGY_ACCEPT = float(os.getenv("STRATEGY_ACCEPT", "0.8"))
+
+
+class _NoAnswer:
+    """Marks 'this solver found nothing', so 0, False and "" stay valid answers"""
+
+    def __repr__(self):
+        return "NO_ANSWER"
+
+    def __bool__(self):
+        return False
+
+
+NO_ANSWER = _NoAnswer()
+
+
+class Hedged:
+    """An answer its solver trusts less than usual, e.g. from a plan that ignored part of the question"""
+
+    def __init__(self, answer, confidence):
+        self.answer = answer
+        self.confidence = confidence
+
+    def __repr__(self):
+        return f"Hedged({self.answer!r}, {self.confidence})"
+
+
+class Strategy:
+    """A solver coroutine factory plus how much its answers are trusted"""
+
+    def __init__(self, name, run, confidence):
+        self.name = name
+        self.run = run
+        self.confidence = confidence
+
+
+class Candidate:
+    def __init__(self, strategy, answer, elapsed):
+        self.name = strategy.name
+        self.answer = answer
+        self.confidence = strategy.confidence
+        if isinstance(answer, Hedged):
+            self.answer = answer.answer
+            self.confidence = min(strategy.confidence, answer.confidence)
+        self.elapsed = elapsed
+
+    def to_dict(self):
+        return {"solver": self.name, "answer": self.answer,
+                "confidence": self.confidence, "elapsed": round(self.elapsed, 4)}
+
+
+async def race(strategies, timeout=STRATEGY_TIMEOUT, accept=STRATEGY_ACCEPT, on_candidate=None):
+    """
+    Launch every strategy at once and return the best Candidate (or None).
+    Stops early when an answer reaches `accept`, or when nothing still
+    running could beat the best answer so far; losers are cancelled.
+    A solver returning None or NO_ANSWER has no answer; any other value,
+    including 0, counts, and Hedged(answer, confidence) lowers its trust.
+    on_candidate is called with each answer as it arrives, so callers can
+    keep a best-so-far.
+    """
+    if not strategies:
+        return None
+    start = time.perf_counter()
+    tasks = {asyncio.create_task(_run(s)): s for s in strategies}
+    best = None
+    deadline = asyncio.get_running_loop().time() + timeout
+    try:
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                print(f"⏱️ Strategy deadline hit with {len(pending)} solver(s) still running")
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                answer = task.result()
+                if answer is None or answer is NO_ANSWER or (isinstance(answer, Hedged) and answer.answer is None):
+                    continue
+                candidate = Candidate(tasks[task], answer, time.perf_counter() - start)
+                print(f"💡 {candidate.name} answered {candidate.answer!r} (confidence {candidate.confidence})")
+                if on_candidate:
+                    on_candidate(candidate)
+                if best is None or candidate.confidence > best.confidence:
+                    best = candidate
+            if best and (best.confidence >= accept or
+                         all(tasks[t].confidence <= best.confidence for t in pending)):
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return best
+
+
+async def _run(strategy):
+    try:
+        with span("solver", solver=strategy.name):
+            return await strategy.run()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"{strategy.name} solver error: {e}")
+        return NO_ANSWER
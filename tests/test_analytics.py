@@ -0,0 +1,74 @@
+# test_analytics.py - query plans compiled from question text, run over small frames
+import pandas as pd
+import pytest
+from analytics import compile_plan, run_query, coerce_answer
+
+SALES = pd.DataFrame({
+    "id": [1, 2, 3, 4],
+    "region": ["north", "south", "north", "east"],
+    "sales": [10, 30, 20, 5],
+    "units": [1, 4, 2, 1],
+})
+
+
+def answer(question, df=SALES):
+    return run_query([df], question)[0]
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("What is the total sales?", 65),
+    ("Considering the region column, what is the total sales?", 65),
+    ("What is the sum of sales where units > 1?", 50),
+    ("What is the mean of sales where region is \"north\"?", 15),
+    ("How many rows have sales above 8?", 3),
+    ("What is the median sales?", 15),
+    ("How many distinct region values are there?", 3),
+    ("What is the average sales for region north?", 15),
+    ("What is the total sales with region south and units > 1?", 30),
+])
+def test_aggregates(question, expected):
+    assert answer(question) == expected
+
+
+def test_named_numeric_column_beats_id():
+    plan = compile_plan("Considering the region column, what is the total sales?", SALES)
+    assert plan["column"] == "sales"
+
+
+def test_unnamed_target_skips_id():
+    df = SALES[["id", "region", "units"]]
+    assert compile_plan("What is the total?", df)["column"] == "units"
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("Which region has the highest total sales?", "north"),
+    ("Which region has the lowest average sales?", "east"),
+    ("Which region has the most records?", "north"),
+    ("Which region has the highest units?", "south"),
+])
+def test_which_group_ranks_first(question, expected):
+    assert answer(question) == expected
+
+
+def test_ranking_over_unknown_group_has_no_answer():
+    assert answer("Which city has the highest sales?") is None
+
+
+def test_group_by():
+    assert answer("What is the total sales by region?") == {"east": 5, "north": 30, "south": 30}
+
+
+def test_regression_predict():
+    df = pd.DataFrame({"hours": [1, 2, 3, 4], "score": [3, 5, 7, 9]})
+    assert answer("Using linear regression of score on hours, predict score for hours = 10", df) == pytest.approx(21)
+
+
+@pytest.mark.parametrize("value, answer_type, decimals, expected", [
+    ("42", "number", None, 42),
+    (3.14159, "number", 2, 3.14),
+    ("yes", "boolean", None, True),
+    ('{"a": 1}', "json", None, {"a": 1}),
+    (7.0, "string", None, "7"),
+])
+def test_coerce_answer(value, answer_type, decimals, expected):
+    assert coerce_answer(value, answer_type, decimals) == expected
@@ -0,0 +1,44 @@
+# test_answer_log.py - replaying verified answers by quiz URL, page content and user
+from answer_log import AnswerLog, content_hash
+
+PAGE = {"full_text": "What is 2 + 2?", "links": [], "tables": []}
+URL = "http://quiz/1"
+
+
+def test_replays_only_a_verified_answer(tmp_path):
+    log = AnswerLog(str(tmp_path / "answers.sqlite"))
+    sha = content_hash(PAGE)
+    assert log.lookup(URL, sha, "a@x") is None
+    log.record(URL, sha, 5, False, "wrong", "number_guess", "a@x", "job-1")
+    assert log.lookup(URL, sha, "a@x") is None
+    log.record(URL, sha, 4, True, "", "text", "a@x", "job-2")
+    assert log.lookup(URL, sha, "a@x") == 4
+    # A rejected replay stops further replays of that page
+    log.record(URL, sha, 4, False, "changed", "replay", "a@x", "job-3")
+    assert log.lookup(URL, sha, "a@x") is None
+    assert log.stats()["rejected"] == 1
+
+
+def test_never_replays_another_users_answer(tmp_path):
+    log = AnswerLog(str(tmp_path / "answers.sqlite"))
+    sha = content_hash(PAGE)
+    log.record(URL, sha, {"code": "a-123"}, True, "", "text", "a@x", "job-1")
+    assert log.lookup(URL, sha, "b@x") is None
+    assert log.lookup(URL, sha, "a@x") == {"code": "a-123"}
+
+
+def test_changed_page_is_solved_again(tmp_path):
+    log = AnswerLog(str(tmp_path / "answers.sqlite"))
+    log.record(URL, content_hash(PAGE), 4, True, "", "text", "a@x", "job-1")
+    changed = dict(PAGE, full_text="What is 3 + 3?")
+    assert content_hash(changed) != content_hash(PAGE)
+    assert log.lookup(URL, content_hash(changed), "a@x") is None
+
+
+def test_replay_off_still_logs(tmp_path):
+    log = AnswerLog(str(tmp_path / "answers.sqlite"), replay=False)
+    sha = content_hash(PAGE)
+    log.record(URL, sha, 4, True, "", "text", "a@x", "job-1")
+    assert log.lookup(URL, sha, "a@x") is None
+    assert [h["answer"] for h in log.history(URL)] == [4]
+    assert log.accuracy() == {"text": {"correct": 1, "total": 1}}
@@ -0,0 +1,109 @@
+# test_api_engine.py - which API calls go through the download cache, pagination, and JSONPath selection
+import json
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from api_engine import ApiRequest, fetch_json, fetch_all, select, _token
+
+
+class FakeDownload:
+    def __init__(self, body):
+        self.body = body
+        self.size = len(body)
+
+    async def chunks(self):
+        yield self.body
+
+
+class FakeCache:
+    def __init__(self, body):
+        self.body = body
+        self.urls = []
+
+    def download(self, http_client, url):
+        self.urls.append(url)
+        return FakeDownload(self.body)
+
+
+class NoNetwork:
+    def request(self, *args, **kwargs):
+        raise AssertionError("went to the network")
+
+
+class FakeResponse:
+    def __init__(self, body, next_url=None):
+        self.body = json.dumps(body).encode()
+        self.content_length = len(self.body)
+        self.links = {"next": {"url": next_url}} if next_url else {}
+        self.headers = {"Content-Type": "application/json"}
+
+    def raise_for_status(self):
+        pass
+
+    async def read(self):
+        return self.body
+
+
+class LinkPagedApi:
+    """Three pages of records, chained only through the Link header"""
+
+    def __init__(self):
+        self.urls = []
+
+    @asynccontextmanager
+    async def request(self, method, url, **kwargs):
+        self.urls.append(url)
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        yield FakeResponse([{"id": page}], f"http://quiz/api/items?page={page + 1}" if page < 3 else None)
+
+
+def test_static_json_file_uses_download_cache():
+    cache = FakeCache(json.dumps({"total": 7}).encode())
+    request = ApiRequest("http://quiz/data/totals.json", params={"v": 1})
+    data, _, size = asyncio.run(fetch_json(NoNetwork(), request, cache=cache))
+    assert data == {"total": 7} and size == len(cache.body)
+    assert cache.urls == ["http://quiz/data/totals.json?v=1"]
+
+
+def test_link_header_pagination_with_cache_enabled():
+    api, cache = LinkPagedApi(), FakeCache(b"[]")
+    pages, _ = asyncio.run(fetch_all(api, ApiRequest("http://quiz/api/items"), cache=cache))
+    assert pages == [[{"id": 1}], [{"id": 2}], [{"id": 3}]]
+    assert cache.urls == [] and len(api.urls) == 3
+
+
+@pytest.mark.parametrize("request_", [
+    ApiRequest("http://quiz/api/data"),
+    ApiRequest("http://quiz/data.json", headers={"Authorization": "Bearer x"}),
+    ApiRequest("http://quiz/data.json", method="POST", body={"q": 1}),
+])
+def test_endpoints_authenticated_or_posted_calls_skip_cache(request_):
+    cache = FakeCache(b"{}")
+    with pytest.raises(AssertionError, match="network"):
+        asyncio.run(fetch_json(NoNetwork(), request_, cache=cache))
+    assert cache.urls == []
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("$.items[*].price", [1.5, 2.5, 4.0]),
+    ("$..price", [1.5, 2.5, 4.0]),
+    ("$.items[?(@.qty > 2)].name", ["b", "c"]),
+    ("$.items[-1].name", ["c"]),
+    ("items.qty", [1, 3, 5]),
+])
+def test_select(path, expected):
+    data = {"items": [{"name": "a", "price": 1.5, "qty": 1}, {"name": "b", "price": 2.5, "qty": 3},
+                      {"name": "c", "price": 4.0, "qty": 5}]}
+    assert select(data, path) == expected
+
+
+@pytest.mark.parametrize("text, token", [
+    ("Call the API with token abc123XYZ789.", "abc123XYZ789"),
+    ("Your access token: secretvalue", "secretvalue"),
+    ("The bearer token is 'plaintoken'", "plaintoken"),
+    ("No token required for this endpoint.", None),
+    ("It works without a token provided by anyone.", None),
+    ("A token is required for this endpoint.", None),
+])
+def test_token(text, token):
+    assert _token(text) == token
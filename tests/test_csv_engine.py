@@ -0,0 +1,95 @@
+# test_csv_engine.py - question plans and the streaming CSV aggregator
+import asyncio
+import pytest
+from classifier import classify
+from csv_engine import aggregate_csv_stream
+from strategies import Strategy, Hedged, race
+from solvers import hedge
+
+COLUMNS = ["id", "region", "value", "units"]
+CSV = b"id,region,value,units\n" + b"".join(
+    f"{i},{'north' if i % 2 else 'south'},{i * 10},{i % 4}\n".encode() for i in range(1, 11))
+
+
+def stream(question, data=CSV, chunk=64):
+    async def chunks():
+        for start in range(0, len(data), chunk):
+            yield data[start:start + chunk]
+
+    answer, plan, _ = asyncio.run(aggregate_csv_stream(chunks(), question, chunk_bytes=chunk))
+    return answer, plan
+
+
+@pytest.mark.parametrize("question, filters", [
+    ("What is the sum of value where region is north?", [("region", "==", "north")]),
+    ("What is the sum of value where region = 'south'?", [("region", "==", "south")]),
+    ("What is the sum of value where value > 50?", [("value", ">", 50.0)]),
+    ("How many rows where region is north and units >= 2?", [("units", ">=", 2.0), ("region", "==", "north")]),
+    ("What is the sum of the value column?", []),
+    ("What is the average value for region north?", [("region", "==", "north")]),
+    ("What is the sum of value with units 3?", [("units", "==", 3.0)]),
+])
+def test_filters(question, filters):
+    plan = classify(question).plan(COLUMNS)
+    assert sorted(plan["filters"]) == sorted(filters)
+    assert plan["unparsed"] == []
+
+
+def test_unquoted_word_for_unknown_column_is_not_a_filter():
+    plan = classify("What is the sum of value where city is paris?").plan(COLUMNS)
+    assert plan["filters"] == []
+    assert plan["unparsed"] == ["where city is paris"]
+
+
+def test_bare_clause_naming_no_column_is_prose():
+    plan = classify("What is the sum of value for this quiz?").plan(COLUMNS)
+    assert plan["filters"] == [] and plan["unparsed"] == []
+
+
+def test_stream_hedges_bare_text_condition():
+    answer, plan = stream("What is the average value for region north?")
+    assert plan["unparsed"] == ["region == north"]
+    assert isinstance(hedge(answer, plan), Hedged)
+
+
+def test_text_filter_is_not_streamed():
+    assert classify("What is the sum of value where value > 50?").streamable
+    assert not classify("What is the sum of value where region is north?").streamable
+
+
+def test_prose_with_for_and_with_is_not_a_condition():
+    task = classify("Download the file for this quiz and post your answer with your email.")
+    assert task.clauses == []
+
+
+def test_stream_sum_with_numeric_filter():
+    assert stream("What is the sum of value where value > 50?")[0] == 400
+
+
+def test_stream_uses_named_numeric_column():
+    answer, plan = stream("Considering the region column, what is the total value?")
+    assert plan["column"] == "value" and answer == 550
+
+
+def test_stream_reports_filters_it_cannot_apply():
+    answer, plan = stream("What is the sum of value where region is north?")
+    assert plan["unparsed"] == ["region == north"]
+    hedged = hedge(answer, plan)
+    assert isinstance(hedged, Hedged) and hedged.confidence < 0.9
+
+
+def test_stream_grouped_mean():
+    answer, _ = stream("What is the mean value by region?")
+    assert answer == {"north": 50, "south": 60}
+
+
+def test_hedged_answer_loses_to_a_complete_plan():
+    async def partial():
+        return Hedged(550, 0.5)
+
+    async def complete():
+        await asyncio.sleep(0.01)
+        return 250
+
+    best = asyncio.run(race([Strategy("csv", partial, 0.9), Strategy("analytics", complete, 0.9)]))
+    assert (best.name, best.answer) == ("analytics", 250)
@@ -0,0 +1,44 @@
+# test_deadline.py - per-step budgets carved out of the chain budget
+import pytest
+from deadline import ChainDeadline, SUBMIT_RESERVE, STEP_MIN, STEP_SHARE, STEP_HEADROOM
+
+
+def chain(budget=180.0, elapsed=0.0, latencies=()):
+    deadline = ChainDeadline(budget)
+    deadline.started -= elapsed
+    for seconds in latencies:
+        deadline.record(seconds)
+    return deadline
+
+
+def test_first_step_gets_a_share_of_the_chain():
+    budget = chain().step_budget()
+    assert budget == pytest.approx((180 - SUBMIT_RESERVE) / STEP_SHARE, abs=0.1)
+
+
+def test_fast_steps_do_not_cap_later_budgets():
+    # Three 1s steps used to cap every later step at STEP_MIN with most of the chain left
+    budget = chain(elapsed=10, latencies=[1, 1, 1]).step_budget()
+    assert budget == pytest.approx((170 - SUBMIT_RESERVE) / STEP_SHARE, abs=0.1)
+    assert budget > STEP_MIN
+
+
+def test_slow_steps_raise_the_budget():
+    budget = chain(elapsed=30, latencies=[25]).step_budget()
+    assert budget == pytest.approx(STEP_HEADROOM * 25, abs=0.1)
+
+
+def test_floor_near_the_end():
+    assert chain(elapsed=140).step_budget() == pytest.approx(STEP_MIN, abs=0.1)
+
+
+def test_never_past_the_submit_reserve():
+    budget = chain(elapsed=175 - SUBMIT_RESERVE).step_budget()
+    assert budget == pytest.approx(5, abs=0.1)
+    assert chain(elapsed=180).step_budget() == 0.0
+    assert chain(elapsed=180 - SUBMIT_RESERVE).expired()
+
+
+def test_step_submit_timeout_stays_within_chain():
+    step = chain(elapsed=178).step()
+    assert step.submit_timeout() == pytest.approx(2, abs=0.1)
@@ -0,0 +1,114 @@
+# test_download_cache.py - revalidation, content addressing and eviction against a fake server
+import asyncio
+from contextlib import asynccontextmanager
+import download_cache
+from download_cache import DownloadCache
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.content = self
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.body), size):
+            yield self.body[i:i + size]
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+
+class FakeServer:
+    """Serves fixed bodies with an ETag and answers 304 when it matches"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.requests = []
+
+    @asynccontextmanager
+    async def request(self, method, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        body = self.bodies[url]
+        etag = f'"{len(body)}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            yield FakeResponse(304)
+        else:
+            yield FakeResponse(200, body, {"ETag": etag})
+
+
+def get(cache, server, url):
+    return asyncio.run(cache.get_bytes(server, url))
+
+
+def test_fresh_entry_is_served_without_a_request(tmp_path):
+    server = FakeServer({"http://quiz/a.csv": b"a,b\n1,2\n"})
+    cache = DownloadCache(str(tmp_path))
+    first = get(cache, server, "http://quiz/a.csv")
+    second = get(cache, server, "http://quiz/a.csv")
+    assert first == second and first[0] == b"a,b\n1,2\n"
+    assert len(server.requests) == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path, monkeypatch):
+    monkeypatch.setattr(download_cache, "DOWNLOAD_CACHE_FRESH", 0)
+    server = FakeServer({"http://quiz/a.csv": b"a,b\n1,2\n"})
+    cache = DownloadCache(str(tmp_path))
+    get(cache, server, "http://quiz/a.csv")
+    data, _ = get(cache, server, "http://quiz/a.csv")
+    assert data == b"a,b\n1,2\n"
+    assert server.requests[1][1] == {"If-None-Match": '"8"'}
+
+
+def test_same_content_at_two_urls_shares_a_blob(tmp_path):
+    server = FakeServer({"http://quiz/a.csv": b"same", "http://mirror/a.csv": b"same"})
+    cache = DownloadCache(str(tmp_path))
+    _, sha_a = get(cache, server, "http://quiz/a.csv")
+    _, sha_b = get(cache, server, "http://mirror/a.csv")
+    assert sha_a == sha_b
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+
+def test_least_recently_used_blob_is_evicted(tmp_path):
+    server = FakeServer({"http://quiz/old": b"x" * 60, "http://quiz/new": b"y" * 60})
+    cache = DownloadCache(str(tmp_path), max_bytes=100)
+    get(cache, server, "http://quiz/old")
+    cache.save_json(cache.fresh_sha256("http://quiz/old"), "text", "parsed")
+    get(cache, server, "http://quiz/new")
+    assert cache.fresh_sha256("http://quiz/old") is None
+    assert cache.fresh_sha256("http://quiz/new") is not None
+    assert list((tmp_path / "artifacts").iterdir()) == []
+
+
+def test_index_survives_restart(tmp_path):
+    server = FakeServer({"http://quiz/a.csv": b"a,b\n1,2\n"})
+    get(DownloadCache(str(tmp_path)), server, "http://quiz/a.csv")
+    get(DownloadCache(str(tmp_path)), server, "http://quiz/a.csv")
+    assert len(server.requests) == 1
+
+
+def test_workers_sharing_a_directory_see_each_others_entries(tmp_path):
+    server = FakeServer({"http://quiz/a": b"a" * 40, "http://quiz/b": b"b" * 40, "http://quiz/c": b"c" * 40})
+    first, second = DownloadCache(str(tmp_path), max_bytes=100), DownloadCache(str(tmp_path), max_bytes=100)
+    get(first, server, "http://quiz/a")
+    get(second, server, "http://quiz/b")
+    get(first, server, "http://quiz/b")
+    assert len(server.requests) == 2
+    get(second, server, "http://quiz/c")
+    assert first.fresh_sha256("http://quiz/a") is None
+    assert second.stats()["disk_bytes"] == 80
+    assert len(list((tmp_path / "blobs").iterdir())) == 2
+
+
+def test_blob_evicted_after_lookup_is_fetched_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(download_cache, "DOWNLOAD_CACHE_FRESH", 0)
+    server = FakeServer({"http://quiz/a.csv": b"a,b\n1,2\n"})
+    cache = DownloadCache(str(tmp_path))
+    _, sha256 = get(cache, server, "http://quiz/a.csv")
+    cache._memory.clear()
+    monkeypatch.setattr(cache, "open_blob", lambda entry: None)  # evicted between lookup and read
+    data, _ = get(cache, server, "http://quiz/a.csv")
+    assert data == b"a,b\n1,2\n"
+    assert [headers for _, headers in server.requests] == [{}, {"If-None-Match": '"8"'}, {}]
@@ -0,0 +1,62 @@
+# test_job_store.py - claiming and reaping jobs in the shared stores
+import os
+import time
+import pytest
+from job_store import FileJobStore, SQLiteJobStore, new_record
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        yield FileJobStore(str(tmp_path / "jobs"))
+    else:
+        store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        yield store
+        store.close()
+
+
+def test_claim_once(store):
+    store.add(new_record("a", "http://quiz/1", "e"))
+    claimed = store.claim("worker-1")
+    assert claimed["id"] == "a" and claimed["status"] == "running"
+    assert store.claim("worker-2") is None
+    assert store.counts() == {"queued": 0, "running": 1}
+
+
+def test_results_and_finish(store):
+    store.add(new_record("a", "http://quiz/1", "e"))
+    store.claim("worker-1")
+    store.add_result("a", {"quiz": 1, "correct": True})
+    store.update("a", status="done", summary={"quizzes_solved": 1}, finished_at=time.time())
+    record = store.load("a")
+    assert record["results"] == [{"quiz": 1, "correct": True}]
+    assert record["summary"] == {"quizzes_solved": 1}
+    assert store.counts() == {"queued": 0, "running": 0}
+
+
+def test_long_queued_job_is_not_reaped_when_claimed(tmp_path):
+    store = FileJobStore(str(tmp_path / "jobs"))
+    store.add(new_record("a", "http://quiz/1", "e"))
+    old = time.time() - 600
+    for marker in os.listdir(store._path("queue")):
+        os.utime(store._path("queue", marker), (old, old))  # sat in the queue for 10 minutes
+    store.claim("worker-1")
+    assert store.reap(stale_after=60) == []
+    assert store.load("a")["status"] == "running"
+
+
+def test_stale_running_job_is_reaped(store):
+    store.add(new_record("a", "http://quiz/1", "e"))
+    store.claim("worker-1")
+    time.sleep(0.05)
+    assert store.reap(stale_after=0.01) == ["a"]
+    record = store.load("a")
+    assert record["status"] == "failed" and record["error"] == "worker lost"
+
+
+def test_heartbeat_keeps_job_alive(store):
+    store.add(new_record("a", "http://quiz/1", "e"))
+    store.claim("worker-1")
+    time.sleep(0.05)
+    store.heartbeat({"a"})
+    assert store.reap(stale_after=0.04) == []
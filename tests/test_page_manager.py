@@ -0,0 +1,105 @@
+# test_page_manager.py - chain page reuse, including steps that time out mid-render
+import asyncio
+from page_manager import PageManager
+from pipeline import ChainPipeline
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.url = None
+
+    def on(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def goto(self, url):
+        self.url = url
+
+    async def evaluate(self, script):
+        return 1024
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+async def _rendering_load(url, new_page):
+    """A load that needs the browser; 'slow' pages never finish rendering"""
+    page = await new_page()
+    if "slow" in url:
+        await asyncio.sleep(3600)
+    return {"full_text": url}, page
+
+
+def test_release_reuses_page():
+    async def run():
+        manager = PageManager(FakeContext())
+        first = await manager.acquire()
+        await manager.release(first)
+        second = await manager.acquire()
+        assert second is first and first.url == "about:blank"
+        return manager.stats()
+
+    stats = asyncio.run(run())
+    assert stats["pages_created"] == 1 and stats["reused"] == 1
+
+
+def test_cancelled_load_gives_page_back():
+    async def run():
+        context = FakeContext()
+        pipeline = ChainPipeline(context, _rendering_load)
+        load = asyncio.create_task(pipeline.load_page("http://quiz/slow"))
+        await asyncio.sleep(0.01)
+        load.cancel()  # the step budget ran out mid-render
+        try:
+            await load
+        except asyncio.CancelledError:
+            pass
+        for step in range(3):
+            _, page = await pipeline.load_page(f"http://quiz/{step}")
+            pipeline.close_later(page)
+        await pipeline.aclose()
+        return context, pipeline.pages.stats()
+
+    context, stats = asyncio.run(run())
+    assert stats["pages_created"] == 1
+    assert stats["reused"] == 3
+    assert len(context.pages) == 1
+
+
+def test_page_closed_by_holder_is_taken_back():
+    async def run():
+        manager = PageManager(FakeContext())
+        page = await manager.acquire()
+        await page.close()  # dropped without release()
+        replacement = await manager.acquire()
+        return manager, page, replacement
+
+    manager, page, replacement = asyncio.run(run())
+    assert replacement is not page and replacement is manager._page
+    assert manager.recreated == {"closed": 1}
+    assert not manager._extra
+
+
+def test_memory_limit_recreates_page():
+    async def run():
+        manager = PageManager(FakeContext(), max_heap_bytes=512)
+        page = await manager.acquire()
+        await manager.release(page)
+        return manager, page, await manager.acquire()
+
+    manager, page, replacement = asyncio.run(run())
+    assert page.closed and replacement is not page
+    assert manager.recreated == {"memory": 1}
@@ -0,0 +1,100 @@
+# test_route_profile.py - routing outcomes, failures that must still settle the route, and what gets cached
+import asyncio
+import pytest
+from route_profile import RouteProfile, RouteStats, AssetCache, _cache_ttl
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type="script", method="GET"):
+        self.url = url
+        self.resource_type = resource_type
+        self.method = method
+
+    def is_navigation_request(self):
+        return self.resource_type == "document"
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.status = 200
+        self.headers = headers
+
+    async def body(self):
+        return b"console.log(1)"
+
+
+class FakeRoute:
+    def __init__(self, request, headers=None, fail=()):
+        self.request = request
+        self.headers = headers or {}
+        self.fail = fail
+        self.settled = []
+
+    async def _settle(self, how):
+        if how in self.fail:
+            raise RuntimeError(f"{how} failed")
+        self.settled.append(how)
+
+    async def fetch(self):
+        if "fetch" in self.fail:
+            raise RuntimeError("fetch failed")
+        return FakeResponse(self.headers)
+
+    async def fulfill(self, **kwargs):
+        await self._settle("fulfill")
+
+    async def continue_(self):
+        await self._settle("continue")
+
+    async def abort(self, reason="failed"):
+        await self._settle("abort")
+
+
+def handle(profile, route):
+    stats = RouteStats()
+    asyncio.run(profile._handle(route, stats))
+    return stats
+
+
+@pytest.mark.parametrize("fail, settled", [
+    (("fetch",), ["continue"]),
+    (("fetch", "continue"), ["abort"]),
+    (("fulfill",), ["continue"]),
+])
+def test_failed_handler_still_settles_the_route(fail, settled):
+    route = FakeRoute(FakeRequest("http://quiz/app.js"), fail=fail)
+    handle(RouteProfile("light", cache=AssetCache()), route)
+    assert route.settled == settled
+
+
+def test_script_without_cache_control_is_not_reused():
+    profile = RouteProfile("light", cache=AssetCache())
+    for _ in range(2):
+        handle(profile, FakeRoute(FakeRequest("http://quiz/app.js")))
+    assert profile.cache.stats()["entries"] == 0
+
+
+def test_script_with_max_age_is_reused():
+    profile = RouteProfile("light", cache=AssetCache())
+    headers = {"cache-control": "public, max-age=600"}
+    handle(profile, FakeRoute(FakeRequest("http://quiz/app.js"), headers))
+    stats = handle(profile, FakeRoute(FakeRequest("http://quiz/app.js"), headers))
+    assert stats.cached == 1
+
+
+@pytest.mark.parametrize("control, ttl", [
+    ("", 0),
+    ("max-age=60", 60),
+    ("public, max-age=31536000, immutable", 300),
+    ("max-age=600, no-cache", 0),
+    ("private, max-age=600", 0),
+    ("max-age=0", 0),
+])
+def test_cache_ttl(control, ttl):
+    assert min(_cache_ttl({"cache-control": control}), 300) == ttl
+
+
+def test_tracker_is_aborted():
+    route = FakeRoute(FakeRequest("https://www.google-analytics.com/collect"))
+    stats = handle(RouteProfile("light", cache=AssetCache()), route)
+    assert route.settled == ["abort"] and stats.trackers == 1
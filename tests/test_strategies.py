@@ -0,0 +1,50 @@
+# test_strategies.py - the solver race: early accept, falsy answers, failures and timeouts
+import asyncio
+from strategies import Strategy, NO_ANSWER, race
+
+
+def answers(value, delay=0.0):
+    async def run():
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+def test_confident_answer_wins_and_cancels_the_rest():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.append("llm")
+            raise
+
+    best = asyncio.run(race([Strategy("csv", answers(42), 0.9), Strategy("llm", slow, 0.5)]))
+    assert (best.name, best.answer) == ("csv", 42)
+    assert cancelled == ["llm"]
+
+
+def test_more_trusted_solver_is_awaited():
+    best = asyncio.run(race([Strategy("llm", answers(1), 0.5), Strategy("csv", answers(2, 0.01), 0.9)]))
+    assert (best.name, best.answer) == ("csv", 2)
+
+
+def test_zero_is_an_answer_but_no_answer_is_not():
+    best = asyncio.run(race([Strategy("csv", answers(NO_ANSWER), 0.9), Strategy("text", answers(0), 0.6)]))
+    assert (best.name, best.answer) == ("text", 0)
+
+
+def test_failing_solver_counts_as_no_answer():
+    async def broken():
+        raise ValueError("bad csv")
+
+    best = asyncio.run(race([Strategy("csv", broken, 0.9), Strategy("text", answers("x"), 0.6)]))
+    assert best.name == "text"
+
+
+def test_timeout_keeps_best_so_far():
+    seen = []
+    strategies = [Strategy("text", answers("x"), 0.6), Strategy("csv", answers("y", 3600), 0.9)]
+    best = asyncio.run(race(strategies, timeout=0.05, on_candidate=seen.append))
+    assert best.answer == "x" and [c.name for c in seen] == ["text"]